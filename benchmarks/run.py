@@ -0,0 +1,208 @@
+# benchmarks/run.py
+"""
+Timed, memory-tracked benchmarks of the pipeline stages on synthetic data at several
+scales, compared against a saved baseline.
+
+Usage:
+    python -m benchmarks.run [--scales small,medium] [--repeat 3]
+    python -m benchmarks.run --save_baseline      # accept the current numbers
+Exits with status 1 if a benchmark regressed beyond the tolerance.
+
+The baseline (benchmarks/baseline.json) is a per-machine artifact and is not
+committed: wall time and memory only compare on the hardware that recorded them.
+Record one with --save_baseline on each machine or CI runner (e.g. from the main
+branch, kept in the runner's cache); without one there is nothing to compare
+against, which --require_baseline turns into exit status 2.
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import shutil
+import statistics
+import sys
+import tempfile
+from datetime import datetime
+
+from src import metrics
+from src.data.storage import write_table
+from src.data.synthetic import synthetic_news, synthetic_prices
+from src.data.translation import TranslationProvider, Translator
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+baseline_default_path = os.path.join(BENCH_DIR, "baseline.json")
+results_default_dir = os.path.join(BENCH_DIR, "results")
+
+# (tickers, trading days, news articles)
+SCALES = {
+    "small": (10, 250, 500),
+    "medium": (50, 750, 3_000),
+    "large": (200, 1_250, 10_000),
+}
+
+# Metrics compared against the baseline, with the relative increase that counts as a regression
+COMPARED = {"wall_s": 0.25, "peak_rss_mb": 0.20}
+MIN_WALL_S = 0.05  # below this, timing noise dominates
+
+
+class StubProvider(TranslationProvider):
+    """Offline translator: returns every chunk unchanged (optionally after a fixed delay)."""
+
+    name = "stub"
+
+    def __init__(self, delay: float = 0.0):
+        self.delay = delay
+
+    def translate_batch(self, chunks, src_lang="auto", dest_lang="en"):
+        if self.delay:
+            import time
+            time.sleep(self.delay)
+        return list(chunks)
+
+
+def _benchmarks(n_tickers, n_days, n_articles):
+    """The benchmark steps of one scale, in dependency order: (name, setup-free callable)."""
+    from src.data.process_news import process_and_save_translated_news
+    from src.features.build_features import combine_news_and_prices
+    from src.features.technical_indicators import add_technical_indicators, run_scaling_pipeline
+    from src.models.train_model import train_model
+
+    prices = synthetic_prices(n_tickers, n_days)
+    end = str(prices["Date"].max().date())
+    news = synthetic_news(sorted(prices["ticker"].unique()), n_articles, start=str(prices["Date"].min().date()), end=end)
+    write_table(prices, "data/prices/stock_prices.csv",
+                partition_cols=["ticker"], year_col="Date")
+    write_table(news, "data/raw/news_original_language.csv", partition_cols=["ticker"])
+
+    return [
+        ("add_technical_indicators", lambda: add_technical_indicators(prices)),
+        ("process_news", lambda: process_and_save_translated_news(
+            translator=Translator(providers=[StubProvider()]), cache_path="data/cache/translations.sqlite")),
+        ("combine", lambda: combine_news_and_prices()),
+        ("scale", lambda: run_scaling_pipeline()),
+        ("train", lambda: train_model("random_forest")),
+    ]
+
+
+def run_scale(scale, repeat=1, verbose=False) -> list:
+    """Runs every benchmark of a scale `repeat` times in fresh directories; keeps the median."""
+    n_tickers, n_days, n_articles = SCALES[scale]
+    samples = {}
+    cwd = os.getcwd()
+    for _ in range(repeat):
+        workdir = tempfile.mkdtemp(prefix=f"bench_{scale}_")
+        try:
+            os.chdir(workdir)
+            for d in ("data/raw", "data/prices", "data/processed", "data/features", "models"):
+                os.makedirs(d, exist_ok=True)
+            output = contextlib.nullcontext() if verbose else contextlib.redirect_stdout(io.StringIO())
+            with output:
+                for name, step in _benchmarks(n_tickers, n_days, n_articles):
+                    metrics.reset()
+                    with metrics.stage(name):
+                        step()
+                    samples.setdefault(name, []).append(metrics.stage_records()[0])
+        finally:
+            os.chdir(cwd)
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    results = []
+    for name, records in samples.items():
+        result = {"scale": scale, "benchmark": name, "tickers": n_tickers, "days": n_days, "articles": n_articles}
+        for key in ("wall_s", "cpu_s", "peak_rss_mb"):
+            result[key] = round(statistics.median(r[key] for r in records), 3)
+        result["rows_read"] = records[0].get("rows_read", 0)
+        result["rows_written"] = records[0].get("rows_written", 0)
+        results.append(result)
+    return results
+
+
+def compare(results, baseline) -> list:
+    """Benchmarks whose compared metrics grew beyond the tolerance: (scale, name, metric, old, new)."""
+    old = {(r["scale"], r["benchmark"]): r for r in baseline.get("results", [])}
+    regressions = []
+    for r in results:
+        base = old.get((r["scale"], r["benchmark"]))
+        if base is None:
+            continue
+        for key, tolerance in COMPARED.items():
+            if key == "wall_s" and max(r[key], base[key]) < MIN_WALL_S:
+                continue
+            if base[key] and r[key] > base[key] * (1 + tolerance):
+                regressions.append((r["scale"], r["benchmark"], key, base[key], r[key]))
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Pipeline benchmarks on synthetic data")
+    parser.add_argument("--scales", type=str, default="small,medium", help=f"Comma-separated, from {list(SCALES)}")
+    parser.add_argument("--repeat", type=int, default=1, help="Runs per scale (median is kept)")
+    parser.add_argument("--baseline", type=str, default=baseline_default_path)
+    parser.add_argument("--save_baseline", action="store_true", help="Store this run as the new baseline")
+    parser.add_argument("--require_baseline", action="store_true",
+                        help="Exit with status 2 when there is no baseline to compare against (for CI)")
+    parser.add_argument("--verbose", action="store_true", help="Show the pipeline's own output")
+    args = parser.parse_args()
+
+    os.environ.setdefault("MPLBACKEND", "Agg")
+    metrics.enable()
+
+    results = []
+    for scale in args.scales.split(","):
+        print(f"⏱️ Running '{scale}' benchmarks {SCALES[scale]}...")
+        results.extend(run_scale(scale, args.repeat, args.verbose))
+
+    run = {
+        "created": datetime.now().isoformat(timespec="seconds"),
+        "python": sys.version.split()[0],
+        "machine": f"{platform.system()} {platform.machine()} ({os.cpu_count()} cpus)",
+        "results": results,
+    }
+    os.makedirs(results_default_dir, exist_ok=True)
+    results_path = os.path.join(results_default_dir, f"bench_{datetime.now():%Y-%m-%d_%H-%M-%S}.json")
+    with open(results_path, "w") as f:
+        json.dump(run, f, indent=2)
+
+    baseline = {}
+    if os.path.exists(args.baseline):
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+    old = {(r["scale"], r["benchmark"]): r for r in baseline.get("results", [])}
+
+    print(f"\n{'scale':<8} {'benchmark':<26} {'wall s':>9} {'cpu s':>9} {'peak MB':>9} {'vs baseline':>12}")
+    for r in results:
+        base = old.get((r["scale"], r["benchmark"]))
+        change = f"{(r['wall_s'] / base['wall_s'] - 1) * 100:+.0f}%" if base and base["wall_s"] else "-"
+        print(f"{r['scale']:<8} {r['benchmark']:<26} {r['wall_s']:>9.3f} {r['cpu_s']:>9.3f} "
+              f"{r['peak_rss_mb']:>9.1f} {change:>12}")
+    print(f"📁 Results saved to '{results_path}'")
+
+    if args.save_baseline:
+        shutil.copyfile(results_path, args.baseline)
+        print(f"📌 Baseline updated: '{args.baseline}'")
+        return
+
+    if not baseline:
+        print(f"⚠️ No baseline at '{args.baseline}': nothing was compared. Baselines are per machine; "
+              f"record one here with --save_baseline.")
+        if args.require_baseline:
+            sys.exit(2)
+        return
+
+    regressions = compare(results, baseline)
+    for scale, name, key, before, after in regressions:
+        print(f"❌ Regression: {scale}/{name} {key} {before} → {after}")
+    if regressions:
+        sys.exit(1)
+    compared = {(r["scale"], r["benchmark"]) for r in baseline.get("results", [])}
+    missing = [f"{r['scale']}/{r['benchmark']}" for r in results if (r["scale"], r["benchmark"]) not in compared]
+    if missing:
+        print(f"⚠️ Not in the baseline, so not compared: {', '.join(missing)}")
+    print("✅ No regressions against the baseline.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+# benchmarks/startup.py
+"""
+Startup-time benchmark: how long each `main0.py` mode spends importing before it
+does any work, measured in fresh interpreters, plus model artifact load times.
+
+Usage: python -m benchmarks.startup [--repeat 5]
+"""
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+# The modules each mode imports (mirrors the branches of main0.main)
+MODE_IMPORTS = {
+    "cli (--help)": [],
+    "fetch_news": ["src.data.fetch_news"],
+    "fetch_prices": ["src.data.fetch_prices"],
+    "process_news": ["src.data.process_news"],
+    "combine": ["src.features.build_features"],
+    "scale": ["src.features.technical_indicators"],
+    "train": ["src.models.train_model"],
+    "predict": ["src.data.fetch_prices", "src.models.predict"],
+}
+
+IMPORT_SNIPPET = (
+    "import time, importlib; start = time.perf_counter(); import main0\n"
+    "for name in {modules!r}: importlib.import_module(name)\n"
+    "print(time.perf_counter() - start)"
+)
+
+
+def time_imports(modules, repeat=5):
+    """Median wall time (s) of importing `main0` and `modules` in a fresh interpreter."""
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    samples = []
+    for _ in range(repeat):
+        out = subprocess.run(
+            [sys.executable, "-c", IMPORT_SNIPPET.format(modules=modules)],
+            cwd=root, capture_output=True, text=True, check=True,
+        )
+        samples.append(float(out.stdout.strip().splitlines()[-1]))
+    return statistics.median(samples)
+
+
+def time_artifact_loads(models_dir="models", repeat=5):
+    """Median load time (s) of each saved model, with and without memory mapping."""
+    from src.models.artifacts import load_artifact
+
+    results = {}
+    if not os.path.isdir(models_dir):
+        return results
+    for name in sorted(os.listdir(models_dir)):
+        if not name.endswith(".pkl"):
+            continue
+        path = os.path.join(models_dir, name)
+        for mmap in (True, False):
+            samples = []
+            for _ in range(repeat):
+                start = time.perf_counter()
+                load_artifact(path, mmap=mmap)
+                samples.append(time.perf_counter() - start)
+            results[(name, "mmap" if mmap else "copy")] = statistics.median(samples)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Startup-time benchmark")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    print(f"⏱️ Import time per mode (median of {args.repeat} fresh interpreters):")
+    for mode, modules in MODE_IMPORTS.items():
+        print(f"  {mode:<16} {time_imports(modules, args.repeat) * 1000:8.1f} ms")
+
+    loads = time_artifact_loads(repeat=args.repeat)
+    if loads:
+        print("\n⏱️ Artifact load time:")
+        for (name, how), seconds in loads.items():
+            print(f"  {name:<40} {how:<5} {seconds * 1000:8.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,71 +1,269 @@
 # main.py
+# Each mode imports only what it needs (inside its branch below): sklearn, nltk, langdetect,
+# deep_translator and matplotlib together take seconds to import, which every cron run paid.
 import argparse
-from src.data.fetch_news import fetch_and_save_news
-from src.data.fetch_prices import fetch_and_save_stock_data
-from src.data.process_news import process_and_save_translated_news
-from src.features.build_features import combine_news_and_prices
-from src.features.technical_indicators import run_scaling_pipeline
-from src.models.train_model import train_model
+import os
+import sys
+from src import metrics
+
+
+def build_pipeline(args, news_jobs):
+    """The `--mode all` DAG: both fetches are independent, everything after them is cached by content."""
+    from src.data.fetch_news import fetch_and_save_news_bulk
+    from src.data.fetch_prices import fetch_and_save_stock_data, fetch_and_save_stock_data_bulk, read_ticker_list
+    from src.data.process_news import process_and_save_translated_news
+    from src.features.build_features import combine_news_and_prices
+    from src.features.technical_indicators import run_scaling_pipeline
+    from src.models.train_model import train_model
+    from src.pipeline import Pipeline, Stage
+    import src.data.process_news
+    import src.data.storage
+    import src.data.translation
+    import src.data.translation_cache
+    import src.data.utils
+    import src.features.build_features
+    import src.features.matrices
+    import src.features.technical_indicators
+    import src.models.artifacts
+    import src.models.train_model
+
+    tickers = read_ticker_list(args.tickers, args.tickers_file)
+    if tickers:
+        fetch_prices = (fetch_and_save_stock_data_bulk,
+                        {"tickers": tickers, "start": args.start_date, "end": args.end_date,
+                         "max_workers": args.max_workers, "rate_per_minute": args.rate_limit})
+    else:
+        fetch_prices = (fetch_and_save_stock_data,
+                        {"ticker": args.ticker, "start": args.start_date, "end": args.end_date})
+
+    stages = [
+        Stage("fetch_news", fetch_and_save_news_bulk,
+              outputs=["data/raw/news_original_language.csv"],
+              params={"jobs": news_jobs, "start_date": args.start_date, "end_date": args.end_date,
+                      "max_workers": args.max_workers},
+              cacheable=False),
+        Stage("fetch_prices", fetch_prices[0],
+              outputs=["data/prices/stock_prices.csv"],
+              params=fetch_prices[1],
+              cacheable=False),
+        Stage("process_news", process_and_save_translated_news,
+              inputs=["data/raw/news_original_language.csv"],
+              outputs=["data/processed/news_translated_cleaned.csv"],
+              deps=["fetch_news"],
+              params={"chunk_size": args.chunk_size, "incremental": not args.full_refresh},
+              modules=[src.data.process_news, src.data.translation, src.data.translation_cache, src.data.utils,
+                       src.data.storage]),
+        Stage("combine", combine_news_and_prices,
+              inputs=["data/processed/news_translated_cleaned.csv", "data/prices/stock_prices.csv"],
+              outputs=["data/features/combined.csv"],
+              deps=["process_news", "fetch_prices"],
+              params={"incremental": args.incremental},
+              modules=[src.features.build_features, src.features.technical_indicators, src.data.storage]),
+        Stage("scale", run_scaling_pipeline,
+              inputs=["data/features/combined.csv"],
+              outputs=["data/features/combined_scaled_train.csv", "data/features/combined_scaled_test.csv",
+                       "data/features/combined_scaled_all.csv", "models/price_scaler.pkl",
+                       "models/feature_manifest.json", "data/features/matrices/X_train.npy",
+                       "data/features/matrices/y_train.npy", "data/features/matrices/X_test.npy",
+                       "data/features/matrices/y_test.npy"],
+              deps=["combine"],
+              params={"incremental": args.incremental, "feature_set": args.feature_set},
+              modules=[src.features.technical_indicators, src.data.storage, src.features.matrices,
+                       src.models.artifacts]),
+        Stage("train", train_model,
+              inputs=["models/feature_manifest.json", "data/features/matrices/X_train.npy",
+                      "data/features/matrices/y_train.npy", "data/features/matrices/X_test.npy",
+                      "data/features/matrices/y_test.npy"],
+              outputs=[f"models/stock_model_{args.model}.pkl"],
+              deps=["scale"],
+              params={"model_name": args.model},
+              modules=[src.models.train_model, src.features.matrices, src.models.artifacts]),
+    ]
+    return Pipeline(stages)
 
 
 def main():
     parser = argparse.ArgumentParser(description="News & Stock ML Pipeline")
     parser.add_argument("--mode", type=str, required=True,
-                        choices=["fetch_news", "fetch_prices", "process_news", "combine", "train", "scale", "all"],
+                        choices=["fetch_news", "fetch_prices", "process_news", "combine", "train", "train_all", "train_online", "backtest", "predict", "serve",
+                                 "scale", "all",
+                                 "migrate_storage", "stand_in"],
                         help="Which step to run")
     parser.add_argument("--ticker", type=str, default="AAPL", help="Stock ticker symbol")
+    parser.add_argument("--tickers", type=str, default=None,
+                        help="Comma-separated ticker list for bulk price fetching (e.g. AAPL,MSFT,NVDA)")
+    parser.add_argument("--tickers_file", type=str, default=None,
+                        help="File with one ticker per line for bulk price fetching")
+    parser.add_argument("--max_workers", type=int, default=4, help="Concurrent requests for news and bulk price fetching")
+    parser.add_argument("--rate_limit", type=float, default=8,
+                        help="API requests per minute for bulk fetching (Twelve Data free plan: 8)")
     parser.add_argument("--start_date", type=str, default="2021-01-01", help="Start date (YYYY-MM-DD)")
     parser.add_argument("--end_date", type=str, default="2025-07-04", help="End date (YYYY-MM-DD)")
-    parser.add_argument('--model', type=str, default='random_forest',
-                        choices=['random_forest', 'logistic_regression', 'gradient_boosting', 'xgboost'],
-                        help="Specify model to train (default: random_forest)")
+    parser.add_argument('--model', type=str, default=None,
+                        choices=['random_forest', 'logistic_regression', 'gradient_boosting', 'xgboost', 'sgd'],
+                        help="Specify model to train (default: random_forest; sgd for train_online and --online)")
     parser.add_argument('--general_news', action='store_true',
                         help="Fetch general financial news (not just company-specific)")
+    parser.add_argument('--incremental', action='store_true',
+                        help="Reuse persisted indicator state and only compute indicators for new bars")
+
+    parser.add_argument('--feature_set', type=str, default="base", choices=["base", "extended"],
+                        help="Model inputs for scale/backtest: base (news, MAs, MACD, Bollinger, RSI) or "
+                             "extended (plus ATR, stochastic, OBV, VWAP, returns, volatility and lagged returns)")
+
+    parser.add_argument('--chunk_size', type=int, default=None,
+                        help="Process raw news in streaming batches of this many articles")
+
+    parser.add_argument('--full_refresh', action='store_true',
+                        help="Reprocess all raw news instead of only articles not processed yet "
+                             "(train_online: retrain from the whole history)")
+
+    parser.add_argument('--models', type=str, default=None,
+                        help="Comma-separated models for train_all/backtest (default: all)")
+    parser.add_argument('--grid_file', type=str, default=None,
+                        help="JSON file with a parameter grid per model for train_all")
+    parser.add_argument('--n_jobs', type=int, default=None,
+                        help="Total CPU cores train_all/backtest may use (default: all)")
+    parser.add_argument('--online', action='store_true',
+                        help="predict/serve with the current train_online version of --model")
+    parser.add_argument('--folds', type=int, default=10, help="Number of walk-forward folds for backtest")
+    parser.add_argument('--bars_file', type=str, default=None,
+                        help="CSV/JSON of new bars (ticker, Date, Close) to score in predict mode "
+                             "(default: the latest local bar of each ticker)")
+    parser.add_argument('--port', type=int, default=8765, help="Port of the local prediction server / stand-in API")
+    parser.add_argument('--profile', action='store_true',
+                        help="Record wall/CPU time, peak RSS, rows, HTTP calls, retries and cache hits "
+                             "per stage and write a JSON/CSV run report to results/")
+    parser.add_argument('--profile_stage', type=str, default=None,
+                        help="With --profile, also profile this stage's code (e.g. combine)")
+    parser.add_argument('--profiler', type=str, default="cprofile", choices=["cprofile", "pyinstrument"],
+                        help="Profiler used for --profile_stage")
+    parser.add_argument('--no_cache', action='store_true',
+                        help="In 'all' mode, rerun every stage instead of skipping up-to-date ones")
+    parser.add_argument('--http_mode', type=str, default=None, choices=["live", "record", "replay", "synthetic"],
+                        help="live: call the APIs; record: call them and archive every response; "
+                             "replay: serve responses from the archive only; synthetic: generate them "
+                             "(default: $HTTP_MODE or live)")
+    parser.add_argument('--http_archive', type=str, default=None,
+                        help="Response archive for record/replay (default: data/cache/http_archive.sqlite)")
+    parser.add_argument('--replay_speedup', type=float, default=None,
+                        help="Replay/synthetic speed-up over recorded latencies and API rate limits (inf = no waits)")
 
     args = parser.parse_args()
+    if args.mode == "train_online" or args.online:
+        from src.models.online import ONLINE_UPDATES, load_current
+        args.model = args.model or "sgd"
+        if args.model not in ONLINE_UPDATES:
+            parser.error(f"--model {args.model} can't be trained incrementally; choose from {list(ONLINE_UPDATES)}")
+        if args.mode in ("predict", "serve") and args.online and load_current(args.model) is None:
+            parser.error(f"no online version of '{args.model}' yet; run --mode train_online --model {args.model} first")
+    args.model = args.model or "random_forest"
+
+    # Company-specific news
+    news_jobs = [{"query": args.ticker}]
+    # General financial news
+    general_news_job = {
+        "query": "stock market OR economy OR inflation OR interest rates",
+        "news_type": "general",
+        "ticker": "GENERAL",
+    }
+
+    # Environment rather than arguments, so every session and worker thread picks them up
+    for name, value in (("HTTP_MODE", args.http_mode), ("HTTP_ARCHIVE", args.http_archive),
+                        ("HTTP_REPLAY_SPEEDUP", args.replay_speedup)):
+        if value is not None:
+            os.environ[name] = str(value)
+    if os.getenv("HTTP_MODE", "live") in ("replay", "synthetic"):
+        # Keys are never sent (nor archived) offline, but the fetchers refuse to start without them
+        os.environ.setdefault("GNEWS_API_KEY", "offline")
+        os.environ.setdefault("TWELVE_DATA_API_KEY", "offline")
 
+    if args.profile:
+        metrics.enable(args.profile_stage, args.profiler)
+    try:
+        if args.mode == "all":
+            run_mode(args, news_jobs, general_news_job)  # the pipeline measures each of its stages
+        else:
+            with metrics.stage(args.mode):
+                run_mode(args, news_jobs, general_news_job)
+    finally:
+        metrics.write_report(args.mode)
+
+
+def run_mode(args, news_jobs, general_news_job):
     if args.mode == "fetch_news":
-        # Company-specific news
-        fetch_and_save_news(args.ticker, args.start_date, args.end_date)
         if args.general_news:
-            # General financial news
-            fetch_and_save_news(
-                ticker="GENERAL",
-                start_date=args.start_date,
-                end_date=args.end_date,
-                query="stock market OR economy OR inflation OR interest rates",
-                news_type="general"
-            )
+            news_jobs.append(general_news_job)
+        from src.data.fetch_news import fetch_and_save_news_bulk
+        fetch_and_save_news_bulk(news_jobs, args.start_date, args.end_date, max_workers=args.max_workers)
 
     elif args.mode == "fetch_prices":
-        fetch_and_save_stock_data(args.ticker, args.start_date, args.end_date)
+        from src.data.fetch_prices import fetch_and_save_stock_data, fetch_and_save_stock_data_bulk, read_ticker_list
+        tickers = read_ticker_list(args.tickers, args.tickers_file)
+        if tickers:
+            fetch_and_save_stock_data_bulk(tickers, args.start_date, args.end_date,
+                                           max_workers=args.max_workers, rate_per_minute=args.rate_limit)
+        else:
+            fetch_and_save_stock_data(args.ticker, args.start_date, args.end_date)
 
     elif args.mode == "process_news":
-        process_and_save_translated_news()
+        from src.data.process_news import process_and_save_translated_news
+        process_and_save_translated_news(chunk_size=args.chunk_size, incremental=not args.full_refresh)
 
     elif args.mode == "combine":
-        combine_news_and_prices()
+        from src.features.build_features import combine_news_and_prices
+        combine_news_and_prices(incremental=args.incremental)
 
     elif args.mode == "scale":
-        run_scaling_pipeline()
+        from src.features.technical_indicators import run_scaling_pipeline
+        run_scaling_pipeline(incremental=args.incremental, feature_set=args.feature_set)
 
     elif args.mode == "train":
+        from src.models.train_model import train_model
         train_model(args.model)
 
+    elif args.mode == "train_all":
+        from src.models.train_all import train_all_models
+        train_all_models(args.models.split(",") if args.models else None, args.grid_file, args.n_jobs)
+
+    elif args.mode == "train_online":
+        from src.models.online import train_online
+        train_online(args.model, feature_set=args.feature_set, full_refresh=args.full_refresh)
+
+    elif args.mode == "backtest":
+        from src.features.technical_indicators import FEATURE_SETS
+        from src.models.backtest import run_backtest
+        run_backtest(args.models.split(",") if args.models else None, n_folds=args.folds, n_jobs=args.n_jobs,
+                     feature_cols=FEATURE_SETS[args.feature_set])
+
+    elif args.mode == "predict":
+        from src.data.fetch_prices import read_ticker_list
+        from src.models.predict import predict_latest
+        predict_latest(args.model, read_ticker_list(args.tickers, args.tickers_file), args.bars_file, online=args.online)
+
+    elif args.mode == "serve":
+        from src.models.predict import serve
+        serve(args.model, port=args.port, online=args.online)
+
+    elif args.mode == "stand_in":
+        from src.data.replay import serve_archive
+        mode = os.getenv("HTTP_MODE", "replay")
+        serve_archive(port=args.port, mode="synthetic" if mode == "synthetic" else "replay")
+
+    elif args.mode == "migrate_storage":
+        from src.data.storage import migrate_csv_files
+        migrate_csv_files()
+
     elif args.mode == "all":
-        fetch_and_save_news(args.ticker, args.start_date, args.end_date)
-        fetch_and_save_news(
-            ticker="GENERAL",
-            start_date=args.start_date,
-            end_date=args.end_date,
-            query="stock market OR economy OR inflation OR interest rates",
-            news_type="general"
-        )
-        fetch_and_save_stock_data(args.ticker, args.start_date, args.end_date)
-        process_and_save_translated_news()
-        combine_news_and_prices()
-        run_scaling_pipeline()
-        train_model()
+        from src.pipeline import pipeline_state_default_path
+        if args.no_cache and os.path.exists(pipeline_state_default_path):
+            os.remove(pipeline_state_default_path)
+        status = build_pipeline(args, news_jobs + [general_news_job]).run()
+        not_ok = [name for name, s in status.items() if s not in ("ran", "cached")]
+        if not_ok:
+            # Non-zero exit so cron/CI notice a partial run
+            print(f"❌ Pipeline incomplete: {', '.join(f'{name} ({status[name]})' for name in not_ok)}")
+            sys.exit(1)
 
 
 if __name__ == "__main__":
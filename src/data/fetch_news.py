@@ -1,49 +1,192 @@
 import os
+import json
+import hashlib
+import threading
 import pandas as pd
 from datetime import datetime, timedelta
-import time
-import requests
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from dotenv import load_dotenv
+from src import metrics
 from src.data.utils import save_to_csv
+from src.data.http_client import TokenBucket, make_session
 
-def fetch_and_save_news(query, start_date, end_date, raw_file="data/raw/news_original_language.csv", news_type="company", ticker=None):
+# Overridable with the GNEWS_URL environment variable (e.g. for a local mock server)
+GNEWS_URL = "https://gnews.io/api/v4/search"
+
+# Replaces the old fixed `time.sleep(1)` between windows
+DEFAULT_RATE_PER_MINUTE = 60
+
+checkpoint_default_dir = "data/raw/checkpoints"
+
+
+def news_windows(start_date, end_date, days=10):
+    """Splits [start_date, end_date] into the 10-day (from, to) windows requested from GNews."""
+    windows = []
+    current_start = datetime.strptime(start_date, "%Y-%m-%d")
+    end = datetime.strptime(end_date, "%Y-%m-%d")
+    while current_start < end:
+        current_end = min(current_start + timedelta(days=days), end)
+        windows.append((current_start, current_end))
+        current_start = current_end + timedelta(days=1)
+    return windows
+
+
+def _checkpoint_path(checkpoint_dir, query, news_type, ticker):
+    key = hashlib.sha1(f"{query}|{news_type}|{ticker}".encode("utf-8")).hexdigest()[:16]
+    return os.path.join(checkpoint_dir, f"news_{key}.jsonl")
+
+
+def _window_key(window):
+    return f"{window[0]:%Y-%m-%d}/{window[1]:%Y-%m-%d}"
+
+
+def _load_checkpoint(path):
+    """
+    Reads a checkpoint file: one JSON line per finished window with its articles.
+    A truncated last line (crash mid-write) is ignored and that window refetched.
+    """
+    done = {}
+    if not os.path.exists(path):
+        return done
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            try:
+                entry = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+            done[entry["window"]] = entry
+    return done
+
+
+def _articles_frame(entries, query, news_type, ticker):
+    rows = []
+    for entry in entries:
+        for article in entry["articles"]:
+            article["query"] = query
+            article["type"] = news_type
+            article["fetch_date"] = pd.Timestamp(entry["fetch_date"]).date()
+            article["ticker"] = ticker if ticker else query
+            rows.append(article)
+    return pd.DataFrame(rows)
+
+
+def fetch_and_save_news_bulk(
+    jobs,
+    start_date,
+    end_date,
+    raw_file="data/raw/news_original_language.csv",
+    max_workers=4,
+    rate_per_minute=DEFAULT_RATE_PER_MINUTE,
+    checkpoint_dir=checkpoint_default_dir,
+):
+    """
+    Fetches news for several queries concurrently, one request per 10-day window.
+
+    All windows of all jobs run on one thread pool under a shared token-bucket rate
+    limiter and pooled HTTP session. Each finished window is appended to a per-query
+    checkpoint file as soon as it completes, so an interrupted backfill resumes from
+    where it stopped; the raw news table is written once at the end and the
+    checkpoints of completed jobs are removed.
+
+    Args:
+        jobs (list): Dicts with 'query' and optional 'news_type' (default 'company') and 'ticker'.
+        start_date (str): Start date (YYYY-MM-DD).
+        end_date (str): End date (YYYY-MM-DD).
+        raw_file (str): Logical path of the raw news table.
+        max_workers (int): Maximum number of requests in flight.
+        rate_per_minute (float): Request budget per minute.
+        checkpoint_dir (str): Directory for the resumable checkpoint files.
+    """
     load_dotenv()
     api_key = os.getenv("GNEWS_API_KEY")
     if not api_key:
         print("❌ GNEWS_API_KEY not found.")
         return
 
-    all_articles = []
-    current_start = datetime.strptime(start_date, "%Y-%m-%d")
-    end = datetime.strptime(end_date, "%Y-%m-%d")
+    base_url = os.getenv("GNEWS_URL", GNEWS_URL)
+    windows = news_windows(start_date, end_date)
+    os.makedirs(checkpoint_dir, exist_ok=True)
 
-    while current_start < end:
-        current_end = min(current_start + timedelta(days=10), end)
-        url = (
-            f"https://gnews.io/api/v4/search?q={query}&"
-            f"from={current_start.strftime('%Y-%m-%dT%H:%M:%SZ')}&"
-            f"to={current_end.strftime('%Y-%m-%dT%H:%M:%SZ')}&"
-            f"token={api_key}"
-        )
-        try:
-            response = requests.get(url)
-            response.raise_for_status()
-            data = response.json()
-            articles = data.get('articles', [])
-            print(f"📥 {len(articles)} articles: {query} ({current_start.date()} to {current_end.date()})")
-            for article in articles:
-                article["query"] = query
-                article["type"] = news_type
-                article["fetch_date"] = pd.Timestamp.now().date()
-                article["ticker"] = ticker if ticker else query  # <-- NEW
-                all_articles.append(article)
-        except Exception as e:
-            print(f"❌ Fetch error for {query}: {e}")
-        current_start = current_end + timedelta(days=1)
-        time.sleep(1)
+    states = []
+    for job in jobs:
+        query = job["query"]
+        news_type = job.get("news_type", "company")
+        ticker = job.get("ticker")
+        path = _checkpoint_path(checkpoint_dir, query, news_type, ticker)
+        done = _load_checkpoint(path)
+        todo = [w for w in windows if _window_key(w) not in done]
+        if done:
+            metrics.count("checkpoint_windows_reused", len(done))
+            print(f"⏩ Resuming '{query}': {len(done)} windows already fetched, {len(todo)} to go.")
+        states.append({
+            "query": query, "news_type": news_type, "ticker": ticker,
+            "path": path, "todo": todo, "failed": 0, "lock": threading.Lock(),
+        })
+
+    limiter = TokenBucket.per_minute(rate_per_minute, burst=max_workers)
+    session = make_session(max_workers)
+
+    def fetch(state, window):
+        current_start, current_end = window
+        params = {
+            "q": state["query"],
+            "from": current_start.strftime('%Y-%m-%dT%H:%M:%SZ'),
+            "to": current_end.strftime('%Y-%m-%dT%H:%M:%SZ'),
+            "token": api_key,
+        }
+        limiter.acquire()
+        response = session.get(base_url, params=params)
+        response.raise_for_status()
+        articles = response.json().get('articles', [])
+        entry = {
+            "window": _window_key(window),
+            "fetch_date": str(pd.Timestamp.now().date()),
+            "articles": articles,
+        }
+        with state["lock"], open(state["path"], "a", encoding="utf-8") as f:
+            f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+        return len(articles)
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = {
+            executor.submit(fetch, state, window): (state, window)
+            for state in states for window in state["todo"]
+        }
+        for future in as_completed(futures):
+            state, (current_start, current_end) = futures[future]
+            try:
+                count = future.result()
+                print(f"📥 {count} articles: {state['query']} ({current_start.date()} to {current_end.date()})")
+            except Exception as e:
+                state["failed"] += 1
+                metrics.count("fetch_errors.news")
+                print(f"❌ Fetch error for {state['query']} ({current_start.date()} to {current_end.date()}): {e}")
+    session.close()
 
-    if all_articles:
-        df = pd.DataFrame(all_articles)
-        save_to_csv(df, raw_file, start_date, end_date)
+    frames = []
+    for state in states:
+        entries = _load_checkpoint(state["path"]).values()
+        df = _articles_frame(entries, state["query"], state["news_type"], state["ticker"])
+        if not df.empty:
+            frames.append(df)
+        if state["failed"]:
+            print(f"⚠️ {state['failed']} windows failed for '{state['query']}'; rerun to resume.")
 
+    if frames:
+        save_to_csv(pd.concat(frames, ignore_index=True), raw_file, start_date, end_date)
 
+    # Only drop checkpoints once their articles are safely in the raw table
+    for state in states:
+        if not state["failed"] and os.path.exists(state["path"]):
+            os.remove(state["path"])
+
+
+def fetch_and_save_news(query, start_date, end_date, raw_file="data/raw/news_original_language.csv", news_type="company", ticker=None):
+    fetch_and_save_news_bulk(
+        [{"query": query, "news_type": news_type, "ticker": ticker}],
+        start_date,
+        end_date,
+        raw_file=raw_file,
+    )
@@ -3,8 +3,55 @@ import os
 import requests
 import pandas as pd
 from dotenv import load_dotenv
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from src import metrics
+from src.data.storage import read_table, upsert_table
+from src.data.http_client import TokenBucket, make_session
 # from datetime import datetime
 
+# Overridable with the TWELVE_DATA_URL environment variable (e.g. for a local mock server)
+TWELVE_DATA_URL = "https://api.twelvedata.com/time_series"
+
+# Twelve Data free plan: 8 requests per minute
+DEFAULT_RATE_PER_MINUTE = 8
+
+# Twelve Data sends every value as a string; bars are stored as typed float64 columns
+OHLCV_COLUMNS = {"open": "Open", "high": "High", "low": "Low", "close": "Close", "volume": "Volume"}
+
+
+def _fetch_stock_frame(ticker, start, end, api_key, session=None):
+    """
+    Downloads daily bars for one ticker and returns them as a DataFrame (None on API error).
+    """
+    url = (
+        f"{os.getenv('TWELVE_DATA_URL', TWELVE_DATA_URL)}?symbol={ticker}&interval=1day"
+        f"&start_date={start}&end_date={end}&apikey={api_key}"
+    )
+    response = (session or requests).get(url)
+    response.raise_for_status()
+    data = response.json()
+    if "values" not in data:
+        print(f"❌ API error for {ticker}: {data.get('message', 'Unknown error')}")
+        return None
+
+    df_new = pd.DataFrame(data["values"])
+    df_new['datetime'] = pd.to_datetime(df_new['datetime'])
+    df_new = df_new.rename(columns={'datetime': 'Date', **OHLCV_COLUMNS})
+    for col in OHLCV_COLUMNS.values():
+        if col in df_new.columns:
+            df_new[col] = pd.to_numeric(df_new[col], errors='coerce').astype('float64')
+    df_new['ticker'] = ticker
+    df_new['start_date'] = start
+    df_new['end_date'] = end
+    df_new['fetch_date'] = pd.Timestamp.now().date()
+    return df_new
+
+
+def _save_stock_frame(df_new, filename):
+    # Only the affected tickers' partitions are rewritten; other tickers are never read
+    upsert_table(df_new, filename, key_cols=['ticker', 'Date'], partition_cols=['ticker'], year_col='Date')
+
+
 def fetch_and_save_stock_data(ticker, start, end, filename="data/prices/stock_prices.csv"):
     load_dotenv()
     api_key = os.getenv("TWELVE_DATA_API_KEY")
@@ -12,41 +59,124 @@ def fetch_and_save_stock_data(ticker, start, end, filename="data/prices/stock_pr
         print("❌ TWELVE_DATA_API_KEY not found.")
         return
 
-    url = (
-        f"https://api.twelvedata.com/time_series?symbol={ticker}&interval=1day"
-        f"&start_date={start}&end_date={end}&apikey={api_key}"
-    )
-
     try:
-        response = requests.get(url)
-        response.raise_for_status()
-        data = response.json()
-        if "values" not in data:
-            print(f"❌ API error: {data.get('message', 'Unknown error')}")
+        with make_session(1) as session:
+            df_new = _fetch_stock_frame(ticker, start, end, api_key, session)
+        if df_new is None:
             return
-
-        df_new = pd.DataFrame(data["values"])
-        df_new['datetime'] = pd.to_datetime(df_new['datetime'])
-        df_new = df_new.rename(columns={
-            'datetime': 'Date',
-            'close': 'Close'
-        })
-        df_new['Close'] = pd.to_numeric(df_new['Close'], errors='coerce')
-        df_new['ticker'] = ticker
-        df_new['start_date'] = start
-        df_new['end_date'] = end
-        df_new['fetch_date'] = pd.Timestamp.now().date()
-
-        try:
-            df_existing = pd.read_csv(filename)
-            df_existing['Date'] = pd.to_datetime(df_existing['Date'], errors='coerce')
-            df_combined = pd.concat([df_existing, df_new], ignore_index=True)
-            df_combined.drop_duplicates(subset=['ticker', 'Date'], inplace=True)
-        except FileNotFoundError:
-            df_combined = df_new
-
-        df_combined.sort_values(by=['ticker', 'Date'], inplace=True)
-        df_combined.to_csv(filename, index=False)
-        print(f"✅ Saved stock data for {ticker} to '{filename}' with {len(df_combined)} rows.")
+        _save_stock_frame(df_new, filename)
+        print(f"✅ Saved stock data for {ticker} to '{filename}' with {len(df_new)} new rows.")
     except Exception as e:
+        metrics.count("fetch_errors.prices")
         print(f"❌ Error fetching price data: {e}")
+
+
+def read_ticker_list(tickers=None, tickers_file=None):
+    """
+    Builds a de-duplicated ticker list from a comma-separated string and/or a file
+    with one ticker per line (blank lines and '#' comments are ignored).
+    """
+    result = []
+    if tickers:
+        result += [t.strip() for t in tickers.split(",")]
+    if tickers_file:
+        with open(tickers_file, "r") as f:
+            result += [line.split("#")[0].strip() for line in f]
+    return list(dict.fromkeys(t for t in result if t))
+
+
+def fetch_and_save_stock_data_bulk(
+    tickers,
+    start,
+    end,
+    filename="data/prices/stock_prices.csv",
+    max_workers=4,
+    rate_per_minute=DEFAULT_RATE_PER_MINUTE,
+):
+    """
+    Fetches many tickers concurrently and stores them with a single batch write.
+
+    Requests share one pooled HTTP session, run on at most `max_workers` threads and
+    are spaced 60 / `rate_per_minute` seconds apart by a token bucket without burst, so
+    no 60-second window holds more requests than the API quota.
+
+    Args:
+        tickers (list): Ticker symbols to fetch.
+        start (str): Start date (YYYY-MM-DD).
+        end (str): End date (YYYY-MM-DD).
+        filename (str): Logical path of the price table.
+        max_workers (int): Maximum number of requests in flight.
+        rate_per_minute (float): Request budget per minute.
+
+    Returns:
+        list: Tickers that could not be fetched.
+    """
+    load_dotenv()
+    api_key = os.getenv("TWELVE_DATA_API_KEY")
+    if not api_key:
+        print("❌ TWELVE_DATA_API_KEY not found.")
+        return list(tickers)
+
+    limiter = TokenBucket.per_minute(rate_per_minute, burst=1)
+    session = make_session(max_workers)
+
+    def fetch(ticker):
+        limiter.acquire()
+        return _fetch_stock_frame(ticker, start, end, api_key, session)
+
+    frames, failed = [], []
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = {executor.submit(fetch, ticker): ticker for ticker in tickers}
+        for future in as_completed(futures):
+            ticker = futures[future]
+            try:
+                df_new = future.result()
+            except Exception as e:
+                metrics.count("fetch_errors.prices")
+                print(f"❌ Error fetching price data for {ticker}: {e}")
+                df_new = None
+            if df_new is None:
+                failed.append(ticker)
+            else:
+                print(f"📥 {len(df_new)} bars: {ticker}")
+                frames.append(df_new)
+    session.close()
+
+    if frames:
+        df_all = pd.concat(frames, ignore_index=True)
+        _save_stock_frame(df_all, filename)
+        print(f"✅ Saved stock data for {len(frames)} tickers to '{filename}' with {len(df_all)} new rows.")
+    if failed:
+        print(f"⚠️ Failed tickers: {', '.join(failed)}")
+    return failed
+
+
+def load_stock_data(tickers=None, start=None, end=None, columns=None, filename="data/prices/stock_prices.csv"):
+    """
+    Reads stored prices for the given tickers and date range.
+
+    Filters are pushed down to the ticker/year partitions, so asking for
+    AAPL 2023–2024 only opens AAPL's 2023 and 2024 files.
+
+    Args:
+        tickers (str | list): Ticker or list of tickers (default: all).
+        start (str): First date to include (YYYY-MM-DD).
+        end (str): Last date to include (YYYY-MM-DD).
+        columns (list): Optional column projection.
+        filename (str): Logical path of the price table.
+
+    Returns:
+        pd.DataFrame: Matching rows sorted by ticker and Date.
+    """
+    filters = []
+    if tickers is not None:
+        tickers = [tickers] if isinstance(tickers, str) else list(tickers)
+        filters.append(('ticker', 'in', tickers))
+    if start is not None:
+        filters.append(('Date', '>=', pd.Timestamp(start)))
+    if end is not None:
+        filters.append(('Date', '<=', pd.Timestamp(end)))
+
+    df = read_table(filename, columns=columns, filters=filters or None, parse_dates=['Date'])
+    sort_cols = [col for col in ('ticker', 'Date') if col in df.columns]
+    return df.sort_values(by=sort_cols, ignore_index=True) if sort_cols else df
@@ -0,0 +1,109 @@
+# src/data/http_client.py
+
+import math
+import os
+import threading
+import time
+from urllib.parse import urlsplit
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from src import metrics
+
+
+class TokenBucket:
+    """
+    Thread-safe token-bucket rate limiter.
+
+    Allows bursts of up to `capacity` requests and refills at `rate` tokens per
+    second; `acquire()` blocks until a token is available.
+    """
+
+    def __init__(self, rate: float, capacity: float = None):
+        # Replayed/synthetic traffic has no quota: the limit speeds up with the replay
+        self.rate = rate * replay_speedup()
+        self.capacity = capacity if capacity is not None else max(rate, 1.0)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    @classmethod
+    def per_minute(cls, requests_per_minute: float, burst: float = 1.0):
+        """
+        A limiter for a per-minute quota. In any `t` seconds it lets through at most
+        `burst + t * requests_per_minute / 60` requests, so only the default burst of one
+        (requests spaced 60 / requests_per_minute seconds apart) keeps every 60-second
+        window within the quota.
+        """
+        return cls(requests_per_minute / 60.0, burst)
+
+    def acquire(self, tokens: float = 1.0):
+        if math.isinf(self.rate):
+            return
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= tokens:
+                    self.tokens -= tokens
+                    return
+                wait = (tokens - self.tokens) / self.rate
+            metrics.count("rate_limit_waits")
+            time.sleep(wait)
+
+
+class CountingRetry(Retry):
+    """urllib3 retry policy that reports every retry it grants to the metrics layer, per host."""
+
+    def increment(self, method=None, url=None, response=None, error=None, _pool=None, _stacktrace=None):
+        retry = super().increment(method, url, response, error, _pool, _stacktrace)  # raises once exhausted
+        metrics.count("retries")
+        if _pool is not None:
+            metrics.count(f"retries.{_pool.host}")
+        return retry
+
+
+# Transient failures (connection errors, rate limiting, server errors) are retried with
+# exponential backoff, honouring Retry-After; anything else surfaces to the caller at once
+DEFAULT_RETRY = CountingRetry(
+    total=3, backoff_factor=1.0, status_forcelist=(429, 500, 502, 503, 504),
+    allowed_methods=("GET", "POST"), raise_on_status=False,
+)
+
+
+class CountingAdapter(HTTPAdapter):
+    """HTTPAdapter that retries transient failures and reports every request and retry to the metrics layer, per host."""
+
+    def __init__(self, **kwargs):
+        kwargs.setdefault("max_retries", DEFAULT_RETRY)
+        super().__init__(**kwargs)
+
+    def send(self, request, **kwargs):
+        metrics.count("http_calls")
+        metrics.count(f"http_calls.{urlsplit(request.url).hostname}")
+        return super().send(request, **kwargs)
+
+
+def replay_speedup() -> float:
+    from src.data.replay import replay_speedup
+    return replay_speedup() if os.getenv("HTTP_MODE", "live") != "live" else 1.0
+
+
+def make_session(pool_size: int = 10) -> requests.Session:
+    """
+    Returns a `requests.Session` whose connection pool can serve `pool_size` concurrent workers.
+
+    With HTTP_MODE=record|replay|synthetic the session records to, or is served from,
+    the response archive instead (see src/data/replay.py).
+    """
+    session = requests.Session()
+    mode = os.getenv("HTTP_MODE", "live")
+    if mode == "live":
+        adapter = CountingAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+    else:
+        from src.data.replay import make_adapter
+        adapter = make_adapter(mode, pool_size)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
@@ -1,7 +1,23 @@
-import matplotlib
-import seaborn as sns
-matplotlib.use('TkAgg')  # Use the Tkinter backend for interactive plots
-import matplotlib.pyplot as plt
+import os
+import sys
+
+
+def pyplot():
+    """
+    Imports matplotlib.pyplot on first use. The Tkinter backend is used for
+    interactive plots when a display is available; headless runs (cron, servers)
+    use Agg. An explicit MPLBACKEND always wins.
+    """
+    import matplotlib
+    if "MPLBACKEND" not in os.environ and "matplotlib.pyplot" not in sys.modules:
+        matplotlib.use("TkAgg" if os.environ.get("DISPLAY") else "Agg")
+    import matplotlib.pyplot as plt
+    return plt
+
+
+def is_interactive():
+    import matplotlib
+    return matplotlib.get_backend().lower() != "agg"
 
 def plot_stock_data(data, ticker):
     """
@@ -11,6 +27,7 @@ def plot_stock_data(data, ticker):
         data (pd.DataFrame): The stock data containing 'Close' and 'Volume' columns.
         ticker (str): The ticker symbol for the stock.
     """
+    plt = pyplot()
     fig, ax1 = plt.subplots(figsize=(10, 5))
 
     # Plot closing prices on the primary y-axis
@@ -30,14 +47,18 @@ def plot_stock_data(data, ticker):
     # Add title and grid
     plt.title(f"{ticker} Stock Data")
     plt.grid()
-    plt.show()
+    if is_interactive():
+        plt.show()
     pass
 
 def plot_correlation_heatmap(data):
     """
     Plots a heatmap showing feature correlations.
     """
+    import seaborn as sns
+    plt = pyplot()
     plt.figure(figsize=(12, 8))
     sns.heatmap(data.corr(), cmap="coolwarm", annot=True, fmt=".2f", linewidths=0.5)
     plt.title("Feature Correlation Heatmap")
-    plt.show()
+    if is_interactive():
+        plt.show()
@@ -2,32 +2,72 @@
 
 import pandas as pd
 import ast
+import time
+from src.data.storage import read_table, iter_table, append_table, delete_table, table_exists
+from src.data.translation_cache import TranslationCache, cache_default_path
+from src.data.translation import Translator
 from src.data.utils import (
     detect_language,
-    is_mostly_non_latin,
-    translate_text,
-    analyze_sentiment,
-    normalize_language_code,   # <-- import nowej funkcji
+    non_latin_mask,
+    analyze_sentiment_batch,
 )
 
 def extract_source_name(x):
+    if isinstance(x, dict):
+        return x.get("name")
     try:
         return ast.literal_eval(x).get("name") if pd.notnull(x) else None
     except Exception:
         return None
 
 
-def process_and_save_translated_news(
-    raw_file="data/raw/news_original_language.csv",
-    clean_file="data/processed/news_translated_cleaned.csv",
-    lang_blacklist={"ar", "ru"},
-):
+FINAL_COLUMNS = [
+    "article_id",
+    "publishedAt",
+    "title",
+    "translated_text",
+    "sentiment",
+    "sentiment_pos",
+    "sentiment_neg",
+    "sentiment_neu",
+    "url",
+    "source.name",
+]
+OPTIONAL_COLUMNS = ["ticker", "type", "query", "fetch_date"]
+
+
+def article_ids(df):
+    """
+    Stable 64-bit id per raw article, hashed from (title, publishedAt) — the same
+    key the raw table is de-duplicated on.
+    """
+    published = pd.to_datetime(df["publishedAt"], errors="coerce", utc=True)
+    key = pd.DataFrame({
+        "title": df["title"].astype(str),
+        "publishedAt": published.dt.as_unit("ns").to_numpy(dtype="datetime64[ns]").view("int64"),
+    })
+    return pd.util.hash_pandas_object(key, index=False).to_numpy().view("int64")
+
+
+def _read_ids(path):
+    """Ids stored in a table, or None if the table is missing or predates article ids."""
+    if not table_exists(path):
+        return None
     try:
-        df = pd.read_csv(raw_file)
-    except FileNotFoundError:
-        print(f"❌ File not found: {raw_file}")
-        return
+        return set(read_table(path, columns=["article_id"])["article_id"].tolist())
+    except Exception:
+        return None
+
+
+def _new_run_stats():
+    return {"rows_in": 0, "rows_out": 0, "translated": 0, "english": 0, "translate_seconds": 0.0, "languages": {}}
 
+
+def _process_chunk(df, lang_blacklist, cache, translator, run_stats):
+    """
+    Runs detect → filter → translate → sentiment on one batch of raw articles
+    and returns the cleaned rows with the output columns.
+    """
     # 🧠 Create one full text column for translation/sentiment
     df["original_text"] = (
         df["title"].astype(str)
@@ -37,47 +77,127 @@ def process_and_save_translated_news(
         + df["content"].astype(str)
     ).str.strip()
 
-    # 🧹 Detect language
+    # 🧹 Detect language (once, on a prefix; codes come back normalized)
     df["detected_lang"] = df["original_text"].apply(detect_language)
 
-    # 🔄 Normalize language codes
-    df["detected_lang"] = df["detected_lang"].apply(normalize_language_code)
-
     # Blacklist filter
     mask_lang = df["detected_lang"].isin(lang_blacklist)
 
     # Non-latin filter (⚠️ but keep CJK: zh, ja, ko)
-    mask_nonlatin = df.apply(
-        lambda row: (
-            is_mostly_non_latin(row["original_text"])
-            and row["detected_lang"] not in {"zh", "ja", "ko"}
-        ),
-        axis=1,
-    )
+    mask_nonlatin = non_latin_mask(df["original_text"]) & ~df["detected_lang"].isin({"zh", "ja", "ko"})
 
     df_clean = df[~(mask_lang | mask_nonlatin)].copy()
 
     # 🌍 Translate and analyze sentiment
-    df_clean["translated_text"] = df_clean["original_text"].apply(translate_text)
-    df_clean["sentiment"] = df_clean["translated_text"].apply(analyze_sentiment)
+    # Articles translated in earlier runs come from the on-disk cache
+    # 🚀 English articles go straight to sentiment; only the rest hits the translator
+    is_english = df_clean["detected_lang"] == "en"
+    to_translate = df_clean.loc[~is_english, "original_text"].tolist()
+    started = time.perf_counter()
+    translated = translator.translate_texts(to_translate, cache=cache)
+    run_stats["translate_seconds"] += time.perf_counter() - started
+    df_clean["translated_text"] = df_clean["original_text"]
+    df_clean.loc[~is_english, "translated_text"] = translated
+
+    scores = analyze_sentiment_batch(df_clean["translated_text"].tolist())
+    df_clean["sentiment"] = scores["compound"]
+    df_clean["sentiment_pos"] = scores["pos"]
+    df_clean["sentiment_neg"] = scores["neg"]
+    df_clean["sentiment_neu"] = scores["neu"]
 
     # ✅ Extract 'source.name' from JSON-like 'source' column
     if "source.name" not in df_clean.columns and "source" in df_clean.columns:
         df_clean["source.name"] = df_clean["source"].apply(extract_source_name)
 
+    run_stats["rows_in"] += len(df)
+    run_stats["rows_out"] += len(df_clean)
+    run_stats["translated"] += len(to_translate)
+    run_stats["english"] += int(is_english.sum())
+    for lang, count in df_clean["detected_lang"].value_counts().items():
+        run_stats["languages"][lang] = run_stats["languages"].get(lang, 0) + int(count)
+
     # 🧾 Preserve useful metadata (if exists)
-    meta_columns = [
-        "publishedAt",
-        "title",
-        "translated_text",
-        "sentiment",
-        "url",
-        "source.name",
-    ]
-    optional_meta = ["ticker", "type", "query", "fetch_date"]
-    preserved_cols = [col for col in optional_meta if col in df_clean.columns]
-    final_cols = meta_columns + preserved_cols
-
-    # ✍️ Save cleaned/transformed file
-    df_clean[final_cols].to_csv(clean_file, index=False)
-    print(f"✅ Cleaned data saved to '{clean_file}'")
+    preserved_cols = [col for col in OPTIONAL_COLUMNS if col in df_clean.columns]
+    return df_clean[FINAL_COLUMNS + preserved_cols]
+
+
+def _print_run_stats(run_stats, cache, translator):
+    stats = cache.stats()
+    print(f"🗣️ Languages: {run_stats['languages']}")
+    if run_stats["translated"]:
+        per_article = run_stats["translate_seconds"] / run_stats["translated"]
+        print(f"⏱️ Translated {run_stats['translated']} articles in {run_stats['translate_seconds']:.1f}s; "
+              f"skipped {run_stats['english']} English articles (≈{per_article * run_stats['english']:.1f}s saved)")
+    else:
+        print(f"⏱️ Skipped translation for all {run_stats['english']} English articles")
+    print(f"🗃️ Translation cache: {stats['hits']} hits, {stats['misses']} misses "
+          f"({stats['hit_rate']:.0%} hit rate), {stats['entries']} entries, {stats['evictions']} evicted")
+    print(f"🌍 Translation providers: {translator.stats()}")
+
+
+def process_and_save_translated_news(
+    raw_file="data/raw/news_original_language.csv",
+    clean_file="data/processed/news_translated_cleaned.csv",
+    lang_blacklist={"ar", "ru"},
+    cache_path=cache_default_path,
+    translator=None,
+    chunk_size=None,
+    incremental=True,
+    filtered_ids_file="data/processed/news_filtered_ids.csv",
+):
+    """
+    Detects language, filters, translates and scores sentiment for raw news.
+
+    In incremental mode (the default) only raw articles whose id (see `article_ids`)
+    is not yet in the cleaned table — or in the table of ids dropped by the
+    filters — are processed, and the results are appended; the job's cost tracks
+    the number of new articles. `incremental=False` rebuilds everything.
+
+    With `chunk_size` set, the raw table is streamed in batches of that many rows and
+    each processed batch is appended to the cleaned table straight away, so memory
+    stays bounded by the batch size and finished batches survive an interruption.
+    """
+    if not table_exists(raw_file):
+        print(f"❌ File not found: {raw_file}")
+        return
+
+    seen = _read_ids(clean_file) if incremental else None
+    if seen is not None:
+        seen |= _read_ids(filtered_ids_file) or set()
+        print(f"🔁 Incremental run: {len(seen)} articles already processed.")
+    else:
+        seen = set()
+        # Full rebuild (also the first run after upgrading: older outputs have no ids)
+        delete_table(clean_file)
+        delete_table(filtered_ids_file)
+
+    cache = TranslationCache(cache_path)
+    translator = translator or Translator()
+    run_stats = _new_run_stats()
+
+    chunks = [read_table(raw_file)] if chunk_size is None else iter_table(raw_file, batch_size=chunk_size)
+    for i, chunk in enumerate(chunks, start=1):
+        chunk["article_id"] = article_ids(chunk)
+        chunk = chunk[~chunk["article_id"].isin(seen)].drop_duplicates(subset=["article_id"])
+        if chunk.empty:
+            continue
+
+        df_clean = _process_chunk(chunk, lang_blacklist, cache, translator, run_stats)
+        seen.update(chunk["article_id"].tolist())
+
+        # ✍️ Save cleaned rows first, then the ids the filters dropped
+        append_table(df_clean, clean_file, partition_cols=["ticker"])
+        filtered = chunk.loc[~chunk["article_id"].isin(df_clean["article_id"]), ["article_id"]]
+        if not filtered.empty:
+            append_table(filtered, filtered_ids_file)
+        if chunk_size is not None:
+            print(f"📦 Chunk {i}: {len(chunk)} new articles in, {len(df_clean)} kept")
+
+    if run_stats["rows_in"] == 0:
+        print("✅ No new articles to process.")
+        cache.close()
+        return
+
+    _print_run_stats(run_stats, cache, translator)
+    cache.close()
+    print(f"✅ Cleaned data saved to '{clean_file}' ({run_stats['rows_out']} of {run_stats['rows_in']} new articles kept)")
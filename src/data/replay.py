@@ -0,0 +1,290 @@
+# src/data/replay.py
+
+import hashlib
+import json
+import math
+import os
+import sqlite3
+import threading
+import time
+import zlib
+from functools import lru_cache
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qsl, urlencode, urlsplit
+import pandas as pd
+import requests
+from requests.adapters import BaseAdapter
+from requests.structures import CaseInsensitiveDict
+from requests.utils import get_encoding_from_headers
+from src import metrics
+from src.data.http_client import CountingAdapter
+from src.data.synthetic import synthetic_news, synthetic_prices
+
+archive_default_path = "data/cache/http_archive.sqlite"
+
+# HTTP_MODE values: live (default), record (live + archive), replay (archive only), synthetic (generated)
+HTTP_MODES = ["live", "record", "replay", "synthetic"]
+
+# Never part of a request key (nor stored): API keys differ between machines and must not leak into the archive
+SECRET_PARAMS = {"token", "apikey", "api_key", "key"}
+
+# Assumed API latency of generated responses, before the speed-up factor
+SYNTHETIC_LATENCY_S = 0.2
+SYNTHETIC_ARTICLES_PER_WINDOW = 10
+
+
+def http_mode() -> str:
+    mode = os.getenv("HTTP_MODE", "live")
+    if mode not in HTTP_MODES:
+        raise ValueError(f"HTTP_MODE must be one of {HTTP_MODES}, got '{mode}'")
+    return mode
+
+
+def replay_speedup() -> float:
+    """Speed-up of replayed/synthetic traffic over recorded latencies and rate limits (HTTP_REPLAY_SPEEDUP, 'inf' = no waits)."""
+    if http_mode() in ("live", "record"):
+        return 1.0
+    return float(os.getenv("HTTP_REPLAY_SPEEDUP", "1"))
+
+
+def request_key(method: str, url: str, body=None) -> str:
+    """
+    Archive key of a request: method, path, sorted query without secrets, and body.
+
+    The host is left out, so a recording of api.twelvedata.com also answers the same
+    request sent to the local stand-in server.
+    """
+    parts = urlsplit(url)
+    query = sorted((k, v) for k, v in parse_qsl(parts.query, keep_blank_values=True) if k.lower() not in SECRET_PARAMS)
+    if isinstance(body, str):
+        body = body.encode("utf-8")
+    canonical = f"{method.upper()} {parts.path.rstrip('/')}?{urlencode(query)}".encode("utf-8")
+    return hashlib.blake2b(canonical + b"\x00" + (body or b""), digest_size=16).hexdigest()
+
+
+def _redacted(url: str) -> str:
+    parts = urlsplit(url)
+    query = [(k, v) for k, v in parse_qsl(parts.query, keep_blank_values=True) if k.lower() not in SECRET_PARAMS]
+    return parts._replace(query=urlencode(query)).geturl()
+
+
+class ResponseArchive:
+    """
+    Raw API responses stored in SQLite, bodies zlib-compressed, keyed by `request_key`.
+
+    Each entry keeps the status, content type and the latency seen when it was
+    recorded, so a replay can reproduce (or scale) the original timing.
+    """
+
+    def __init__(self, path: str = archive_default_path):
+        self.path = path
+        self.lock = threading.Lock()
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS responses ("
+            " key TEXT PRIMARY KEY,"
+            " method TEXT NOT NULL,"
+            " url TEXT NOT NULL,"
+            " status INTEGER NOT NULL,"
+            " content_type TEXT,"
+            " body BLOB NOT NULL,"
+            " elapsed REAL NOT NULL,"
+            " recorded_at REAL NOT NULL)"
+        )
+        self.conn.commit()
+
+    def put(self, key, method, url, status, content_type, content: bytes, elapsed: float):
+        with self.lock:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (key, method, _redacted(url), status, content_type, zlib.compress(content, 6), elapsed, time.time()),
+            )
+            self.conn.commit()
+
+    def get(self, key):
+        """Returns (status, content_type, body, elapsed), or None if the request was never recorded."""
+        with self.lock:
+            row = self.conn.execute(
+                "SELECT status, content_type, body, elapsed FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+        if row is None:
+            return None
+        status, content_type, body, elapsed = row
+        return status, content_type, zlib.decompress(body), elapsed
+
+    def __len__(self):
+        with self.lock:
+            return self.conn.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+
+
+@lru_cache(maxsize=None)
+def open_archive(path: str = None) -> ResponseArchive:
+    """One shared archive object per file for all sessions of the process."""
+    return ResponseArchive(path or os.getenv("HTTP_ARCHIVE", archive_default_path))
+
+
+def _json(payload, status=200):
+    return status, "application/json", json.dumps(payload).encode("utf-8")
+
+
+def synthetic_response(method: str, url: str, body=None):
+    """
+    Generated stand-in for the GNews, Twelve Data and LibreTranslate endpoints:
+    (status, content_type, body). Deterministic per request, and valid for any
+    ticker, query or date range, so load tests can scale far past recorded data.
+    """
+    parts = urlsplit(url)
+    params = dict(parse_qsl(parts.query))
+    seed = zlib.crc32(request_key(method, url, body).encode("ascii"))
+
+    if parts.path.endswith("/time_series"):
+        symbol = params.get("symbol", "")
+        days = len(pd.bdate_range(params["start_date"], params["end_date"]))
+        if not days:
+            return _json({"status": "error", "message": "No data is available on the specified dates."})
+        bars = synthetic_prices(1, days, start=params["start_date"], seed=zlib.crc32(symbol.encode("utf-8")))
+        values = [
+            {"datetime": f"{row.Date:%Y-%m-%d}", "open": f"{row.Open:.4f}", "high": f"{row.High:.4f}",
+             "low": f"{row.Low:.4f}", "close": f"{row.Close:.4f}", "volume": str(row.Volume)}
+            for row in bars.iloc[::-1].itertuples()
+        ]
+        return _json({"meta": {"symbol": symbol, "interval": "1day"}, "values": values, "status": "ok"})
+
+    if parts.path.endswith("/search"):
+        query = params.get("q", "")
+        n = int(params.get("max", SYNTHETIC_ARTICLES_PER_WINDOW))
+        news = synthetic_news([query], n, start=params["from"][:10], end=params["to"][:10], general_share=0, seed=seed)
+        articles = [
+            {"title": f"{row.title}-{seed:x}", "description": row.description, "content": row.content,
+             "url": f"{row.url}-{seed:x}", "image": None, "publishedAt": row.publishedAt,
+             "source": {"name": f"Source {i % 7}", "url": "https://news.example.com"}}
+            for i, row in enumerate(news.itertuples())
+        ]
+        return _json({"totalArticles": len(articles), "articles": articles})
+
+    if parts.path.endswith("/translate"):
+        texts = json.loads(body or b"{}").get("q", [])
+        return _json({"translatedText": texts})  # echo: languages stay as generated
+
+    return _json({"message": f"No synthetic endpoint for '{parts.path}'"}, status=404)
+
+
+class ReplayBackend:
+    """
+    Answers requests from the archive (replay) or the generators (synthetic),
+    waiting the recorded latency divided by the speed-up factor.
+
+    In replay mode a request missing from the archive gets a 404, so it shows up as a
+    fetch error instead of silently reaching the network.
+    """
+
+    def __init__(self, mode: str = None, archive: ResponseArchive = None, speedup: float = None):
+        self.mode = mode or http_mode()
+        self.archive = archive if archive is not None else (open_archive() if self.mode == "replay" else None)
+        self.speedup = speedup if speedup is not None else float(os.getenv("HTTP_REPLAY_SPEEDUP", "1"))
+
+    def _wait(self, elapsed):
+        if self.speedup > 0 and not math.isinf(self.speedup) and elapsed > 0:
+            time.sleep(elapsed / self.speedup)
+
+    def respond(self, method, url, body=None):
+        if self.mode == "synthetic":
+            metrics.count("http_synthetic")
+            self._wait(SYNTHETIC_LATENCY_S)
+            return synthetic_response(method, url, body)
+
+        record = self.archive.get(request_key(method, url, body))
+        if record is None:
+            metrics.count("http_replay_misses")
+            return _json({"message": f"Request not in archive: {method} {_redacted(url)}"}, status=404)
+        metrics.count("http_replayed")
+        status, content_type, content, elapsed = record
+        self._wait(elapsed)
+        return status, content_type, content
+
+
+class ReplayAdapter(BaseAdapter):
+    """Transport adapter serving a session from a `ReplayBackend` without touching the network."""
+
+    def __init__(self, backend: ReplayBackend = None):
+        super().__init__()
+        self.backend = backend or ReplayBackend()
+
+    def send(self, request, **kwargs):
+        status, content_type, content = self.backend.respond(request.method, request.url, request.body)
+        response = requests.Response()
+        response.status_code = status
+        response.reason = "OK" if status < 400 else "Not Found"
+        response.headers = CaseInsensitiveDict({"Content-Type": content_type or "application/octet-stream"})
+        response.encoding = get_encoding_from_headers(response.headers)
+        response._content = content
+        response.url = request.url
+        response.request = request
+        return response
+
+    def close(self):
+        pass
+
+
+class RecordingAdapter(CountingAdapter):
+    """Live adapter that also stores every response in the archive."""
+
+    def __init__(self, archive: ResponseArchive = None, **kwargs):
+        super().__init__(**kwargs)
+        self.archive = archive or open_archive()
+
+    def send(self, request, **kwargs):
+        response = super().send(request, **kwargs)
+        self.archive.put(
+            request_key(request.method, request.url, request.body), request.method, request.url,
+            response.status_code, response.headers.get("Content-Type"), response.content,
+            response.elapsed.total_seconds(),
+        )
+        metrics.count("http_recorded")
+        return response
+
+
+def make_adapter(mode: str, pool_size: int = 10):
+    if mode == "record":
+        return RecordingAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+    return ReplayAdapter()
+
+
+def serve_archive(host="127.0.0.1", port=8766, mode="replay", speedup: float = None):
+    """
+    Local stand-in for the data APIs, answering any path from the archive (or the
+    generators with mode='synthetic'). Point GNEWS_URL, TWELVE_DATA_URL and
+    LIBRETRANSLATE_URL at it, e.g. GNEWS_URL=http://127.0.0.1:8766/api/v4/search.
+    """
+    backend = ReplayBackend(mode, archive=open_archive() if mode == "replay" else None, speedup=speedup)
+
+    class Handler(BaseHTTPRequestHandler):
+        def _answer(self, body=None):
+            status, content_type, content = backend.respond(self.command, self.path, body)
+            self.send_response(status)
+            self.send_header("Content-Type", content_type or "application/octet-stream")
+            self.send_header("Content-Length", str(len(content)))
+            self.end_headers()
+            self.wfile.write(content)
+
+        def do_GET(self):
+            self._answer()
+
+        def do_POST(self):
+            self._answer(self.rfile.read(int(self.headers.get("Content-Length", 0))))
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer((host, port), Handler)
+    source = f"archive '{backend.archive.path}' ({len(backend.archive)} responses)" if backend.archive else "generators"
+    print(f"🟢 Stand-in API on http://{host}:{port} serving from {source}, speed-up {backend.speedup}x (Ctrl+C to stop)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
@@ -0,0 +1,388 @@
+# src/data/storage.py
+
+import json
+import os
+import shutil
+import uuid
+from urllib.parse import quote
+import pandas as pd
+from src import metrics
+
+# Optional: use Parquet (pyarrow) if installed, otherwise fall back to plain CSV
+try:
+    import pyarrow as pa
+    import pyarrow.dataset as ds
+    import pyarrow.parquet as pq
+    has_pyarrow = True
+except ImportError:
+    has_pyarrow = False
+
+# CSV files written by earlier versions of the pipeline (see `migrate_csv_files`)
+LEGACY_CSV_FILES = {
+    "data/raw/news_original_language.csv": {"partition_cols": ["ticker"], "date_cols": ["publishedAt"]},
+    "data/processed/news_translated_cleaned.csv": {"partition_cols": ["ticker"], "date_cols": ["publishedAt"]},
+    "data/prices/stock_prices.csv": {"partition_cols": ["ticker"], "date_cols": ["Date"], "year_col": "Date"},
+    "data/features/combined.csv": {"partition_cols": ["ticker"], "date_cols": ["Date"]},
+    "data/features/combined_scaled_train.csv": {"date_cols": ["Date"]},
+    "data/features/combined_scaled_test.csv": {"date_cols": ["Date"]},
+    "data/features/combined_scaled_all.csv": {"date_cols": ["Date"]},
+}
+
+META_FILE = "_meta.json"  # leading underscore: ignored by pyarrow dataset discovery
+YEAR_COL = "year"
+
+
+def dataset_path(path: str) -> str:
+    """Maps a (legacy) file path like 'data/prices/stock_prices.csv' to its Parquet dataset directory."""
+    base, _ = os.path.splitext(path)
+    return base + ".parquet"
+
+
+def table_exists(path: str) -> bool:
+    return os.path.exists(dataset_path(path)) or os.path.exists(path)
+
+
+def delete_table(path: str):
+    """Removes a table (both its Parquet dataset and any legacy CSV)."""
+    directory = dataset_path(path)
+    if os.path.isdir(directory):
+        shutil.rmtree(directory)
+    if os.path.exists(path):
+        os.remove(path)
+
+
+def _read_meta(directory: str) -> dict:
+    meta_path = os.path.join(directory, META_FILE)
+    if not os.path.exists(meta_path):
+        return {}
+    with open(meta_path, "r") as f:
+        return json.load(f)
+
+
+def _arrow_safe(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Stringifies object columns holding mixed Python types (e.g. dicts from the
+    GNews 'source' field, or dates mixed with strings), the same way CSV did, and
+    stores every timestamp in nanoseconds so all files of a dataset share one schema.
+    """
+    mixed = [
+        col for col in df.columns
+        if df[col].dtype == object and pd.api.types.infer_dtype(df[col], skipna=True).startswith("mixed")
+    ]
+    timestamps = [col for col in df.columns if pd.api.types.is_datetime64_any_dtype(df[col])]
+    if not mixed and not timestamps:
+        return df
+    df = df.copy()
+    for col in mixed:
+        df[col] = df[col].where(df[col].isna(), df[col].astype(str))
+    for col in timestamps:
+        df[col] = df[col].dt.as_unit("ns")
+    return df
+
+
+def _partitioning(meta: dict):
+    fields = [(col, pa.int32() if col == YEAR_COL else pa.string()) for col in meta.get("partition_cols", [])]
+    return ds.partitioning(pa.schema(fields), flavor="hive") if fields else None
+
+
+def _open_dataset(directory: str, meta: dict):
+    """
+    The Parquet dataset of a table, with a schema unified over all its files.
+
+    pyarrow infers a dataset's schema from its first file only, so columns that exist
+    in some partitions alone (e.g. typed OHLCV next to partitions migrated from the
+    legacy lowercase CSV columns) would be dropped on read; they come back null for
+    the files that lack them instead.
+    """
+    partitioning = _partitioning(meta)
+    dataset = ds.dataset(directory, format="parquet", partitioning=partitioning)
+    schemas = {}
+    for fragment in dataset.get_fragments():
+        schema = fragment.physical_schema.remove_metadata()
+        schemas.setdefault(str(schema), schema)
+    if len(schemas) <= 1:
+        return dataset
+    partition_fields = [field for field in dataset.schema if field.name in meta.get("partition_cols", [])]
+    unified = pa.unify_schemas(list(schemas.values()) + [pa.schema(partition_fields)], promote_options="permissive")
+    return ds.dataset(directory, format="parquet", partitioning=partitioning, schema=unified)
+
+
+def _with_year(df: pd.DataFrame, year_col: str) -> pd.DataFrame:
+    return df.assign(**{YEAR_COL: pd.to_datetime(df[year_col], errors="coerce").dt.year.astype("Int32")})
+
+
+def _apply_filters(df: pd.DataFrame, filters) -> pd.DataFrame:
+    ops = {
+        "=": lambda s, v: s == v, "==": lambda s, v: s == v, "!=": lambda s, v: s != v,
+        "<": lambda s, v: s < v, "<=": lambda s, v: s <= v,
+        ">": lambda s, v: s > v, ">=": lambda s, v: s >= v,
+        "in": lambda s, v: s.isin(v), "not in": lambda s, v: ~s.isin(v),
+    }
+    mask = pd.Series(True, index=df.index)
+    for col, op, value in filters:
+        mask &= ops[op](df[col], value)
+    return df[mask]
+
+
+def read_table(path: str, columns=None, filters=None, parse_dates=None) -> pd.DataFrame:
+    """
+    Reads a table written by `write_table`.
+
+    Args:
+        path (str): Logical path of the table (the legacy '.csv' path is fine).
+        columns (list): Optional column projection; only these columns are read.
+        filters (list): Optional predicates as (column, op, value) tuples, e.g.
+            [("ticker", "=", "AAPL"), ("Date", ">=", pd.Timestamp("2023-01-01"))].
+            With Parquet they are pushed down to partition pruning and row-group
+            statistics, so unrelated tickers/years are never read.
+        parse_dates (list): Columns to parse when falling back to a CSV file.
+
+    Returns:
+        pd.DataFrame: The requested rows and columns.
+    """
+    directory = dataset_path(path)
+    if has_pyarrow and os.path.isdir(directory):
+        meta = _read_meta(directory)
+        dataset = _open_dataset(directory, meta)
+        if columns is None:
+            columns = [name for name in dataset.schema.names if name != YEAR_COL or YEAR_COL not in meta.get("partition_cols", [])]
+        expression = pq.filters_to_expression(filters) if filters else None
+        df = dataset.to_table(columns=list(columns), filter=expression).to_pandas()
+        metrics.count("rows_read", len(df))
+        return df
+
+    if not os.path.exists(path):
+        raise FileNotFoundError(f"Table '{path}' not found (looked for '{directory}' and '{path}').")
+
+    usecols = None
+    if columns is not None:
+        usecols = list(dict.fromkeys(list(columns) + [f[0] for f in (filters or [])]))
+    df = pd.read_csv(path, usecols=usecols)
+    for col in parse_dates or []:
+        if col in df.columns:
+            df[col] = pd.to_datetime(df[col], errors="coerce")
+    if filters:
+        df = _apply_filters(df, filters)
+    if columns is not None:
+        df = df[list(columns)]
+    metrics.count("rows_read", len(df))
+    return df
+
+
+def write_table(df: pd.DataFrame, path: str, partition_cols=None, year_col=None):
+    """
+    Writes a DataFrame as a compressed, typed Parquet dataset, replacing any previous version.
+
+    Args:
+        df (pd.DataFrame): Data to write.
+        path (str): Logical path of the table (the legacy '.csv' path is fine).
+        partition_cols (list): Columns to partition by (hive layout, e.g. ticker=AAPL/).
+        year_col (str): Optional datetime column; adds a year=YYYY partition level below
+            `partition_cols` so date-range reads skip whole years.
+    """
+    metrics.count("rows_written", len(df))
+    if not has_pyarrow:
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        df.to_csv(path, index=False)
+        return
+
+    directory = dataset_path(path)
+    partition_cols = [col for col in (partition_cols or []) if col in df.columns]
+    df = _arrow_safe(df)
+    if year_col is not None and year_col in df.columns:
+        df = _with_year(df, year_col)
+        partition_cols = partition_cols + [YEAR_COL]
+
+    table = pa.Table.from_pandas(df, preserve_index=False)
+
+    # Written next to the table and swapped in once complete, so a failed write leaves the previous version
+    staging = f"{directory}.tmp-{uuid.uuid4().hex}"
+    try:
+        os.makedirs(staging)
+        pq.write_to_dataset(
+            table,
+            staging,
+            partition_cols=partition_cols or None,
+            compression="zstd",
+            existing_data_behavior="overwrite_or_ignore",
+        )
+        with open(os.path.join(staging, META_FILE), "w") as f:
+            json.dump({"partition_cols": partition_cols}, f)
+    except BaseException:
+        shutil.rmtree(staging, ignore_errors=True)
+        raise
+
+    previous = None
+    if os.path.isdir(directory):
+        previous = f"{directory}.old-{uuid.uuid4().hex}"
+        os.replace(directory, previous)
+    os.replace(staging, directory)
+    if previous is not None:
+        shutil.rmtree(previous, ignore_errors=True)
+
+
+def iter_table(path: str, batch_size: int = 50_000, columns=None):
+    """
+    Yields a table as DataFrames of at most `batch_size` rows, so tables larger
+    than memory can be processed chunk by chunk.
+    """
+    directory = dataset_path(path)
+    if has_pyarrow and os.path.isdir(directory):
+        meta = _read_meta(directory)
+        dataset = _open_dataset(directory, meta)
+        if columns is None:
+            columns = [name for name in dataset.schema.names if name != YEAR_COL or YEAR_COL not in meta.get("partition_cols", [])]
+        for batch in dataset.to_batches(columns=list(columns), batch_size=batch_size):
+            if batch.num_rows:
+                metrics.count("rows_read", batch.num_rows)
+                yield batch.to_pandas()
+        return
+
+    if not os.path.exists(path):
+        raise FileNotFoundError(f"Table '{path}' not found (looked for '{directory}' and '{path}').")
+    for chunk in pd.read_csv(path, chunksize=batch_size, usecols=columns):
+        metrics.count("rows_read", len(chunk))
+        yield chunk
+
+
+def append_table(df: pd.DataFrame, path: str, partition_cols=None):
+    """
+    Appends rows to a table as new files, without reading or rewriting what is already stored.
+    Creates the table on first use; rows whose column types can't be cast to the stored
+    schema trigger a full rewrite instead.
+    """
+    directory = dataset_path(path)
+    if not has_pyarrow:
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        df.to_csv(path, mode="a", header=not os.path.exists(path), index=False)
+        metrics.count("rows_written", len(df))
+        return
+    if not os.path.isdir(directory):
+        write_table(df, path, partition_cols=partition_cols)
+        return
+
+    meta = _read_meta(directory)
+    partition_cols = meta.get("partition_cols", [])
+    table = pa.Table.from_pandas(_arrow_safe(df), preserve_index=False)
+
+    # Keep column types consistent with the files already written (e.g. an all-null chunk)
+    existing = _open_dataset(directory, meta).schema
+    target = pa.schema([
+        existing.field(field.name) if field.name in existing.names and field.name not in partition_cols else field
+        for field in table.schema
+    ])
+    try:
+        table = table.cast(target)
+    except (pa.ArrowInvalid, pa.ArrowNotImplementedError) as e:
+        # Files with conflicting column types would make the dataset unreadable: rewrite it as one schema
+        print(f"⚠️ New rows don't match the schema of '{path}' ({e}); rewriting the table.")
+        metrics.count("append_rewrites")
+        existing = read_table(path)
+        write_table(pd.concat([existing, df], ignore_index=True), path,
+                    partition_cols=[col for col in partition_cols if col != YEAR_COL])
+        return
+
+    metrics.count("rows_written", len(df))
+    pq.write_to_dataset(
+        table,
+        directory,
+        partition_cols=partition_cols or None,
+        compression="zstd",
+        basename_template=f"{uuid.uuid4().hex}-{{i}}.parquet",
+        existing_data_behavior="overwrite_or_ignore",
+    )
+
+
+def upsert_table(df: pd.DataFrame, path: str, key_cols: list, partition_cols: list, year_col: str = None) -> int:
+    """
+    Inserts or replaces rows by key, rewriting only the partitions the new rows fall into.
+
+    Each affected partition (e.g. ticker=AAPL/year=2024) is read, merged with the new
+    rows (new values win on duplicate keys), sorted by `key_cols` and written back as
+    a single file; every other partition is left untouched, so the cost of an upsert
+    does not grow with the number of tickers already stored.
+
+    Args:
+        df (pd.DataFrame): New rows.
+        path (str): Logical path of the table (the legacy '.csv' path is fine).
+        key_cols (list): Columns that identify a row, e.g. ['ticker', 'Date'].
+        partition_cols (list): Partition columns; must match how the table was created.
+        year_col (str): Optional datetime column used for a year=YYYY partition level.
+
+    Returns:
+        int: Number of rows in the partitions that were rewritten.
+    """
+    directory = dataset_path(path)
+    if not has_pyarrow or not os.path.isdir(directory):
+        # First write (or CSV fallback): seed the table from whatever exists already
+        try:
+            existing = read_table(path, parse_dates=[year_col] if year_col else None)
+            df = pd.concat([existing, df], ignore_index=True)
+        except FileNotFoundError:
+            pass
+        df = df.drop_duplicates(subset=key_cols, keep="last").sort_values(by=key_cols)
+        write_table(df, path, partition_cols=partition_cols, year_col=year_col)
+        return len(df)
+
+    meta = _read_meta(directory)
+    parts = list(partition_cols) + ([YEAR_COL] if year_col else [])
+    if meta.get("partition_cols", []) != parts:
+        raise ValueError(f"Table '{path}' is partitioned by {meta.get('partition_cols')}, not {parts}.")
+
+    df = _arrow_safe(_with_year(df, year_col) if year_col else df)
+    dataset = _open_dataset(directory, meta)
+
+    rewritten = 0
+    for values, new_rows in df.groupby(parts, sort=False):
+        values = values if isinstance(values, tuple) else (values,)
+        expression = None
+        for col, value in zip(parts, values):
+            term = ds.field(col) == (int(value) if col == YEAR_COL else str(value))
+            expression = term if expression is None else expression & term
+
+        old_files = [fragment.path for fragment in dataset.get_fragments(filter=expression)]
+        merged = new_rows
+        if old_files:
+            existing = dataset.to_table(filter=expression).to_pandas()
+            merged = pd.concat([existing, new_rows], ignore_index=True)
+        merged = merged.drop_duplicates(subset=key_cols, keep="last").sort_values(by=key_cols)
+
+        if old_files:
+            part_dir = os.path.dirname(old_files[0])
+        else:
+            part_dir = os.path.join(directory, *[f"{col}={quote(str(value), safe='')}" for col, value in zip(parts, values)])
+        os.makedirs(part_dir, exist_ok=True)
+
+        table = pa.Table.from_pandas(_arrow_safe(merged.drop(columns=parts)), preserve_index=False)
+        pq.write_table(table, os.path.join(part_dir, f"{uuid.uuid4().hex}-0.parquet"), compression="zstd")
+        for old_file in old_files:
+            os.remove(old_file)
+        rewritten += len(merged)
+
+    metrics.count("rows_written", rewritten)
+    return rewritten
+
+
+def migrate_csv_files(files: dict = None, remove_csv: bool = False):
+    """
+    One-shot migration of the pipeline's CSV files into Parquet datasets.
+
+    Args:
+        files (dict): Mapping of CSV path -> write options; defaults to `LEGACY_CSV_FILES`.
+        remove_csv (bool): Delete each CSV after it has been migrated.
+    """
+    if not has_pyarrow:
+        print("❌ pyarrow is not installed; CSV files left as they are.")
+        return
+
+    for csv_path, options in (files or LEGACY_CSV_FILES).items():
+        if not os.path.exists(csv_path):
+            continue
+        df = pd.read_csv(csv_path)
+        for col in options.get("date_cols", []):
+            if col in df.columns:
+                df[col] = pd.to_datetime(df[col], errors="coerce")
+        write_table(df, csv_path, partition_cols=options.get("partition_cols"), year_col=options.get("year_col"))
+        print(f"✅ Migrated '{csv_path}' → '{dataset_path(csv_path)}' ({len(df)} rows)")
+        if remove_csv:
+            os.remove(csv_path)
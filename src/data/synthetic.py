@@ -0,0 +1,108 @@
+# src/data/synthetic.py
+"""
+Seeded synthetic data shaped like the pipeline's raw tables, so every stage can be
+exercised without GNews or Twelve Data keys.
+"""
+
+import numpy as np
+import pandas as pd
+
+# A few headline templates per language; {c} is the company / topic
+NEWS_TEMPLATES = {
+    "en": ["{c} shares surge after strong quarterly earnings beat expectations",
+           "{c} stock falls as investors worry about weak guidance and rising costs",
+           "Analysts remain cautious on {c} despite record revenue growth"],
+    "de": ["Die Aktie von {c} steigt nach starken Quartalszahlen deutlich an",
+           "Anleger sind besorgt, {c} senkt die Prognose für das laufende Jahr"],
+    "fr": ["L'action {c} grimpe après des résultats trimestriels supérieurs aux attentes",
+           "Les investisseurs s'inquiètent des perspectives de {c} pour l'année prochaine"],
+    "es": ["Las acciones de {c} suben tras unos resultados trimestrales sólidos",
+           "Los inversores temen que {c} reduzca sus previsiones de ventas"],
+    "pl": ["Akcje {c} rosną po lepszych od oczekiwań wynikach kwartalnych",
+           "Inwestorzy obawiają się słabszych prognoz spółki {c} na kolejny rok"],
+    "zh": ["{c}公司股价在强劲的季度财报公布后大幅上涨",
+           "投资者担心{c}下调全年业绩预期"],
+    "ru": ["Акции {c} выросли после сильного квартального отчета",
+           "Инвесторы опасаются снижения прогноза {c} на следующий год"],
+    "ar": ["ارتفعت أسهم {c} بعد نتائج فصلية قوية فاقت التوقعات"],
+}
+DEFAULT_LANGUAGE_WEIGHTS = {"en": 0.6, "de": 0.08, "fr": 0.08, "es": 0.08, "pl": 0.06, "zh": 0.04, "ru": 0.03, "ar": 0.03}
+
+
+def synthetic_tickers(n_tickers: int) -> list:
+    return [f"T{i:04d}" for i in range(n_tickers)]
+
+
+def synthetic_prices(n_tickers: int = 10, n_days: int = 500, start: str = "2021-01-01", seed: int = 0) -> pd.DataFrame:
+    """
+    Daily OHLCV bars on business days for `n_tickers` tickers, from a geometric
+    random walk per ticker. Columns match the price table (Date, Close, ticker)
+    plus Open, High, Low and Volume.
+    """
+    rng = np.random.default_rng(seed)
+    dates = pd.bdate_range(start, periods=n_days)
+    shape = (n_tickers, n_days)
+
+    drift = rng.normal(0.0002, 0.0005, size=(n_tickers, 1))
+    vol = rng.uniform(0.01, 0.03, size=(n_tickers, 1))
+    log_returns = drift + vol * rng.standard_normal(shape)
+    close = rng.uniform(20, 500, size=(n_tickers, 1)) * np.exp(np.cumsum(log_returns, axis=1))
+    open_ = close * np.exp(vol * 0.3 * rng.standard_normal(shape))
+    high = np.maximum(open_, close) * (1 + np.abs(rng.normal(0, 0.006, shape)))
+    low = np.minimum(open_, close) * (1 - np.abs(rng.normal(0, 0.006, shape)))
+    volume = rng.lognormal(mean=13, sigma=0.6, size=shape).astype(np.int64)
+
+    return pd.DataFrame({
+        "Date": np.tile(dates.to_numpy(), n_tickers),
+        "Open": open_.ravel(),
+        "High": high.ravel(),
+        "Low": low.ravel(),
+        "Close": close.ravel(),
+        "Volume": volume.ravel(),
+        "ticker": np.repeat(synthetic_tickers(n_tickers), n_days),
+    })
+
+
+def synthetic_news(tickers: list, n_articles: int = 1000, start: str = "2021-01-01", end: str = None,
+                   languages: dict = None, general_share: float = 0.2, seed: int = 0) -> pd.DataFrame:
+    """
+    Raw GNews-style articles (title, description, content, url, publishedAt, source,
+    query, type, fetch_date, ticker) in several languages, with timestamps spread
+    over [start, end] at any hour, weekends included. A `general_share` of the
+    articles is tagged GENERAL.
+    """
+    rng = np.random.default_rng(seed)
+    languages = languages or DEFAULT_LANGUAGE_WEIGHTS
+    codes = list(languages)
+    weights = np.array([languages[c] for c in codes], dtype=float)
+    lang = rng.choice(codes, size=n_articles, p=weights / weights.sum())
+
+    is_general = rng.random(n_articles) < general_share
+    ticker = np.where(is_general, "GENERAL", rng.choice(tickers, size=n_articles))
+    subject = np.where(is_general, "the stock market", ticker)
+
+    start_ts = pd.Timestamp(start, tz="UTC")
+    end_ts = pd.Timestamp(end, tz="UTC") if end else start_ts + pd.Timedelta(days=700)
+    offsets = rng.integers(0, max(int((end_ts - start_ts).total_seconds()), 1), size=n_articles)
+    published = start_ts + pd.to_timedelta(np.sort(offsets), unit="s")
+
+    titles, descriptions, contents = [], [], []
+    for i in range(n_articles):
+        templates = NEWS_TEMPLATES[lang[i]]
+        picks = rng.integers(0, len(templates), size=3)
+        titles.append(f"{templates[picks[0]].format(c=subject[i])} #{i}")
+        descriptions.append(templates[picks[1]].format(c=subject[i]))
+        contents.append(" ".join(templates[p].format(c=subject[i]) for p in picks))
+
+    return pd.DataFrame({
+        "title": titles,
+        "description": descriptions,
+        "content": contents,
+        "url": [f"https://news.example.com/{i}" for i in range(n_articles)],
+        "publishedAt": published.strftime("%Y-%m-%dT%H:%M:%SZ"),
+        "source": [str({"name": f"Source {i % 7}", "url": "https://news.example.com"}) for i in range(n_articles)],
+        "query": np.where(is_general, "stock market OR economy OR inflation OR interest rates", ticker),
+        "type": np.where(is_general, "general", "company"),
+        "fetch_date": published.date,
+        "ticker": ticker,
+    })
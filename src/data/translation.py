@@ -0,0 +1,260 @@
+# src/data/translation.py
+
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from deep_translator import GoogleTranslator, MyMemoryTranslator
+from deep_translator.constants import MY_MEMORY_LANGUAGES_TO_CODES
+from src import metrics
+from src.data.http_client import make_session
+from src.data.utils import chunk_text
+
+# Tried in this order; LibreTranslate is the local instance started by run_news_pipeline.sh
+DEFAULT_PROVIDERS = ["libretranslate", "google", "mymemory"]
+# Google/MyMemory go through deep_translator's own HTTP calls, which the replay archive can't serve
+OFFLINE_PROVIDERS = ["libretranslate"]
+LIBRETRANSLATE_URL = "http://localhost:5000"
+
+
+class CircuitBreaker:
+    """
+    Stops calling a provider after `failure_threshold` consecutive failures.
+
+    While open, calls are rejected without touching the network; after
+    `reset_timeout` seconds one trial call is let through (half-open) and a
+    success closes the breaker again.
+    """
+
+    def __init__(self, failure_threshold: int = 3, reset_timeout: float = 60.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at = None
+        self.lock = threading.Lock()
+
+    def allow(self) -> bool:
+        with self.lock:
+            if self.opened_at is None:
+                return True
+            if time.monotonic() - self.opened_at >= self.reset_timeout:
+                self.opened_at = time.monotonic()  # half-open: one trial per timeout
+                return True
+            return False
+
+    def record_success(self):
+        with self.lock:
+            self.failures = 0
+            self.opened_at = None
+
+    def record_failure(self) -> bool:
+        """Counts a failure; returns True if it opened the breaker."""
+        with self.lock:
+            self.failures += 1
+            was_closed = self.opened_at is None
+            if self.failures >= self.failure_threshold:
+                self.opened_at = time.monotonic()
+                return was_closed
+            return False
+
+
+class TranslationProvider:
+    """Base class: translates a batch of chunks in one call and returns them in order."""
+
+    name = "base"
+
+    def translate_batch(self, chunks, src_lang="auto", dest_lang="en"):
+        raise NotImplementedError
+
+
+class GoogleProvider(TranslationProvider):
+    name = "google"
+
+    def __init__(self):
+        self.translators = {}
+
+    def _translator(self, src_lang, dest_lang):
+        # One translator object per language pair instead of one per chunk
+        key = (src_lang, dest_lang)
+        if key not in self.translators:
+            self.translators[key] = GoogleTranslator(source=src_lang, target=dest_lang)
+        return self.translators[key]
+
+    def translate_batch(self, chunks, src_lang="auto", dest_lang="en"):
+        return self._translator(src_lang, dest_lang).translate_batch(list(chunks))
+
+
+class MyMemoryProvider(GoogleProvider):
+    name = "mymemory"
+    max_chars = 500  # MyMemory rejects longer queries
+
+    @staticmethod
+    def _code(lang):
+        # MyMemory wants regional codes ('en' -> 'en-GB', 'zh-CN' stays as is)
+        codes = list(MY_MEMORY_LANGUAGES_TO_CODES.values())
+        if lang == "auto" or lang in codes:
+            return lang
+        if f"{lang}-{lang.upper()}" in codes:
+            return f"{lang}-{lang.upper()}"
+        return next((code for code in codes if code.split("-")[0] == lang), lang)
+
+    def _translator(self, src_lang, dest_lang):
+        key = (src_lang, dest_lang)
+        if key not in self.translators:
+            self.translators[key] = MyMemoryTranslator(source=self._code(src_lang), target=self._code(dest_lang))
+        return self.translators[key]
+
+    def translate_batch(self, chunks, src_lang="auto", dest_lang="en"):
+        translator = self._translator(src_lang, dest_lang)
+        return [
+            " ".join(translator.translate(piece) for piece in chunk_text(chunk, chunk_size=self.max_chars))
+            for chunk in chunks
+        ]
+
+
+class LibreTranslateProvider(TranslationProvider):
+    """Local LibreTranslate server; its /translate endpoint accepts a list of texts per request."""
+
+    name = "libretranslate"
+
+    def __init__(self, url: str = None, timeout: float = 30.0, pool_size: int = 8):
+        self.url = (url or os.getenv("LIBRETRANSLATE_URL", LIBRETRANSLATE_URL)).rstrip("/")
+        self.timeout = timeout
+        self.session = make_session(pool_size)
+
+    def translate_batch(self, chunks, src_lang="auto", dest_lang="en"):
+        source = src_lang.split("-")[0] if src_lang != "auto" else "auto"
+        response = self.session.post(
+            f"{self.url}/translate",
+            json={"q": list(chunks), "source": source, "target": dest_lang, "format": "text"},
+            timeout=self.timeout,
+        )
+        response.raise_for_status()
+        translated = response.json()["translatedText"]
+        if len(translated) != len(chunks):
+            raise ValueError(f"LibreTranslate returned {len(translated)} texts for {len(chunks)} inputs")
+        return translated
+
+
+PROVIDER_CLASSES = {
+    "google": GoogleProvider,
+    "mymemory": MyMemoryProvider,
+    "libretranslate": LibreTranslateProvider,
+}
+
+
+class Translator:
+    """
+    Batched, concurrent translation over a chain of providers.
+
+    Texts are split into chunks, de-duplicated, grouped into batches and sent to a
+    bounded thread pool. Each batch goes to the first provider whose circuit breaker
+    is closed; on failure the next provider is tried. Chunks no provider could
+    translate are returned unchanged.
+    """
+
+    def __init__(self, providers=None, max_workers: int = 4, batch_size: int = 16,
+                 chunk_size: int = 3000, failure_threshold: int = 3, reset_timeout: float = 60.0):
+        defaults = OFFLINE_PROVIDERS if os.getenv("HTTP_MODE", "live") in ("replay", "synthetic") else DEFAULT_PROVIDERS
+        names = providers or os.getenv("TRANSLATION_PROVIDERS", ",".join(defaults)).split(",")
+        self.providers = [
+            PROVIDER_CLASSES[name.strip()]() if isinstance(name, str) else name
+            for name in names
+        ]
+        self.breakers = {p.name: CircuitBreaker(failure_threshold, reset_timeout) for p in self.providers}
+        self.max_workers = max_workers
+        self.batch_size = batch_size
+        self.chunk_size = chunk_size
+        self.calls = {p.name: 0 for p in self.providers}
+        self.failures = {p.name: 0 for p in self.providers}
+        self.lock = threading.Lock()
+
+    def _translate_chunks(self, chunks, src_lang, dest_lang):
+        """Returns (translations, ok) for one batch of chunks."""
+        attempts = 0
+        for provider in self.providers:
+            breaker = self.breakers[provider.name]
+            if not breaker.allow():
+                metrics.count(f"circuit_open_skips.{provider.name}")
+                continue
+            if attempts:
+                # The batch failed on an earlier provider and is retried on this one
+                metrics.count("retries")
+                metrics.count("translation_retries")
+            attempts += 1
+            try:
+                with self.lock:
+                    self.calls[provider.name] += 1
+                metrics.count(f"translation_calls.{provider.name}")
+                translated = provider.translate_batch(chunks, src_lang, dest_lang)
+                breaker.record_success()
+                return translated, True
+            except Exception as e:
+                with self.lock:
+                    self.failures[provider.name] += 1
+                metrics.count(f"translation_failures.{provider.name}")
+                if breaker.record_failure():
+                    metrics.count(f"circuit_opened.{provider.name}")
+                print(f"⚠️ {provider.name} translation failed for a batch of {len(chunks)}: {e}")
+        return list(chunks), False
+
+    def translate_texts(self, texts, src_lang="auto", dest_lang="en", cache=None):
+        """
+        Translates a list of texts.
+
+        Args:
+            texts (list): Texts to translate (non-strings are passed through).
+            src_lang (str): Source language code or 'auto'.
+            dest_lang (str): Target language code.
+            cache (TranslationCache): Optional persistent cache; hits skip the
+                providers and fully translated texts are stored.
+
+        Returns:
+            list: Translations in the same order as `texts`.
+        """
+        results = list(texts)
+        positions = {}  # text -> positions in `texts`
+        for i, text in enumerate(texts):
+            if text and isinstance(text, str):
+                positions.setdefault(text, []).append(i)
+        cached = cache.get_many(positions, src_lang, dest_lang) if cache is not None and positions else {}
+        pending = {}  # text -> positions still to translate
+        for text, where in positions.items():
+            if text in cached:
+                for i in where:
+                    results[i] = cached[text]
+            else:
+                pending[text] = where
+
+        if not pending:
+            return results
+
+        unique_texts = list(pending)
+        text_chunks = [chunk_text(text, chunk_size=self.chunk_size) for text in unique_texts]
+        unique_chunks = list(dict.fromkeys(chunk for chunks in text_chunks for chunk in chunks))
+        batches = [unique_chunks[i:i + self.batch_size] for i in range(0, len(unique_chunks), self.batch_size)]
+
+        translated = {}
+        failed = set()
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            for batch, (out, ok) in zip(batches, executor.map(
+                lambda b: self._translate_chunks(b, src_lang, dest_lang), batches
+            )):
+                translated.update(zip(batch, out))
+                if not ok:
+                    failed.update(batch)
+
+        complete = {}
+        for text, chunks in zip(unique_texts, text_chunks):
+            result = " ".join(translated[chunk] for chunk in chunks)
+            for i in pending[text]:
+                results[i] = result
+            if not any(chunk in failed for chunk in chunks):
+                complete[text] = result
+        if cache is not None and complete:
+            cache.put_many(complete, src_lang, dest_lang)
+
+        return results
+
+    def stats(self) -> dict:
+        return {p.name: {"calls": self.calls[p.name], "failures": self.failures[p.name]} for p in self.providers}
@@ -0,0 +1,132 @@
+# src/data/translation_cache.py
+
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from src import metrics
+
+cache_default_path = "data/cache/translations.sqlite"
+
+
+class TranslationCache:
+    """
+    Persistent translation cache stored in SQLite.
+
+    Entries are keyed by a SHA-256 of (source text, src_lang, dest_lang). Once the
+    stored translations exceed `max_bytes`, the least recently used entries are
+    evicted. Hit/miss counters cover the lifetime of the object.
+    """
+
+    def __init__(self, path: str = cache_default_path, max_bytes: int = 512 * 1024 * 1024):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.lock = threading.Lock()
+
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS translations ("
+            " key TEXT PRIMARY KEY,"
+            " translation TEXT NOT NULL,"
+            " size INTEGER NOT NULL,"
+            " last_used REAL NOT NULL)"
+        )
+        self.conn.execute("CREATE INDEX IF NOT EXISTS idx_last_used ON translations(last_used)")
+        self.conn.commit()
+        self.total_bytes = self.conn.execute("SELECT COALESCE(SUM(size), 0) FROM translations").fetchone()[0]
+
+    @staticmethod
+    def make_key(text: str, src_lang: str, dest_lang: str) -> str:
+        return hashlib.sha256(f"{src_lang}\x00{dest_lang}\x00{text}".encode("utf-8")).hexdigest()
+
+    def get(self, text: str, src_lang: str = "auto", dest_lang: str = "en"):
+        """Returns the cached translation, or None on a miss."""
+        return self.get_many([text], src_lang, dest_lang).get(text)
+
+    def get_many(self, texts, src_lang: str = "auto", dest_lang: str = "en") -> dict:
+        """
+        Cached translations of `texts` as {text: translation} (misses are left out).
+
+        The hits' `last_used` stamps are updated together with a single commit.
+        """
+        keys = {self.make_key(text, src_lang, dest_lang): text for text in dict.fromkeys(texts)}
+        found = {}
+        with self.lock:
+            key_list = list(keys)
+            for i in range(0, len(key_list), 500):  # stay below SQLite's bound-parameter limit
+                part = key_list[i:i + 500]
+                placeholders = ",".join("?" * len(part))
+                found.update(self.conn.execute(
+                    f"SELECT key, translation FROM translations WHERE key IN ({placeholders})", part
+                ).fetchall())
+            hits, misses = len(found), len(keys) - len(found)
+            self.hits += hits
+            self.misses += misses
+            if found:
+                now = time.time()
+                self.conn.executemany("UPDATE translations SET last_used = ? WHERE key = ?",
+                                      [(now, key) for key in found])
+                self.conn.commit()
+        if hits:
+            metrics.count("translation_cache_hits", hits)
+        if misses:
+            metrics.count("translation_cache_misses", misses)
+        return {keys[key]: translation for key, translation in found.items()}
+
+    def put(self, text: str, translation: str, src_lang: str = "auto", dest_lang: str = "en"):
+        self.put_many({text: translation}, src_lang, dest_lang)
+
+    def put_many(self, translations: dict, src_lang: str = "auto", dest_lang: str = "en"):
+        """Stores {text: translation} pairs in one transaction, then evicts if over the limit."""
+        with self.lock:
+            for text, translation in translations.items():
+                key = self.make_key(text, src_lang, dest_lang)
+                size = len(translation.encode("utf-8"))
+                old = self.conn.execute("SELECT size FROM translations WHERE key = ?", (key,)).fetchone()
+                self.total_bytes += size - (old[0] if old else 0)
+                self.conn.execute(
+                    "INSERT OR REPLACE INTO translations (key, translation, size, last_used) VALUES (?, ?, ?, ?)",
+                    (key, translation, size, time.time()),
+                )
+            self._evict()
+            self.conn.commit()
+
+    def _evict(self):
+        if self.total_bytes <= self.max_bytes:
+            return
+        # Drop least recently used entries until we're back under the limit
+        excess = self.total_bytes - self.max_bytes
+        freed = 0
+        keys = []
+        for key, size in self.conn.execute("SELECT key, size FROM translations ORDER BY last_used"):
+            keys.append((key,))
+            freed += size
+            if freed >= excess:
+                break
+        self.conn.executemany("DELETE FROM translations WHERE key = ?", keys)
+        self.total_bytes -= freed
+        self.evictions += len(keys)
+
+    def stats(self) -> dict:
+        with self.lock:
+            entries = self.conn.execute("SELECT COUNT(*) FROM translations").fetchone()[0]
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "evictions": self.evictions,
+            "entries": entries,
+            "bytes": self.total_bytes,
+        }
+
+    def close(self):
+        with self.lock:
+            self.conn.close()
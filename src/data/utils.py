@@ -1,12 +1,19 @@
 # src/data/utils.py
 
+import os
+import numpy as np
 import pandas as pd
 import re
-import time
-import random
-from langdetect import detect, LangDetectException
-from deep_translator import GoogleTranslator, MyMemoryTranslator
-from nltk.sentiment.vader import SentimentIntensityAnalyzer
+from functools import lru_cache
+from concurrent.futures import ProcessPoolExecutor
+from src.data.storage import read_table, write_table, has_pyarrow
+
+if has_pyarrow:
+    import pyarrow as pa
+    import pyarrow.compute as pc
+
+# Detection only looks at the start of an article; a few sentences are enough
+DETECT_PREFIX_CHARS = 400
 
 # Mapowanie nietypowych kodów językowych na poprawne
 LANGUAGE_CODE_MAP = {
@@ -24,16 +31,32 @@ def normalize_language_code(lang_code: str) -> str:
         return "unknown"
     return LANGUAGE_CODE_MAP.get(lang_code.lower(), lang_code)
 
-def detect_language(text):
-    """Detekcja języka z normalizacją kodu."""
+@lru_cache(maxsize=1)
+def _langdetect():
+    """langdetect is slow to import, so it is only loaded by the modes that detect languages."""
+    from langdetect import detect, DetectorFactory, LangDetectException
+    # Deterministyczne wyniki langdetect między uruchomieniami
+    DetectorFactory.seed = 0
+    return detect, LangDetectException
+
+@lru_cache(maxsize=100_000)
+def _detect_prefix(prefix):
+    detect, LangDetectException = _langdetect()
     try:
-        if isinstance(text, str) and text.strip():
-            detected = detect(text.strip())
-            return normalize_language_code(detected)
-        return "unknown"
+        return normalize_language_code(detect(prefix))
     except LangDetectException:
         return "undetected"
 
+def detect_language(text, max_chars=DETECT_PREFIX_CHARS):
+    """Detekcja języka z normalizacją kodu (na początkowym fragmencie tekstu, z cache)."""
+    if isinstance(text, str) and text.strip():
+        return _detect_prefix(text.strip()[:max_chars])
+    return "unknown"
+
+NON_ASCII_PATTERN = re.compile(r"[^\x00-\x7F]")
+# Literal characters (not \u escapes) so the pattern also works with Arrow's RE2 engine
+CJK_PATTERN = re.compile("[\u4e00-\u9fff\u3040-\u30ff\uac00-\ud7af]")
+
 def is_mostly_non_latin(text, threshold=0.3):
     """
     Returns True if text is mostly non-Latin characters,
@@ -42,61 +65,106 @@ def is_mostly_non_latin(text, threshold=0.3):
     if not isinstance(text, str) or not text.strip():
         return False
 
-    non_latin_chars = re.findall(r"[^\x00-\x7F]", text)
-
     # Jeśli zawiera chińskie/japońskie/koreańskie, zostawiamy
-    if re.search(r"[\u4e00-\u9fff\u3040-\u30ff\uac00-\ud7af]", text):
+    if CJK_PATTERN.search(text):
         return False
 
-    return len(non_latin_chars) / max(len(text), 1) > threshold
+    return len(NON_ASCII_PATTERN.findall(text)) / max(len(text), 1) > threshold
 
-def chunk_text(text, chunk_size=3000):
-    """Split text into smaller chunks (Google limit ≈5000 chars)."""
-    return [text[i:i+chunk_size] for i in range(0, len(text), chunk_size)]
-
-def safe_translate_chunk(chunk, src_lang="auto", dest_lang="en", retries=3, base_delay=2):
+def _utf8_buffers(texts: pd.Series):
     """
-    Translate a text chunk with retries in case of timeout or network error.
+    UTF-8 bytes of all texts in one NumPy buffer, per-row byte offsets and
+    per-row character lengths (nulls count as empty strings).
     """
-    for attempt in range(retries):
-        try:
-            return GoogleTranslator(source=src_lang, target=dest_lang).translate(chunk)
-        except Exception as e:
-            print(f"⚠️ Translation error (attempt {attempt+1}/{retries}): {e}")
-            sleep_time = base_delay * (2 ** attempt) + random.random()
-            time.sleep(sleep_time)
-        # fallback: try MyMemory
-        try:
-            print("🔄 Falling back to MyMemory translator...")
-            return MyMemoryTranslator(source=src_lang, target=dest_lang).translate(chunk)
-        except Exception as e:
-            print(f"❌ Fallback also failed: {e}")
-            return chunk  # fallback: return untranslated chunk
-
-def translate_text(text, src_lang="auto", dest_lang="en"):
+    arr = pa.array(texts, type=pa.large_string(), from_pandas=True).fill_null("")
+    if isinstance(arr, pa.ChunkedArray):  # Arrow-backed string columns come back chunked
+        arr = arr.combine_chunks()
+    offsets = np.frombuffer(arr.buffers()[1], dtype=np.int64)[arr.offset:arr.offset + len(arr) + 1]
+    data = np.frombuffer(arr.buffers()[2], dtype=np.uint8) if arr.buffers()[2] is not None else np.zeros(0, np.uint8)
+    n_chars = pc.utf8_length(arr).to_numpy(zero_copy_only=False)
+    return data, offsets, n_chars
+
+def _per_row_count(flags, offsets):
+    positions = np.flatnonzero(flags)
+    return np.diff(np.searchsorted(positions, offsets))
+
+def non_latin_mask(texts: pd.Series, threshold=0.3) -> pd.Series:
     """
-    Translate text safely in chunks with retries.
+    Column-wide `is_mostly_non_latin` without per-row Python calls.
+
+    Works on the UTF-8 bytes of the whole column at once: every non-ASCII character
+    has exactly one lead byte (>= 0xC0), and CJK code points are decoded from their
+    3-byte sequences.
+    Falls back to precompiled-regex string counts when pyarrow is not installed.
     """
-    if not text or not isinstance(text, str):
-        return text
+    if not has_pyarrow:
+        texts = texts.astype("string")
+        ratio = texts.str.count(NON_ASCII_PATTERN.pattern) / texts.str.len().clip(lower=1)
+        has_cjk = texts.str.contains(CJK_PATTERN.pattern, regex=True)
+        return ((ratio > threshold) & ~has_cjk).fillna(False).astype(bool)
 
-    try:
-        translated_chunks = []
-        for chunk in chunk_text(text, chunk_size=3000):
-            translated = safe_translate_chunk(chunk, src_lang, dest_lang)
-            translated_chunks.append(translated)
+    data, offsets, n_chars = _utf8_buffers(texts)
+    non_ascii = _per_row_count(data >= 0xC0, offsets)
 
-        return " ".join(translated_chunks)
+    # Decode 3-byte sequences (U+0800-U+FFFF) and look for Hiragana/Katakana, CJK ideographs, Hangul
+    lead = np.flatnonzero((data[:-2] >= 0xE0) & (data[:-2] < 0xF0)) if len(data) > 2 else np.zeros(0, np.int64)
+    cp = ((data[lead].astype(np.int32) & 0x0F) << 12) | ((data[lead + 1].astype(np.int32) & 0x3F) << 6) | (data[lead + 2] & 0x3F)
+    is_cjk = ((cp >= 0x3040) & (cp <= 0x30FF)) | ((cp >= 0x4E00) & (cp <= 0x9FFF)) | ((cp >= 0xAC00) & (cp <= 0xD7AF))
+    has_cjk = np.diff(np.searchsorted(lead[is_cjk], offsets)) > 0
 
-    except Exception as e:
-        print(f"⚠️ Translation error: {e}")
-        return text  # ultimate fallback: return original text
+    mask = (non_ascii / np.maximum(n_chars, 1) > threshold) & ~has_cjk
+    return pd.Series(mask, index=texts.index)
+
+def chunk_text(text, chunk_size=3000):
+    """Split text into smaller chunks (Google limit ≈5000 chars)."""
+    return [text[i:i+chunk_size] for i in range(0, len(text), chunk_size)]
+
+SENTIMENT_KEYS = ("compound", "pos", "neg", "neu")
+
+# Below this many texts a process pool costs more than it saves
+SENTIMENT_PARALLEL_MIN = 20_000
+
+@lru_cache(maxsize=1)
+def get_sentiment_analyzer():
+    """One VADER analyzer (and lexicon load) per process; nltk is imported on first use."""
+    from nltk.sentiment.vader import SentimentIntensityAnalyzer
+    return SentimentIntensityAnalyzer()
 
 def analyze_sentiment(text):
-    analyzer = SentimentIntensityAnalyzer()
-    scores = analyzer.polarity_scores(text)
+    scores = get_sentiment_analyzer().polarity_scores(text)
     return scores['compound']
 
+def _score_texts(texts):
+    analyzer = get_sentiment_analyzer()
+    out = np.zeros((len(texts), len(SENTIMENT_KEYS)))
+    for i, text in enumerate(texts):
+        if isinstance(text, str) and text:
+            scores = analyzer.polarity_scores(text)
+            out[i] = [scores[key] for key in SENTIMENT_KEYS]
+    return out
+
+def analyze_sentiment_batch(texts, n_jobs=None, chunk_size=5000):
+    """
+    Scores a list of texts with VADER.
+
+    The lexicon is loaded once per process. Large inputs (at least
+    SENTIMENT_PARALLEL_MIN texts) are sharded across a process pool of `n_jobs`
+    workers (default: all CPUs); pass n_jobs=1 to stay in-process. Non-string
+    texts score 0.
+
+    Returns:
+        dict: 'compound', 'pos', 'neg' and 'neu' NumPy arrays aligned with `texts`.
+    """
+    texts = list(texts)
+    n_jobs = n_jobs or os.cpu_count() or 1
+    if n_jobs > 1 and len(texts) >= SENTIMENT_PARALLEL_MIN:
+        shards = [texts[i:i + chunk_size] for i in range(0, len(texts), chunk_size)]
+        with ProcessPoolExecutor(max_workers=n_jobs) as executor:
+            scores = np.concatenate(list(executor.map(_score_texts, shards)))
+    else:
+        scores = _score_texts(texts) if texts else np.zeros((0, len(SENTIMENT_KEYS)))
+    return {key: scores[:, i] for i, key in enumerate(SENTIMENT_KEYS)}
+
 def save_to_csv(df, filename, start_date=None, end_date=None):
     df = df.copy()
     if start_date:
@@ -105,15 +173,18 @@ def save_to_csv(df, filename, start_date=None, end_date=None):
         df["end_date"] = end_date
 
     if "publishedAt" in df.columns:
-        df["publishedAt"] = pd.to_datetime(df["publishedAt"], errors="coerce")
+        df["publishedAt"] = pd.to_datetime(df["publishedAt"], utc=True, errors="coerce")
         df = df.sort_values(by="publishedAt")
 
     try:
-        existing_df = pd.read_csv(filename)
+        existing_df = read_table(filename, parse_dates=["publishedAt"])
         df = pd.concat([existing_df, df], ignore_index=True)
+        if "publishedAt" in df.columns:
+            # One UTC dtype whatever the stored table held, so an unchanged table is rewritten byte-identical
+            df["publishedAt"] = pd.to_datetime(df["publishedAt"], utc=True, errors="coerce")
         df.drop_duplicates(subset=["title", "publishedAt"], inplace=True)
     except FileNotFoundError:
         pass
 
-    df.to_csv(filename, index=False)
+    write_table(df, filename, partition_cols=["ticker"])
     print(f"✅ Saved {len(df)} rows to '{filename}'")
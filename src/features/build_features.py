@@ -1,50 +1,103 @@
 # src/features/build_features.py
+import numpy as np
 import pandas as pd
-from src.features.technical_indicators import add_technical_indicators
+from src.data.storage import read_table, write_table
+from src.features.technical_indicators import add_technical_indicators, update_technical_indicators
+
+# News published after the close (or on a non-trading day) counts for the next session
+MARKET_TZ = "America/New_York"
+MARKET_CLOSE_HOUR = 16
+
+
+def _day_keys(dates: pd.Series) -> np.ndarray:
+    """int64 day numbers (days since 1970-01-01) for tz-naive timestamps."""
+    return dates.to_numpy(dtype="datetime64[ns]").astype("datetime64[D]").astype(np.int64)
+
+
+def _news_day_keys(published: pd.Series) -> np.ndarray:
+    """
+    Day key of the first session a (UTC) article can affect: its New York calendar
+    day, or the following day if it was published at/after the close.
+    """
+    local = published.dt.tz_convert(MARKET_TZ)
+    days = _day_keys(local.dt.tz_localize(None))
+    return days + (local.dt.hour >= MARKET_CLOSE_HOUR).to_numpy(dtype=np.int64)
+
+
+def _align_to_sessions(news: pd.DataFrame, sessions: pd.DataFrame, by=None) -> pd.DataFrame:
+    """
+    Sorted as-of join: maps each article's day key to the next trading session
+    (same day or later) present in `sessions`. Articles newer than the last known
+    session are dropped until prices for it arrive.
+    """
+    aligned = pd.merge_asof(
+        news.sort_values("day"),
+        sessions.sort_values("session"),
+        left_on="day",
+        right_on="session",
+        by=by,
+        direction="forward",
+    )
+    aligned = aligned.dropna(subset=["session"])
+    aligned["session"] = aligned["session"].astype(np.int64)
+    return aligned
+
 
 def combine_news_and_prices(
     news_file="data/processed/news_translated_cleaned.csv",
     price_file="data/prices/stock_prices.csv",
-    output_file="data/features/combined.csv"
+    output_file="data/features/combined.csv",
+    incremental=False
 ):
-    df_news = pd.read_csv(news_file)
-    df_prices = pd.read_csv(price_file)
+    df_news = read_table(news_file, columns=['ticker', 'publishedAt', 'sentiment'])
+    df_prices = read_table(price_file)
 
-    df_news['publishedAt'] = pd.to_datetime(df_news['publishedAt'], errors='coerce')
     df_prices['Date'] = pd.to_datetime(df_prices['Date'], errors='coerce')
+    df_prices = df_prices.dropna(subset=['Date'])
+    df_prices['session'] = _day_keys(df_prices['Date'])
 
-    df_news['date'] = df_news['publishedAt'].dt.date
-    df_prices['date'] = df_prices['Date'].dt.date
+    df_news['publishedAt'] = pd.to_datetime(df_news['publishedAt'], errors='coerce', utc=True)
+    df_news = df_news.dropna(subset=['publishedAt'])
+    df_news['day'] = _news_day_keys(df_news['publishedAt'])
+    df_news = df_news[['ticker', 'day', 'sentiment']]
 
-    # Aggregate sentiment per ticker/date
-    df_agg_news = df_news.groupby(['ticker', 'date']).agg({
-        'sentiment': 'mean',
-        'translated_text': 'count'
-    }).rename(columns={'translated_text': 'news_count'}).reset_index()
+    is_general = df_news['ticker'] == "GENERAL"
 
-    # Split general vs company sentiment
-    df_general = df_agg_news[df_agg_news['ticker'] == "GENERAL"][['date', 'sentiment']].rename(columns={'sentiment': 'general_sentiment'})
-    df_company = df_agg_news[df_agg_news['ticker'] != "GENERAL"]
+    # Company news → that ticker's next session
+    ticker_sessions = df_prices[['ticker', 'session']].drop_duplicates()
+    df_company = _align_to_sessions(df_news[~is_general], ticker_sessions, by='ticker')
+    df_company = df_company.groupby(['ticker', 'session'], sort=False).agg(
+        sentiment=('sentiment', 'mean'),
+        news_count=('sentiment', 'size'),
+    ).reset_index()
 
-    # Merge company sentiment to prices
-    df = pd.merge(df_prices, df_company, how='left', on=['ticker', 'date'])
+    # General news → next session of the market as a whole
+    market_sessions = pd.DataFrame({'session': np.unique(df_prices['session'].to_numpy())})
+    df_general = _align_to_sessions(df_news[is_general].drop(columns=['ticker']), market_sessions)
+    df_general = df_general.groupby('session', sort=False).agg(
+        general_sentiment=('sentiment', 'mean'),
+    ).reset_index()
 
-    # Merge general sentiment to all prices on same date
-    df = pd.merge(df, df_general, how='left', on='date')
+    # Merge company sentiment to prices, general sentiment to all prices of that session
+    df = pd.merge(df_prices, df_company, how='left', on=['ticker', 'session'])
+    df = pd.merge(df, df_general, how='left', on='session')
 
     # Fill NaNs
     df['sentiment'] = df['sentiment'].fillna(0)
     df['news_count'] = df['news_count'].fillna(0)
     df['general_sentiment'] = df['general_sentiment'].fillna(0)
 
-    # Add technical indicators
-    df = add_technical_indicators(df)
+    df['date'] = df['session'].to_numpy().astype('datetime64[D]').astype('datetime64[ns]')
+    df = df.drop(columns=['session'])
+
+    # Add technical indicators (only new bars are computed in incremental mode)
+    df = update_technical_indicators(df) if incremental else add_technical_indicators(df)
 
     # Target generation
     df.sort_values(by=['ticker', 'date'], inplace=True)
     df['next_close'] = df.groupby('ticker')['Close'].shift(-1)
     df['target'] = (df['next_close'] > df['Close']).astype(int)
 
-    df.to_csv(output_file, index=False)
+    write_table(df, output_file, partition_cols=['ticker'])
     print(f"✅ Features saved to '{output_file}' with {len(df)} rows.")
     return df
@@ -0,0 +1,71 @@
+# src/features/matrices.py
+
+import json
+import os
+import numpy as np
+
+manifest_default_path = "models/feature_manifest.json"
+matrices_default_dir = "data/features/matrices"
+
+FEATURE_DTYPE = np.float32
+TARGET_DTYPE = np.int8
+
+
+def write_matrix(path: str, values, dtype, chunk_rows: int = 100_000) -> np.memmap:
+    """
+    Writes an array, Series or DataFrame to a `.npy` file through a memory map,
+    converting `chunk_rows` rows at a time so no full-size temporary in another
+    dtype is made.
+    """
+    out = np.lib.format.open_memmap(path, mode="w+", dtype=dtype, shape=values.shape)
+    for start in range(0, len(values), chunk_rows):
+        block = values[start:start + chunk_rows]
+        out[start:start + len(block)] = np.asarray(block, dtype=dtype)
+    out.flush()
+    return out
+
+
+def save_manifest(feature_cols: list, splits: dict, target_col: str = "target",
+                  manifest_path: str = manifest_default_path, **extra):
+    """
+    Writes the manifest describing the training matrices.
+
+    Args:
+        feature_cols (list): Column order of the feature matrices.
+        splits (dict): Split name -> {"X": path, "y": path, "rows": int}.
+        target_col (str): Name of the target the `y` vectors hold.
+        manifest_path (str): Where to write the manifest.
+        **extra: Additional entries (e.g. the scaler path).
+    """
+    manifest = {
+        "feature_columns": list(feature_cols),
+        "target": target_col,
+        "feature_dtype": np.dtype(FEATURE_DTYPE).name,
+        "target_dtype": np.dtype(TARGET_DTYPE).name,
+        "splits": splits,
+        **extra,
+    }
+    os.makedirs(os.path.dirname(manifest_path), exist_ok=True)
+    with open(manifest_path, "w") as f:
+        json.dump(manifest, f, indent=2)
+    return manifest
+
+
+def load_manifest(manifest_path: str = manifest_default_path) -> dict:
+    if not os.path.exists(manifest_path):
+        raise FileNotFoundError(f"Feature manifest '{manifest_path}' not found. Run scale mode first.")
+    with open(manifest_path, "r") as f:
+        return json.load(f)
+
+
+def load_split(manifest: dict, split: str):
+    """
+    Opens one split's feature matrix and target vector as read-only memory maps.
+
+    Returns:
+        tuple: (X, y), or (None, None) if the split is missing.
+    """
+    entry = manifest["splits"].get(split)
+    if entry is None or not os.path.exists(entry["X"]):
+        return None, None
+    return np.load(entry["X"], mmap_mode="r"), np.load(entry["y"], mmap_mode="r")
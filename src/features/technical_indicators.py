@@ -2,45 +2,639 @@
 
 import pandas as pd
 import numpy as np
-from sklearn.preprocessing import StandardScaler
 import joblib
 import os
-import json
+from src.data.storage import read_table, write_table
+from src.models.artifacts import load_artifact, save_artifact
+from src.features.matrices import (
+    FEATURE_DTYPE, TARGET_DTYPE, manifest_default_path, matrices_default_dir, save_manifest, write_matrix,
+)
 
 scaler_default_path = "models/price_scaler.pkl"
+indicator_state_default_path = "data/features/indicator_state.pkl"
+
+# Return horizons of the lagged daily-return features
+LAG_HORIZONS = (1, 2, 3, 5, 10)
+
+INDICATOR_COLUMNS = [
+    "MA25", "MA50", "BB_upper", "BB_lower", "MACD", "MACD_signal", "RSI",
+    "ATR", "Stoch_K", "Stoch_D", "OBV", "VWAP",
+    "Return_1", "Return_5", "Return_20", "Volatility_20",
+    *[f"Return_lag_{h}" for h in LAG_HORIZONS],
+]
+
+# Price columns the indicators read; missing ones (e.g. tables fetched before
+# OHLCV was kept) only leave the indicators that need them NaN
+PRICE_INPUTS = ["High", "Low", "Close", "Volume"]
+
+# Per-ticker accumulators carried between incremental runs besides the tail
+ACCUMULATORS = ("ema12", "ema26", "ema_signal", "obv")
+
+# Bumped whenever the persisted state layout or the indicator set changes
+STATE_VERSION = 2
+
+# Model inputs, in matrix column order
+FEATURE_COLUMNS = [
+    "sentiment", "news_count", "general_sentiment",
+    "MA25", "MA50", "MACD", "MACD_signal",
+    "BB_upper", "BB_lower", "RSI"
+]
+
+# Opt-in model inputs (--feature_set extended): the base set plus the OHLCV indicators
+EXTENDED_FEATURE_COLUMNS = FEATURE_COLUMNS + [
+    col for col in INDICATOR_COLUMNS if col not in FEATURE_COLUMNS
+]
+
+FEATURE_SETS = {"base": FEATURE_COLUMNS, "extended": EXTENDED_FEATURE_COLUMNS}
+
+# Longest rolling window (MA50) minus one: the number of trailing bars an
+# incremental update needs to see before the first new bar (every other
+# indicator looks back at most 20 bars).
+TAIL_LENGTH = 49
+
+
+def _date_column(df: pd.DataFrame):
+    return next((c for c in ("Date", "date") if c in df.columns), None)
+
+
+def price_column(df: pd.DataFrame, col: str) -> pd.Series:
+    """
+    A price column as float64, or None if the frame has no such column.
+
+    Tables written before prices were stored as typed OHLCV hold Twelve Data's raw
+    lowercase string columns ('high', 'volume', ...); those are parsed and fill the
+    rows the typed column lacks.
+    """
+    legacy = col.lower()
+    values = pd.to_numeric(df[col], errors="coerce").astype(np.float64) if col in df.columns else None
+    if legacy != col and legacy in df.columns:
+        old = pd.to_numeric(df[legacy], errors="coerce").astype(np.float64)
+        values = old if values is None else values.fillna(old)
+    return values
+
+
+def price_inputs(df: pd.DataFrame, order=None) -> dict:
+    """PRICE_INPUTS as float64 arrays in block order (all-NaN for missing columns)."""
+    prices = {}
+    for col in PRICE_INPUTS:
+        values = price_column(df, col)
+        values = np.full(len(df), np.nan) if values is None else values.to_numpy(dtype=np.float64)
+        prices[col] = values if order is None else values[order]
+    return prices
+
+
+def sort_order(df: pd.DataFrame):
+    """
+    Returns (order, starts, lengths) describing contiguous per-ticker blocks.
+
+    `order` is a permutation that sorts rows by ticker and date (or None when the
+    frame is already laid out that way), `starts`/`lengths` give each ticker block.
+    """
+    n = len(df)
+    if "ticker" in df.columns:
+        codes, _ = pd.factorize(df["ticker"], sort=True)
+    else:
+        codes = np.zeros(n, dtype=np.int64)
+
+    date_col = _date_column(df)
+    if date_col is not None:
+        dates = pd.to_datetime(df[date_col], errors="coerce").to_numpy("datetime64[ns]").view("i8")
+        order = np.lexsort((dates, codes))
+    else:
+        order = np.argsort(codes, kind="stable")
+
+    if np.array_equal(order, np.arange(n)):
+        order = None
+        sorted_codes = codes
+    else:
+        sorted_codes = codes[order]
+
+    boundaries = np.flatnonzero(np.diff(sorted_codes)) + 1
+    starts = np.concatenate(([0], boundaries)) if n else np.array([], dtype=np.int64)
+    lengths = np.diff(np.concatenate((starts, [n])))
+    return order, starts, lengths
+
+
+class _Blocks:
+    """Row layout of contiguous per-ticker blocks, shared by every indicator of one pass."""
+
+    def __init__(self, starts, lengths):
+        self.starts = starts
+        self.lengths = lengths
+        self.n = int(lengths.sum())
+        self.pos = np.arange(self.n) - np.repeat(starts, lengths)
+        self._partial = {}
+
+    def partial(self, window):
+        """Rows whose trailing `window` rows reach back past their block start (cached per window)."""
+        if window not in self._partial:
+            self._partial[window] = self.pos < window - 1
+        return self._partial[window]
+
+
+def _prefix_sums(x, blocks, squares=False):
+    """
+    Prefix sums of `x` from which `_rolling_mean_std` reads any window in O(1) per row,
+    so one series feeds all of its moving averages, bands and deviations.
+
+    Values are centred on their block mean before summing to keep the prefix sums
+    small, so long histories don't lose precision.
+    """
+    nan_mask = np.isnan(x)
+    has_nan = bool(nan_mask.any())
+    if len(x):
+        filled = np.where(nan_mask, 0.0, x) if has_nan else x
+        counts = np.add.reduceat(~nan_mask, blocks.starts)
+        sums = np.add.reduceat(filled, blocks.starts)
+        block_ref = np.divide(sums, counts, out=np.zeros(len(blocks.starts)), where=counts > 0)
+    else:
+        block_ref = np.zeros(0)
+    ref = np.repeat(block_ref, blocks.lengths)
+    centred = np.where(nan_mask, 0.0, x - ref) if has_nan else x - ref
+    return {
+        "ref": ref,
+        "cs": np.concatenate(([0.0], np.cumsum(centred))),
+        "cs2": np.concatenate(([0.0], np.cumsum(centred * centred))) if squares else None,
+        "cnan": np.concatenate(([0], np.cumsum(nan_mask))) if has_nan else None,
+    }
+
+
+def _rolling_mean_std(prefix, blocks, window, with_std=False):
+    """
+    Per-block rolling mean (and sample std, which needs `squares=True` prefix sums).
+
+    A window containing a NaN, or reaching back past the start of its block, yields
+    NaN (same as pandas' default min_periods=window).
+    """
+    mean = np.full(blocks.n, np.nan)
+    std = np.full(blocks.n, np.nan) if with_std else None
+    if blocks.n < window:
+        return mean, std
+
+    # Sums of every window ending at row window-1 onwards, from contiguous slices
+    cs = prefix["cs"]
+    s1 = cs[window:] - cs[:-window]
+    mean[window - 1:] = s1 / window + prefix["ref"][window - 1:]
+
+    if with_std:
+        cs2 = prefix["cs2"]
+        var = (cs2[window:] - cs2[:-window] - s1 * s1 / window) / (window - 1)
+        std[window - 1:] = np.sqrt(np.clip(var, 0.0, None))
+
+    invalid = blocks.partial(window).copy()
+    if prefix["cnan"] is not None:
+        cnan = prefix["cnan"]
+        invalid[window - 1:] |= (cnan[window:] - cnan[:-window]) > 0
+    mean[invalid] = np.nan
+    if with_std:
+        std[invalid] = np.nan
+
+    return mean, std
+
+
+def _shift(x, blocks, periods):
+    """Per-block `shift(periods)`: the value `periods` rows earlier in the same block, else NaN."""
+    out = np.full(len(x), np.nan)
+    if periods < len(x):
+        out[periods:] = x[:-periods]
+    out[blocks.pos < periods] = np.nan
+    return out
+
+
+def _sliding_extreme(x, window, extreme):
+    """
+    Trailing-window minimum/maximum in O(n) (van Herk/Gil-Werman): running extremes
+    from both ends of fixed chunks of `window` rows combine into every window's.
+    """
+    n = len(x)
+    out = np.full(n, np.nan)
+    if n < window:
+        return out
+    padded = np.concatenate((x, np.full(-n % window, np.nan))).reshape(-1, window)
+    forward = extreme.accumulate(padded, axis=1).ravel()
+    backward = extreme.accumulate(padded[:, ::-1], axis=1)[:, ::-1].ravel()
+    out[window - 1:] = extreme(backward[:n - window + 1], forward[window - 1:n])
+    return out
+
+
+def _rolling_min_max(low, high, blocks, window):
+    """
+    Per-block rolling minimum of `low` and maximum of `high`. Windows reaching past
+    the start of their block, or containing a NaN, yield NaN.
+    """
+    lowest = _sliding_extreme(low, window, np.minimum)
+    highest = _sliding_extreme(high, window, np.maximum)
+    partial = blocks.pos < window - 1
+    lowest[partial] = np.nan
+    highest[partial] = np.nan
+    return lowest, highest
+
+
+def _block_cumsum(x, starts, lengths, init=None):
+    """Per-block running sum (NaN counts as 0), optionally continuing from per-block `init` values."""
+    filled = np.where(np.isnan(x), 0.0, x)
+    cs = np.cumsum(filled)
+    before = np.concatenate(([0.0], cs))[starts]
+    out = cs - np.repeat(before, lengths)
+    if init is not None:
+        out += np.repeat(np.asarray(init, dtype=np.float64), lengths)
+    last = np.full(len(starts), np.nan) if len(x) == 0 else out[starts + lengths - 1]
+    return out, last
+
+
+def _ewm(x, starts, lengths, span, init=None):
+    """
+    Per-block exponential moving average, equivalent to
+    `Series.ewm(span=span, adjust=False).mean()` applied to each block.
+
+    Blocks are advanced in lockstep: step t updates the t-th bar of every block that
+    is at least t+1 bars long, so the Python loop runs max(lengths) times regardless
+    of how many tickers there are.
+
+    `init` is an optional (weighted, old_wt) pair of per-block arrays to resume
+    from; the final pair is returned alongside the output so it can be persisted.
+    """
+    n = len(x)
+    n_blocks = len(starts)
+    out = np.full(n, np.nan)
+    if n == 0:
+        return out, (np.full(n_blocks, np.nan), np.ones(n_blocks))
+
+    alpha = 2.0 / (span + 1.0)
+    by_len = np.argsort(-lengths, kind="stable")
+    block_starts = starts[by_len]
+    active_at = np.searchsorted(-lengths[by_len], -np.arange(lengths.max()), side="left")
+
+    if init is None:
+        weighted = np.full(n_blocks, np.nan)
+        old_wt = np.ones(n_blocks)
+    else:
+        weighted = np.asarray(init[0], dtype=np.float64)[by_len]
+        old_wt = np.asarray(init[1], dtype=np.float64)[by_len]
+
+    for t, k in enumerate(active_at):
+        idx = block_starts[:k] + t
+        cur = x[idx]
+        w = weighted[:k]
+        ow = old_wt[:k]
+        obs = ~np.isnan(cur)
+        has_prev = ~np.isnan(w)
+
+        ow[has_prev] *= 1.0 - alpha
+        upd = has_prev & obs
+        w[upd] = (ow[upd] * w[upd] + alpha * cur[upd]) / (ow[upd] + alpha)
+        ow[upd] = 1.0
+        first = ~has_prev & obs
+        w[first] = cur[first]
+
+        out[idx] = w
+
+    final_weighted = np.empty(n_blocks)
+    final_old_wt = np.empty(n_blocks)
+    final_weighted[by_len] = weighted
+    final_old_wt[by_len] = old_wt
+    return out, (final_weighted, final_old_wt)
+
+
+def _compute_indicators(prices, starts, lengths, acc_init=None, skip=None):
+    """
+    Computes every indicator over block-sorted prices in one fused pass.
+
+    `prices` maps each of PRICE_INPUTS to an array. Shared intermediates (previous
+    close, daily returns, prefix sums) are built once and reused, so most indicators
+    cost a few vectorized operations on top of the five original ones.
+
+    `skip` gives, per block, the number of leading rows that are only history
+    (a buffered tail from a previous run): they feed the rolling windows but the
+    EMAs and OBV resume from `acc_init` at the first row after them.
+
+    Returns (indicators, accumulators) where both are dicts of arrays.
+    """
+    high, low, close, volume = (prices[col] for col in PRICE_INPUTS)
+    n = len(close)
+    if skip is None:
+        acc_idx = None
+        a_starts, a_lengths = starts, lengths
+    else:
+        pos = np.arange(n) - np.repeat(starts, lengths)
+        acc_idx = np.flatnonzero(pos >= np.repeat(skip, lengths))
+        a_lengths = lengths - skip
+        a_starts = np.concatenate(([0], np.cumsum(a_lengths)[:-1]))
+    acc_init = acc_init or {}
+
+    def resumed(x):
+        return x if acc_idx is None else x[acc_idx]
+
+    def full(x):
+        if acc_idx is None:
+            return x
+        out = np.full(n, np.nan)
+        out[acc_idx] = x
+        return out
+
+    blocks = _Blocks(starts, lengths)
+
+    # Moving Averages and Bollinger Bands, all from one set of prefix sums
+    close_sums = _prefix_sums(close, blocks, squares=True)
+    ma25, _ = _rolling_mean_std(close_sums, blocks, 25)
+    ma50, _ = _rolling_mean_std(close_sums, blocks, 50)
+    bb_mean, bb_std = _rolling_mean_std(close_sums, blocks, 20, with_std=True)
+
+    # MACD (12 EMA - 26 EMA)
+    e_close = resumed(close)
+    ema12, state12 = _ewm(e_close, a_starts, a_lengths, 12, acc_init.get("ema12"))
+    ema26, state26 = _ewm(e_close, a_starts, a_lengths, 26, acc_init.get("ema26"))
+    macd = ema12 - ema26
+    macd_signal, state9 = _ewm(macd, a_starts, a_lengths, 9, acc_init.get("ema_signal"))
+    macd, macd_signal = full(macd), full(macd_signal)
+
+    # Shared by RSI, ATR, OBV and the returns
+    prev_close = _shift(close, blocks, 1)
+    delta = close - prev_close
+
+    # RSI
+    gain = np.where(delta > 0, delta, 0.0)
+    loss = np.where(delta < 0, -delta, 0.0)
+    avg_gain, _ = _rolling_mean_std(_prefix_sums(gain, blocks), blocks, 14)
+    avg_loss, _ = _rolling_mean_std(_prefix_sums(loss, blocks), blocks, 14)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        rsi = 100 - (100 / (1 + avg_gain / avg_loss))
+
+    # ATR (14-bar mean true range; the first bar of a ticker has no previous close)
+    true_range = np.fmax(high - low, np.fmax(np.abs(high - prev_close), np.abs(low - prev_close)))
+    atr, _ = _rolling_mean_std(_prefix_sums(true_range, blocks), blocks, 14)
+
+    # Stochastic oscillator (%K over 14 bars, %D its 3-bar mean)
+    lowest, highest = _rolling_min_max(low, high, blocks, 14)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        stoch_k = 100 * (close - lowest) / (highest - lowest)
+    stoch_d, _ = _rolling_mean_std(_prefix_sums(stoch_k, blocks), blocks, 3)
+
+    # OBV (running sum of signed volume, 0 at a ticker's first bar)
+    signed_volume = np.sign(np.nan_to_num(delta)) * volume
+    obv, obv_last = _block_cumsum(resumed(signed_volume), a_starts, a_lengths,
+                                  acc_init.get("obv", (None,))[0])
+    obv = full(obv)
+    obv[np.isnan(volume)] = np.nan
+
+    # VWAP over 20 bars from the typical price (ratio of means = ratio of sums)
+    typical = (high + low + close) / 3
+    pv_mean, _ = _rolling_mean_std(_prefix_sums(typical * volume, blocks), blocks, 20)
+    v_mean, _ = _rolling_mean_std(_prefix_sums(volume, blocks), blocks, 20)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        vwap = pv_mean / v_mean
+
+    # Returns, realised volatility and lagged returns
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return_1 = delta / prev_close
+        return_5 = close / _shift(close, blocks, 5) - 1
+        return_20 = close / _shift(close, blocks, 20) - 1
+    _, volatility_20 = _rolling_mean_std(_prefix_sums(return_1, blocks, squares=True), blocks, 20, with_std=True)
+
+    indicators = {
+        "MA25": ma25,
+        "MA50": ma50,
+        "BB_upper": bb_mean + bb_std * 2,
+        "BB_lower": bb_mean - bb_std * 2,
+        "MACD": macd,
+        "MACD_signal": macd_signal,
+        "RSI": rsi,
+        "ATR": atr,
+        "Stoch_K": stoch_k,
+        "Stoch_D": stoch_d,
+        "OBV": obv,
+        "VWAP": vwap,
+        "Return_1": return_1,
+        "Return_5": return_5,
+        "Return_20": return_20,
+        "Volatility_20": volatility_20,
+        **{f"Return_lag_{h}": _shift(return_1, blocks, h) for h in LAG_HORIZONS},
+    }
+    accumulators = {"ema12": state12, "ema26": state26, "ema_signal": state9, "obv": (obv_last,)}
+    return indicators, accumulators
+
 
 def add_technical_indicators(df: pd.DataFrame) -> pd.DataFrame:
     """
     Adds common technical indicators without using TA-Lib.
     Works directly on a DataFrame with columns: Open, High, Low, Close, Volume.
+
+    Indicators are computed per ticker (ordered by date when a Date/date column is
+    present) in a single NumPy pass over contiguous blocks, so windows never cross
+    ticker boundaries. Row order of the returned frame matches the input. Only
+    Close is required; indicators needing High/Low/Volume are NaN without them.
     """
+    n = len(df)
+    order, starts, lengths = sort_order(df)
 
-    df = df.copy()
+    computed, _ = _compute_indicators(price_inputs(df, order), starts, lengths)
 
-    # Moving Averages
-    df["MA25"] = df["Close"].rolling(window=25).mean()
-    df["MA50"] = df["Close"].rolling(window=50).mean()
+    indicators = {}
+    for col in INDICATOR_COLUMNS:
+        if order is None:
+            indicators[col] = computed[col]
+        else:
+            out = np.empty(n)
+            out[order] = computed[col]
+            indicators[col] = out
 
-    # Bollinger Bands
-    rolling_mean = df["Close"].rolling(window=20).mean()
-    rolling_std = df["Close"].rolling(window=20).std()
-    df["BB_upper"] = rolling_mean + (rolling_std * 2)
-    df["BB_lower"] = rolling_mean - (rolling_std * 2)
+    return df.assign(**indicators)
 
-    # MACD (12 EMA - 26 EMA)
-    ema12 = df["Close"].ewm(span=12, adjust=False).mean()
-    ema26 = df["Close"].ewm(span=26, adjust=False).mean()
-    df["MACD"] = ema12 - ema26
-    df["MACD_signal"] = df["MACD"].ewm(span=9, adjust=False).mean()
 
-    # RSI
-    delta = df["Close"].diff()
-    gain = (delta.where(delta > 0, 0)).rolling(window=14).mean()
-    loss = (-delta.where(delta < 0, 0)).rolling(window=14).mean()
-    rs = gain / loss
-    df["RSI"] = 100 - (100 / (1 + rs))
+def _empty_indicator_state():
+    index = pd.MultiIndex.from_arrays(
+        [pd.Index([], dtype=object), pd.DatetimeIndex([], dtype="datetime64[ns]")],
+        names=["ticker", "Date"],
+    )
+    return {
+        "version": STATE_VERSION,
+        "tickers": {},
+        "values": pd.DataFrame(columns=INDICATOR_COLUMNS, index=index, dtype=np.float64),
+    }
+
+
+def load_indicator_state(state_path: str = indicator_state_default_path) -> dict:
+    """
+    Loads persisted per-ticker indicator state, or an empty state if none exists yet.
+
+    The state holds, per ticker, the last processed date, the trailing prices needed
+    by the rolling windows, and the EMA 12/26/9 and OBV accumulators; plus a
+    (ticker, Date) indexed frame of indicator values already computed. A state
+    written for another indicator set is discarded (the next run recomputes).
+    """
+    if not os.path.exists(state_path):
+        return _empty_indicator_state()
+    state = joblib.load(state_path)
+    if state.get("version") != STATE_VERSION:
+        print(f"⚠️ Indicator state '{state_path}' is from an older version; recomputing all tickers.")
+        return _empty_indicator_state()
+    return state
+
+
+def save_indicator_state(state: dict, state_path: str = indicator_state_default_path):
+    os.makedirs(os.path.dirname(state_path), exist_ok=True)
+    joblib.dump(state, state_path)
+
+
+def _gather(starts, lengths, skip=None):
+    """Concatenated row positions of the given blocks, optionally dropping a per-block prefix."""
+    if skip is None:
+        skip = np.zeros(len(starts), dtype=np.int64)
+    counts = lengths - skip
+    offsets = np.repeat(starts + skip - np.concatenate(([0], np.cumsum(counts)[:-1])), counts)
+    return np.arange(counts.sum()) + offsets
+
+
+def _ticker_state(prices, start, end, accumulators, i):
+    """State of one block: its last TAIL_LENGTH bars of every price input and its accumulators."""
+    first = max(start, end - TAIL_LENGTH)
+    return {
+        "tail": {col: prices[col][first:end].copy() for col in PRICE_INPUTS},
+        **{k: tuple(part[i] for part in v) for k, v in accumulators.items()},
+    }
+
+
+def extend_indicator_states(ticker_states: list, prices: dict, new_counts: np.ndarray):
+    """
+    Indicators for bars appended after persisted per-ticker states.
+
+    Args:
+        ticker_states (list): One state dict (tail + accumulators) per ticker.
+        prices (dict): The new bars' PRICE_INPUTS arrays, ticker after ticker, oldest first.
+        new_counts (np.ndarray): Number of new bars per ticker.
+
+    Returns:
+        tuple: ({column: values for the new bars}, advanced states without 'last_date').
+    """
+    tails = [ts["tail"] for ts in ticker_states]
+    skip = np.array([len(t["Close"]) for t in tails], dtype=np.int64)
+    ext_lengths = skip + new_counts
+    ext_starts = np.concatenate(([0], np.cumsum(ext_lengths)[:-1]))
+    ext_rows = _gather(ext_starts, ext_lengths, skip)
+    ext_prices = {}
+    for col in PRICE_INPUTS:
+        values = np.empty(ext_lengths.sum())
+        values[ext_rows] = prices[col]
+        for t, es in zip(tails, ext_starts):
+            values[es:es + len(t[col])] = t[col]
+        ext_prices[col] = values
+
+    acc_init = {
+        k: tuple(np.array([ts[k][j] for ts in ticker_states]) for j in range(len(ticker_states[0][k])))
+        for k in ACCUMULATORS
+    }
+    computed, accumulators = _compute_indicators(ext_prices, ext_starts, ext_lengths, acc_init, skip)
+    extended = [
+        _ticker_state(ext_prices, es, es + ext_lengths[i], accumulators, i)
+        for i, es in enumerate(ext_starts)
+    ]
+    return {col: computed[col][ext_rows] for col in INDICATOR_COLUMNS}, extended
+
+
+def update_technical_indicators(df: pd.DataFrame, state_path: str = indicator_state_default_path) -> pd.DataFrame:
+    """
+    Incremental variant of `add_technical_indicators`.
+
+    Rows already seen in a previous run are served from the persisted state; bars
+    dated after a ticker's last processed date are computed from its buffered tail
+    and EMA accumulators, so appending N bars costs O(N). Tickers that are new or
+    received back-filled history are recomputed in full. The updated state is
+    written back to `state_path`.
+
+    Args:
+        df (pd.DataFrame): Full price frame with ticker, Date/date and Close columns
+            (plus High, Low and Volume for the indicators that use them).
+        state_path (str): Path of the persisted indicator state.
+
+    Returns:
+        pd.DataFrame: Same as `add_technical_indicators(df)`.
+    """
+    n = len(df)
+    if n == 0 or "ticker" not in df.columns or _date_column(df) is None:
+        return add_technical_indicators(df)
+
+    state = load_indicator_state(state_path)
+    ticker_states = state["tickers"]
+    order, starts, lengths = sort_order(df)
+    if order is None:
+        order = np.arange(n)
+
+    prices = price_inputs(df, order)
+    dates = pd.to_datetime(df[_date_column(df)], errors="coerce").to_numpy("datetime64[ns]")[order]
+    tickers = df["ticker"].to_numpy()[order]
+
+    keys = pd.MultiIndex.from_arrays([tickers, dates], names=["ticker", "Date"])
+    cached = state["values"].reindex(keys)
+    found = keys.isin(state["values"].index)
+    out = {col: cached[col].to_numpy(dtype=np.float64, copy=True) for col in INDICATOR_COLUMNS}
+
+    full_blocks, inc_blocks, inc_first_new = [], [], []
+    for b, (s, length) in enumerate(zip(starts, lengths)):
+        ts = ticker_states.get(tickers[s])
+        if ts is None:
+            full_blocks.append(b)
+            continue
+        block = slice(s, s + length)
+        new = dates[block] > ts["last_date"]
+        if not (found[block] | new).all():
+            full_blocks.append(b)
+        elif new.any():
+            inc_blocks.append(b)
+            inc_first_new.append(s + int(np.argmax(new)))
+
+    new_rows = []
+
+    if full_blocks:
+        fb = np.asarray(full_blocks)
+        f_starts, f_lengths = starts[fb], lengths[fb]
+        rows = _gather(f_starts, f_lengths)
+        sub_starts = np.concatenate(([0], np.cumsum(f_lengths)[:-1]))
+        computed, accumulators = _compute_indicators({col: v[rows] for col, v in prices.items()},
+                                                     sub_starts, f_lengths)
+        for col in INDICATOR_COLUMNS:
+            out[col][rows] = computed[col]
+        new_rows.append(rows)
+        for i, b in enumerate(fb):
+            last = starts[b] + lengths[b]
+            ticker_states[tickers[starts[b]]] = {
+                "last_date": dates[last - 1],
+                **_ticker_state(prices, starts[b], last, accumulators, i),
+            }
+
+    if inc_blocks:
+        ib = np.asarray(inc_blocks)
+        first_new = np.asarray(inc_first_new)
+        new_counts = starts[ib] + lengths[ib] - first_new
+        rows = _gather(first_new, new_counts)
+        computed, extended = extend_indicator_states(
+            [ticker_states[tickers[starts[b]]] for b in ib], {col: v[rows] for col, v in prices.items()}, new_counts
+        )
+        for col in INDICATOR_COLUMNS:
+            out[col][rows] = computed[col]
+        new_rows.append(rows)
+        for b, ts in zip(ib, extended):
+            ticker_states[tickers[starts[b]]] = {**ts, "last_date": dates[starts[b] + lengths[b] - 1]}
+
+    if new_rows:
+        rows = np.concatenate(new_rows)
+        recomputed = {tickers[starts[b]] for b in full_blocks}
+        values = state["values"]
+        values = values[~values.index.get_level_values("ticker").isin(recomputed)]
+        fresh = pd.DataFrame({col: out[col][rows] for col in INDICATOR_COLUMNS}, index=keys[rows])
+        values = pd.concat([values, fresh])
+        state["values"] = values[~values.index.duplicated(keep="last")]
+        save_indicator_state(state, state_path)
+        print(f"✅ Indicators updated for {len(rows)} rows "
+              f"({len(inc_blocks)} incremental, {len(full_blocks)} full tickers).")
+
+    indicators = {}
+    for col in INDICATOR_COLUMNS:
+        result = np.empty(n)
+        result[order] = out[col]
+        indicators[col] = result
+
+    return df.assign(**indicators)
 
-    return df
 
 def scale_features(df: pd.DataFrame, feature_cols: list, scaler_path: str = scaler_default_path):
     """
@@ -54,16 +648,17 @@ def scale_features(df: pd.DataFrame, feature_cols: list, scaler_path: str = scal
     Returns:
         pd.DataFrame: DataFrame with scaled features.
     """
-    X = df[feature_cols].astype(float)
+    from sklearn.preprocessing import StandardScaler
+
+    X = df[feature_cols].to_numpy(dtype=float)
     scaler = StandardScaler()
     X_scaled = scaler.fit_transform(X)
 
-    os.makedirs(os.path.dirname(scaler_path), exist_ok=True)
-    joblib.dump(scaler, scaler_path)
+    save_artifact(scaler, scaler_path)
     print(f"✅ Scaler saved to '{scaler_path}'")
 
     df_scaled = df.copy()
-    df_scaled[feature_cols] = X_scaled
+    df_scaled[feature_cols] = X_scaled.astype(FEATURE_DTYPE)
 
     return df_scaled
 
@@ -82,32 +677,32 @@ def apply_scaler(df: pd.DataFrame, feature_cols: list, scaler_path: str = scaler
     if not os.path.exists(scaler_path):
         raise FileNotFoundError(f"Scaler file '{scaler_path}' not found. Run `scale_features` first.")
 
-    scaler = joblib.load(scaler_path)
-    X = df[feature_cols].astype(float)
+    scaler = load_artifact(scaler_path)
+    X = df[feature_cols].to_numpy(dtype=float)
     X_scaled = scaler.transform(X)
 
     df_scaled = df.copy()
-    df_scaled[feature_cols] = X_scaled
+    df_scaled[feature_cols] = X_scaled.astype(FEATURE_DTYPE)
 
     return df_scaled
 
-def run_scaling_pipeline():
+def run_scaling_pipeline(incremental=False, feature_set="base"):
     """
-    Full pipeline for adding indicators, scaling features, and saving the result.
-    """
-    df = pd.read_csv("data/features/combined.csv")
-    df = add_technical_indicators(df)
+    Full pipeline for scaling features and saving the result.
 
-    feature_cols = [
-        "sentiment", "news_count", "general_sentiment",
-        "MA25", "MA50", "MACD", "MACD_signal",
-        "BB_upper", "BB_lower", "RSI"
-    ]
+    `combine_news_and_prices` already stores the indicators in the combined table,
+    so they are only computed here for tables written before it did (with
+    `incremental=True` from the persisted indicator state). `feature_set` picks the
+    model inputs from FEATURE_SETS. The test split is the last 20% of rows by date.
+    """
+    df = read_table("data/features/combined.csv")
+    if not set(INDICATOR_COLUMNS).issubset(df.columns):
+        df = update_technical_indicators(df) if incremental else add_technical_indicators(df)
+    # Chronological across tickers, so the 80/20 split tests on the latest sessions of
+    # every ticker rather than holding out whole tickers that sort last
+    df = df.sort_values(by=["date", "ticker"], kind="stable", ignore_index=True)
 
-    # Save feature columns to file so training can load them
-    with open("models/feature_columns.json", "w") as f:
-        json.dump(feature_cols, f)
-    print(f"✅ Feature columns saved to 'models/feature_columns.json'")
+    feature_cols = FEATURE_SETS[feature_set]
 
     df = df.dropna(subset=feature_cols)
 
@@ -121,8 +716,20 @@ def run_scaling_pipeline():
     df_scaled = pd.concat([df_train_scaled, df_test_scaled], axis=0)
 
     os.makedirs("data/features", exist_ok=True)
-    df_train_scaled.to_csv("data/features/combined_scaled_train.csv", index=False)
-    df_test_scaled.to_csv("data/features/combined_scaled_test.csv", index=False)
-    df_scaled.to_csv("data/features/combined_scaled_all.csv", index=False)
+    write_table(df_train_scaled, "data/features/combined_scaled_train.csv")
+    write_table(df_test_scaled, "data/features/combined_scaled_test.csv")
+    write_table(df_scaled, "data/features/combined_scaled_all.csv")
+
+    # Float32 matrices training opens as memory maps; the manifest replaces models/feature_columns.json
+    os.makedirs(matrices_default_dir, exist_ok=True)
+    splits = {}
+    for split, frame in (("train", df_train_scaled), ("test", df_test_scaled)):
+        X_path = os.path.join(matrices_default_dir, f"X_{split}.npy")
+        y_path = os.path.join(matrices_default_dir, f"y_{split}.npy")
+        write_matrix(X_path, frame[feature_cols], FEATURE_DTYPE)
+        write_matrix(y_path, frame["target"], TARGET_DTYPE)
+        splits[split] = {"X": X_path, "y": y_path, "rows": len(frame)}
+    save_manifest(feature_cols, splits, scaler=scaler_default_path)
+    print(f"✅ Feature matrices saved to '{matrices_default_dir}', manifest to '{manifest_default_path}'")
 
     print("✅ Scaled train, test, and all data saved.")
@@ -0,0 +1,211 @@
+# src/metrics.py
+
+import contextlib
+import cProfile
+import csv
+import io
+import json
+import os
+import pstats
+import resource
+import threading
+import time
+from datetime import datetime
+
+# Off unless main0.py runs with --profile; every hook below is a no-op until then
+enabled = False
+profile_stage = None   # stage whose code is profiled (cProfile, or pyinstrument if chosen and installed)
+profiler_name = "cprofile"
+report_dir = "results"
+
+_counters = {}
+_stages = []
+_lock = threading.Lock()
+_running = {}  # stage name -> whether another stage ran alongside it
+
+
+def enable(stage_to_profile=None, profiler="cprofile", output_dir="results"):
+    global enabled, profile_stage, profiler_name, report_dir
+    enabled = True
+    profile_stage = stage_to_profile
+    profiler_name = profiler
+    report_dir = output_dir
+
+
+def reset():
+    """Clears counters and stage records (e.g. between benchmark runs)."""
+    with _lock:
+        _counters.clear()
+        _stages.clear()
+
+
+def stage_records() -> list:
+    with _lock:
+        return [dict(record) for record in _stages]
+
+
+def count(name: str, n: int = 1):
+    """
+    Adds `n` to a run-wide counter (rows read/written, HTTP calls, retries, cache hits...).
+
+    Stages report the counters' change over their run; stages running concurrently
+    (e.g. the two fetches) see each other's increments, so such counters are named
+    after their source where it matters.
+    """
+    if not enabled:
+        return
+    with _lock:
+        _counters[name] = _counters.get(name, 0) + n
+
+
+def _counter_snapshot() -> dict:
+    with _lock:
+        return dict(_counters)
+
+
+def _reset_peak_rss() -> bool:
+    """Resets the kernel's peak-RSS mark (VmHWM) so it covers one stage; Linux only."""
+    try:
+        with open("/proc/self/clear_refs", "w") as f:
+            f.write("5")
+        return True
+    except OSError:
+        return False
+
+
+def _peak_rss_mb(reset_worked: bool) -> float:
+    if reset_worked:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) / 1024
+    # Fallback: peak of the whole process so far (KB on Linux, bytes on macOS)
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024 if os.uname().sysname == "Darwin" else 1024)
+
+
+def _cpu_seconds() -> float:
+    """CPU time of this process (all threads) plus finished child processes (pools)."""
+    children = resource.getrusage(resource.RUSAGE_CHILDREN)
+    return time.process_time() + children.ru_utime + children.ru_stime
+
+
+@contextlib.contextmanager
+def _profiler(name):
+    if not enabled or name != profile_stage:
+        yield
+        return
+    os.makedirs(report_dir, exist_ok=True)
+    stamp = datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
+    if profiler_name == "pyinstrument":
+        try:
+            from pyinstrument import Profiler
+        except ImportError:
+            print("⚠️ pyinstrument is not installed; falling back to cProfile.")
+        else:
+            profiler = Profiler()
+            profiler.start()
+            try:
+                yield
+            finally:
+                profiler.stop()
+                path = os.path.join(report_dir, f"profile_{name}_{stamp}.html")
+                with open(path, "w") as f:
+                    f.write(profiler.output_html())
+                print(f"📁 pyinstrument profile of '{name}' saved to '{path}'")
+            return
+
+    profiler = cProfile.Profile()
+    profiler.enable()
+    try:
+        yield
+    finally:
+        profiler.disable()
+        path = os.path.join(report_dir, f"profile_{name}_{stamp}.prof")
+        profiler.dump_stats(path)
+        summary = io.StringIO()
+        pstats.Stats(profiler, stream=summary).sort_stats("cumulative").print_stats(30)
+        with open(path[:-len(".prof")] + ".txt", "w") as f:
+            f.write(summary.getvalue())
+        print(f"📁 cProfile of '{name}' saved to '{path}' (top functions in the .txt next to it)")
+
+
+@contextlib.contextmanager
+def stage(name: str):
+    """
+    Measures one pipeline stage: wall time, CPU time, peak RSS and the change of
+    every counter while it ran. Does nothing unless profiling is enabled.
+
+    Peak RSS is per stage only for stages that ran alone; for stages that overlapped
+    (the concurrent fetches of --mode all) it is the process peak, marked
+    peak_rss_scope='process'. CPU time is process-wide for the same reason.
+    """
+    if not enabled:
+        yield
+        return
+    before = _counter_snapshot()
+    with _lock:
+        # VmHWM is process-wide: reset it only when no other stage is measuring it
+        alone = not _running
+        for other in _running:
+            _running[other] = True
+        _running[name] = not alone
+    reset_worked = _reset_peak_rss() if alone else False
+    cpu_start = _cpu_seconds()
+    wall_start = time.perf_counter()
+    status = "ok"
+    try:
+        with _profiler(name):
+            yield
+    except BaseException:
+        status = "failed"
+        raise
+    finally:
+        after = _counter_snapshot()
+        with _lock:
+            overlapped = _running.pop(name)
+        record = {
+            "stage": name,
+            "status": status,
+            "wall_s": round(time.perf_counter() - wall_start, 3),
+            "cpu_s": round(_cpu_seconds() - cpu_start, 3),
+            "peak_rss_mb": round(_peak_rss_mb(reset_worked), 1),
+            # 'process' when other stages ran concurrently (or the mark can't be reset): their memory is included
+            "peak_rss_scope": "process" if overlapped or not reset_worked else "stage",
+            **{key: value - before.get(key, 0) for key, value in sorted(after.items())
+               if value - before.get(key, 0)},
+        }
+        with _lock:
+            _stages.append(record)
+
+
+def write_report(run_name: str = "run") -> dict:
+    """
+    Writes the stage records of this run to results/profile_<run>_<timestamp>.json
+    and .csv (one row per stage) and prints a summary table.
+    """
+    if not enabled or not _stages:
+        return {}
+    os.makedirs(report_dir, exist_ok=True)
+    stamp = datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
+    base = os.path.join(report_dir, f"profile_{run_name}_{stamp}")
+    report = {"run": run_name, "created": stamp, "stages": _stages, "totals": _counter_snapshot()}
+
+    with open(base + ".json", "w") as f:
+        json.dump(report, f, indent=2)
+
+    columns = list(dict.fromkeys(key for record in _stages for key in record))
+    with open(base + ".csv", "w", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=columns)
+        writer.writeheader()
+        writer.writerows(_stages)
+
+    print("\n📈 Stage metrics:")
+    for record in _stages:
+        extra = ", ".join(f"{k}={v}" for k, v in record.items()
+                          if k not in ("stage", "status", "wall_s", "cpu_s", "peak_rss_mb", "peak_rss_scope"))
+        scope = " (process)" if record["peak_rss_scope"] == "process" else ""
+        print(f"  {record['stage']:<14} {record['status']:<6} wall {record['wall_s']:>8.2f}s  "
+              f"cpu {record['cpu_s']:>8.2f}s  peak RSS {record['peak_rss_mb']:>8.1f} MB{scope}  {extra}")
+    print(f"📁 Run report saved to '{base}.json' and '{base}.csv'")
+    return report
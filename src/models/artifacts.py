@@ -0,0 +1,35 @@
+# src/models/artifacts.py
+
+import os
+import pickle
+import joblib
+
+# Below this size mapping the many small arrays (e.g. one set per tree) costs more than reading them
+MMAP_MIN_BYTES = 16 * 1024 * 1024
+
+
+def save_artifact(obj, path: str):
+    """
+    Saves a model/scaler with joblib, uncompressed and with the highest pickle protocol.
+
+    Uncompressed files keep the numpy arrays inside the object (e.g. tree node
+    arrays) as raw buffers that `load_artifact` can memory-map instead of copying.
+    """
+    if os.path.dirname(path):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+    joblib.dump(obj, path, compress=0, protocol=pickle.HIGHEST_PROTOCOL)
+
+
+def load_artifact(path: str, mmap: bool = None):
+    """
+    Loads an artifact written by `save_artifact`.
+
+    With `mmap=True` its arrays are mapped read-only from the file, so large models
+    load without copying and their pages are shared between processes serving the
+    same file. The default maps only files of at least `MMAP_MIN_BYTES`.
+    """
+    if not os.path.exists(path):
+        raise FileNotFoundError(f"Artifact '{path}' not found.")
+    if mmap is None:
+        mmap = os.path.getsize(path) >= MMAP_MIN_BYTES
+    return joblib.load(path, mmap_mode="r" if mmap else None)
@@ -0,0 +1,186 @@
+# src/models/backtest.py
+
+import os
+import shutil
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import datetime
+import numpy as np
+import pandas as pd
+from sklearn.metrics import accuracy_score, f1_score
+from sklearn.preprocessing import StandardScaler
+from threadpoolctl import threadpool_limits
+from src.data.storage import read_table
+from src.features.matrices import FEATURE_DTYPE, TARGET_DTYPE, matrices_default_dir, write_matrix
+from src.features.technical_indicators import FEATURE_COLUMNS
+from src.models.train_all import THREADED_MODELS, core_split
+from src.models.train_model import MODEL_CLASSES, make_model
+
+backtest_matrices_dir = os.path.join(matrices_default_dir, "backtest")
+
+# Per-worker state: the memory-mapped backtest arrays, opened once by `_init_worker`
+_worker_data = {}
+
+
+def make_folds(days: np.ndarray, n_folds: int = 10, min_train_fraction: float = 0.5, embargo: int = 1) -> list:
+    """
+    Expanding-window walk-forward folds over rows sorted by trading day.
+
+    The sessions after the first `min_train_fraction` of history are cut into
+    `n_folds` consecutive test blocks. Each fold trains on every ticker's rows before
+    its test block, minus the last `embargo` sessions: a row's target is the next
+    session's close, so the last training label would otherwise peek into the test
+    block. Because rows are sorted by day, every split is a contiguous row range.
+
+    Args:
+        days (np.ndarray): Sorted int64 day key of every row.
+
+    Returns:
+        list: Dicts with 'fold', 'train_end', 'test_start', 'test_end' (row offsets)
+            and the test block's first/last day keys.
+    """
+    sessions = np.unique(days)
+    bounds = np.linspace(int(len(sessions) * min_train_fraction), len(sessions), n_folds + 1).astype(int)
+    folds = []
+    for k in range(n_folds):
+        test_lo, test_hi = bounds[k], bounds[k + 1]
+        if test_hi <= test_lo or test_lo - embargo <= 0:
+            continue
+        folds.append({
+            "fold": k,
+            "train_end": int(np.searchsorted(days, sessions[test_lo - embargo], side="left")),
+            "test_start": int(np.searchsorted(days, sessions[test_lo], side="left")),
+            "test_end": int(np.searchsorted(days, sessions[test_hi - 1], side="right")),
+            "test_from": int(sessions[test_lo]),
+            "test_to": int(sessions[test_hi - 1]),
+        })
+    return folds
+
+
+def _init_worker(data_dir):
+    _worker_data["X"] = np.load(os.path.join(data_dir, "X.npy"), mmap_mode="r")
+    _worker_data["y"] = np.load(os.path.join(data_dir, "y.npy"), mmap_mode="r")
+    _worker_data["ticker"] = np.load(os.path.join(data_dir, "ticker.npy"), mmap_mode="r")
+
+
+def _run_fold(fold, model_names, threads):
+    """Fits one scaler on the fold's training rows and reuses it for every model."""
+    X, y, tickers = _worker_data["X"], _worker_data["y"], _worker_data["ticker"]
+    X_train, y_train = X[:fold["train_end"]], y[:fold["train_end"]]
+    test = slice(fold["test_start"], fold["test_end"])
+    y_test, test_tickers = y[test], tickers[test]
+    n_tickers = int(tickers.max()) + 1 if len(tickers) else 0
+
+    rows = []
+    with threadpool_limits(limits=threads):
+        scaler = StandardScaler().fit(X_train)
+        X_train_scaled = scaler.transform(X_train)
+        X_test_scaled = scaler.transform(X[test])
+
+        for name in model_names:
+            base = {"fold": fold["fold"], "model": name, "train_rows": len(y_train),
+                    "test_from": fold["test_from"], "test_to": fold["test_to"]}
+            try:
+                model = make_model(name, **({"n_jobs": threads} if name in THREADED_MODELS else {}))
+                start = time.perf_counter()
+                model.fit(X_train_scaled, y_train)
+                fit_seconds = time.perf_counter() - start
+                y_pred = model.predict(X_test_scaled)
+            except Exception as e:
+                rows.append({**base, "ticker": -1, "error": str(e)})
+                continue
+
+            rows.append({**base, "ticker": -1, "test_rows": len(y_test), "fit_seconds": round(fit_seconds, 3),
+                         "accuracy": accuracy_score(y_test, y_pred),
+                         "f1": f1_score(y_test, y_pred, zero_division=0)})
+            # Per-ticker accuracy from two bincounts instead of a groupby
+            counts = np.bincount(test_tickers, minlength=n_tickers)
+            hits = np.bincount(test_tickers, weights=(y_pred == y_test), minlength=n_tickers)
+            for code in np.flatnonzero(counts):
+                rows.append({**base, "ticker": int(code), "test_rows": int(counts[code]),
+                             "accuracy": hits[code] / counts[code]})
+    return rows
+
+
+def run_backtest(model_names=None, n_folds=10, min_train_fraction=0.5, embargo=1, n_jobs=None,
+                 combined_file="data/features/combined.csv", feature_cols=FEATURE_COLUMNS):
+    """
+    Walk-forward backtest of several models on the (unscaled) combined feature table.
+
+    Folds run in parallel on a process pool within the `n_jobs` core budget. Each worker
+    maps the float32 feature matrix once. Every fold fits its own StandardScaler on its
+    training rows only, and all models of the fold share it.
+
+    Args:
+        model_names (list): Models to evaluate (default: all available).
+        n_folds (int): Number of consecutive test blocks.
+        min_train_fraction (float): Share of sessions only ever used for training.
+        embargo (int): Sessions dropped between training and test rows.
+        n_jobs (int): Total cores to use (default: all).
+        combined_file (str): Feature table written by `combine_news_and_prices`.
+        feature_cols (list): Model inputs.
+
+    Returns:
+        pd.DataFrame: One row per fold × model × ticker ('ALL' for the whole test block).
+    """
+    model_names = model_names or list(MODEL_CLASSES)
+    unknown = [name for name in model_names if name not in MODEL_CLASSES]
+    if unknown:
+        raise ValueError(f"Unknown models {unknown}. Choose from: {list(MODEL_CLASSES.keys())}")
+
+    df = read_table(combined_file, columns=["ticker", "date", "next_close", "target"] + feature_cols)
+    # The newest bar of each ticker has no next close, so its target is not a real label
+    df = df.dropna(subset=feature_cols + ["next_close"])
+    df["date"] = pd.to_datetime(df["date"])
+    df = df.sort_values(["date", "ticker"], kind="stable", ignore_index=True)
+    days = df["date"].to_numpy(dtype="datetime64[D]").astype(np.int64)
+    ticker_codes, ticker_names = pd.factorize(df["ticker"])
+
+    folds = make_folds(days, n_folds, min_train_fraction, embargo)
+    if not folds:
+        raise ValueError("Not enough history for the requested folds.")
+
+    os.makedirs(backtest_matrices_dir, exist_ok=True)
+    write_matrix(os.path.join(backtest_matrices_dir, "X.npy"), df[feature_cols], FEATURE_DTYPE)
+    write_matrix(os.path.join(backtest_matrices_dir, "y.npy"), df["target"], TARGET_DTYPE)
+    write_matrix(os.path.join(backtest_matrices_dir, "ticker.npy"), ticker_codes, np.int32)
+    del df
+
+    workers, threads = core_split(n_jobs, len(folds))
+    print(f"🚀 Backtesting {len(model_names)} models on {len(folds)} walk-forward folds "
+          f"({workers} processes x {threads} threads).")
+
+    rows = []
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                             initargs=(backtest_matrices_dir,)) as executor:
+        futures = {executor.submit(_run_fold, fold, model_names, threads): fold for fold in folds}
+        for future in as_completed(futures):
+            fold = futures[future]
+            try:
+                rows.extend(future.result())
+                print(f"✅ Fold {fold['fold']} done ({fold['train_end']} train / "
+                      f"{fold['test_end'] - fold['test_start']} test rows)")
+            except Exception as e:
+                print(f"❌ Fold {fold['fold']} failed: {e}")
+    shutil.rmtree(backtest_matrices_dir, ignore_errors=True)
+
+    results = pd.DataFrame(rows)
+    if results.empty:
+        raise RuntimeError("No fold could be evaluated.")
+    results["ticker"] = np.where(results["ticker"] < 0, "ALL",
+                                 np.asarray(ticker_names, dtype=object)[results["ticker"].clip(lower=0)])
+    for col in ("test_from", "test_to"):
+        results[col] = results[col].to_numpy().astype("datetime64[D]")
+    results = results.sort_values(["fold", "model", "ticker"], ignore_index=True)
+
+    now = datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
+    results_path = f"results/backtest_{now}.csv"
+    os.makedirs("results", exist_ok=True)
+    results.to_csv(results_path, index=False)
+
+    overall = results[results["ticker"] == "ALL"].dropna(subset=["accuracy"])
+    summary = overall.groupby("model")["accuracy"].agg(["mean", "std", "min", "max", "count"])
+    print("\n📊 Walk-forward accuracy by model:")
+    print(summary.sort_values("mean", ascending=False).to_string())
+    print(f"📁 Backtest results saved to '{results_path}'")
+    return results
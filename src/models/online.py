@@ -0,0 +1,216 @@
+# src/models/online.py
+
+import json
+import os
+import shutil
+import time
+from datetime import datetime
+import numpy as np
+import pandas as pd
+from src.data.storage import read_table
+from src.features.matrices import FEATURE_DTYPE
+from src.features.technical_indicators import FEATURE_SETS
+from src.models.artifacts import load_artifact, save_artifact
+from src.models.train_model import make_model
+
+online_models_dir = "models/online"
+
+# How each incrementally trainable model learns from a batch of new rows
+ONLINE_UPDATES = {
+    "sgd": "partial_fit",              # one SGD pass over the new rows
+    "gradient_boosting": "warm_start",  # TREES_PER_UPDATE more trees, fitted to the new rows
+    "xgboost": "continue",             # TREES_PER_UPDATE more boosting rounds on the new rows
+}
+TREES_PER_UPDATE = 10
+
+# SGD passes over the history when a lineage starts (later updates make one pass)
+INITIAL_EPOCHS = 5
+KEEP_VERSIONS = 5
+CLASSES = np.array([0, 1])
+
+
+def _model_dir(model_name):
+    return os.path.join(online_models_dir, model_name)
+
+
+def load_current(model_name):
+    """
+    Metadata of the current version of an online model (with its 'path'), or None.
+
+    models/online/<model>/current.json points at the newest complete version
+    directory; it is replaced only after that directory is fully written.
+    """
+    pointer = os.path.join(_model_dir(model_name), "current.json")
+    if not os.path.exists(pointer):
+        return None
+    with open(pointer, "r") as f:
+        path = json.load(f)["path"]
+    with open(os.path.join(path, "meta.json"), "r") as f:
+        return {**json.load(f), "path": path}
+
+
+def load_online_model(model_name):
+    """(model, scaler, meta) of the current version of an online model."""
+    meta = load_current(model_name)
+    if meta is None:
+        raise FileNotFoundError(f"No online version of '{model_name}' found. Run train_online mode first.")
+    return load_artifact(os.path.join(meta["path"], "model.pkl")), load_artifact(os.path.join(meta["path"], "scaler.pkl")), meta
+
+
+def _save_version(model_name, model, scaler, meta, keep_versions):
+    model_dir = _model_dir(model_name)
+    path = os.path.join(model_dir, f"v{meta['version']:04d}")
+    os.makedirs(path, exist_ok=True)
+    save_artifact(model, os.path.join(path, "model.pkl"))
+    save_artifact(scaler, os.path.join(path, "scaler.pkl"))
+    with open(os.path.join(path, "meta.json"), "w") as f:
+        json.dump(meta, f, indent=2)
+
+    pointer = os.path.join(model_dir, "current.json")
+    with open(pointer + ".tmp", "w") as f:
+        json.dump({"version": meta["version"], "path": path}, f)
+    os.replace(pointer + ".tmp", pointer)
+
+    versions = sorted(d for d in os.listdir(model_dir) if d.startswith("v") and d[1:].isdigit())
+    for old in versions[:-keep_versions]:
+        shutil.rmtree(os.path.join(model_dir, old), ignore_errors=True)
+    return path
+
+
+def _update(model_name, model, X, y, first):
+    update = ONLINE_UPDATES[model_name]
+    if update == "partial_fit":
+        for _ in range(INITIAL_EPOCHS if first else 1):
+            model.partial_fit(X, y, classes=CLASSES)
+    elif update == "warm_start":
+        if not first:
+            model.set_params(warm_start=True, n_estimators=model.n_estimators + TREES_PER_UPDATE)
+        model.fit(X, y)
+    else:
+        if first:
+            model.fit(X, y)
+        else:
+            model.set_params(n_estimators=TREES_PER_UPDATE)
+            model.fit(X, y, xgb_model=model.get_booster())
+    return model
+
+
+def train_online(model_name="sgd", feature_set="base", combined_file="data/features/combined.csv",
+                 full_refresh=False, keep_versions=KEEP_VERSIONS):
+    """
+    Incremental training for the nightly job: learns only from the rows dated after
+    the last row of the same ticker the current version has learnt (its
+    `ticker_cursors`), so a ticker whose bars arrive late is not skipped.
+
+    The scaler is updated with `partial_fit` on the new rows and the model is updated
+    with them (see ONLINE_UPDATES); the first run, or `full_refresh`, starts a new
+    lineage from the whole history. Before learning, the previous version is scored
+    on the new rows (a prequential test: every row is predicted before it is seen).
+    Each update is saved as a new version under models/online/<model>/ and the
+    oldest versions beyond `keep_versions` are removed.
+
+    Args:
+        model_name (str): One of ONLINE_UPDATES.
+        feature_set (str): Model inputs from FEATURE_SETS.
+        combined_file (str): Logical path of the combined feature table.
+        full_refresh (bool): Ignore the current version and retrain on all rows.
+        keep_versions (int): Number of versions kept on disk.
+
+    Returns:
+        dict: Metadata of the current version afterwards (None if there is none).
+    """
+    from sklearn.metrics import accuracy_score
+    from sklearn.preprocessing import StandardScaler
+
+    if model_name not in ONLINE_UPDATES:
+        raise ValueError(f"Model '{model_name}' can't be trained incrementally. Choose from: {list(ONLINE_UPDATES)}")
+    feature_cols = FEATURE_SETS[feature_set]
+
+    current = None if full_refresh else load_current(model_name)
+    if current is not None and current["feature_columns"] != feature_cols:
+        print(f"⚠️ Feature set changed since version {current['version']}; starting a new lineage.")
+        current = None
+
+    start = time.perf_counter()
+    cursors = _ticker_cursors(current, combined_file)
+    df = _untrained_rows(combined_file, ["ticker", "date", "next_close", "target"] + feature_cols, cursors)
+    # The latest bar of each ticker has no target yet; it is picked up by the next run
+    df = df.dropna(subset=feature_cols + ["next_close"]).sort_values(["date", "ticker"], kind="stable")
+    if df.empty:
+        print(f"⏩ No new rows for '{model_name}' since {current['trained_through'] if current else 'ever'}.")
+        return current
+
+    X = df[feature_cols].to_numpy(dtype=np.float64)
+    y = df["target"].to_numpy(dtype=np.int8)
+
+    prequential_accuracy = None
+    if current is not None:
+        model, scaler, _ = load_online_model(model_name)
+        prequential_accuracy = accuracy_score(y, model.predict(scaler.transform(X).astype(FEATURE_DTYPE)))
+    else:
+        model, scaler = make_model(model_name), StandardScaler()
+
+    # Earlier rows stay scaled as they were when learnt; the running statistics only drift slowly
+    scaler.partial_fit(X)
+    _update(model_name, model, scaler.transform(X).astype(FEATURE_DTYPE), y, first=current is None)
+
+    # Rows of late tickers may be older than the previous version's last row
+    trained_through = df["date"].max()
+    if current is not None:
+        trained_through = max(trained_through, pd.Timestamp(current["trained_through"]))
+    meta = {
+        "model": model_name,
+        "version": (current["version"] if current else _latest_version(model_name)) + 1,
+        "parent_version": current["version"] if current else None,
+        "created": datetime.now().isoformat(timespec="seconds"),
+        "feature_columns": feature_cols,
+        "trained_through": str(trained_through.date()),
+        "ticker_cursors": {
+            **cursors,
+            **{ticker: str(date.date()) for ticker, date in df.groupby(df["ticker"].astype(str))["date"].max().items()},
+        },
+        "new_rows": len(df),
+        "rows_seen": (current["rows_seen"] if current else 0) + len(df),
+        "prequential_accuracy": prequential_accuracy,
+        "update_seconds": round(time.perf_counter() - start, 3),
+    }
+    path = _save_version(model_name, model, scaler, meta, keep_versions)
+
+    print(f"✅ '{model_name}' v{meta['version']} learnt {meta['new_rows']} new rows "
+          f"(through {meta['trained_through']}, {meta['rows_seen']} in total) in {meta['update_seconds']:.2f}s → '{path}'")
+    if prequential_accuracy is not None:
+        print(f"📊 Accuracy of v{current['version']} on the new rows before the update: {prequential_accuracy:.4f}")
+    return {**meta, "path": path}
+
+
+def _ticker_cursors(current, combined_file) -> dict:
+    """Per-ticker date of the last learnt row ({} for a new lineage)."""
+    if current is None:
+        return {}
+    if "ticker_cursors" not in current:
+        # Versions saved before per-ticker cursors: their single cursor applied to every ticker
+        tickers = read_table(combined_file, columns=["ticker"])["ticker"].astype(str).unique()
+        return {ticker: current["trained_through"] for ticker in tickers}
+    return dict(current["ticker_cursors"])
+
+
+def _untrained_rows(combined_file, columns, cursors) -> pd.DataFrame:
+    """Rows of the combined table dated after their ticker's cursor (every row of tickers without one)."""
+    if not cursors:
+        return read_table(combined_file, columns=columns, parse_dates=["date"])
+    since = pd.Timestamp(min(cursors.values()))
+    recent = read_table(combined_file, columns=columns, parse_dates=["date"], filters=[("date", ">", since)])
+    unseen = read_table(combined_file, columns=columns, parse_dates=["date"],
+                        filters=[("ticker", "not in", list(cursors)), ("date", "<=", since)])
+    df = pd.concat([recent, unseen], ignore_index=True)
+    cursor = pd.to_datetime(df["ticker"].astype(str).map(cursors))
+    return df[cursor.isna() | (df["date"] > cursor)]
+
+
+def _latest_version(model_name):
+    """Highest version number on disk, so a new lineage never overwrites an old version."""
+    model_dir = _model_dir(model_name)
+    if not os.path.isdir(model_dir):
+        return 0
+    versions = [int(d[1:]) for d in os.listdir(model_dir) if d.startswith("v") and d[1:].isdigit()]
+    return max(versions, default=0)
@@ -0,0 +1,289 @@
+# src/models/predict.py
+
+import json
+import threading
+import time
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import numpy as np
+import pandas as pd
+from src.data.storage import read_table, table_exists
+from src.models.artifacts import load_artifact
+from src.features.matrices import FEATURE_DTYPE, load_manifest, manifest_default_path
+from src.features.technical_indicators import (
+    INDICATOR_COLUMNS, extend_indicator_states, indicator_state_default_path, load_indicator_state, price_inputs,
+    save_indicator_state, sort_order, update_technical_indicators,
+)
+
+# News features default to "no news", as in combine_news_and_prices
+NEWS_COLUMNS = ["sentiment", "news_count", "general_sentiment"]
+
+
+class Predictor:
+    """
+    Keeps a trained model, its scaler, the feature columns and the per-ticker indicator
+    state in memory and scores batches of new bars.
+
+    Indicators for a bar newer than a ticker's state are computed from the buffered
+    tail and EMA accumulators (O(new bars)); bars the state already covers are served
+    from its stored values. Before scoring, a state that is behind the requested dates
+    is first advanced over the bars stored in the price table since then. All rows of a request go through the scaler and the model
+    in one vectorized call. Latencies of recent calls are kept for p50/p99 reporting.
+    """
+
+    def __init__(self, model_name="random_forest", manifest_path=manifest_default_path,
+                 state_path=indicator_state_default_path, price_file="data/prices/stock_prices.csv", online=False):
+        self.model_name = model_name
+        if online:
+            # Current train_online version: its own scaler and feature columns
+            from src.models.online import load_online_model
+            self.model, self.scaler, meta = load_online_model(model_name)
+            self.feature_cols = meta["feature_columns"]
+        else:
+            manifest = load_manifest(manifest_path)
+            self.feature_cols = manifest["feature_columns"]
+            self.scaler = load_artifact(manifest["scaler"])
+            self.model = load_artifact(f"models/stock_model_{model_name}.pkl")
+        if "n_jobs" in self.model.get_params():
+            # Requests are small batches: dispatching them to a worker pool costs more than it saves
+            self.model.set_params(n_jobs=1)
+
+        state = load_indicator_state(state_path)
+        if not state["tickers"] and table_exists(price_file):
+            # No incremental run has persisted the indicator state yet; build it once from local prices
+            update_technical_indicators(read_table(price_file), state_path)
+            state = load_indicator_state(state_path)
+        self.state_path = state_path
+        self.price_file = price_file
+        self.ticker_states = state["tickers"]
+        self.values = state["values"]
+        # Last date of each ticker in the persisted state; streamed bars (advance=True) are never saved
+        self.persisted = {ticker: ts["last_date"] for ticker, ts in self.ticker_states.items()}
+        self.latencies = deque(maxlen=10_000)
+        self.lock = threading.Lock()
+
+    def _catch_up(self, tickers, dates, starts, lengths):
+        """
+        Advances the states of the requested tickers over the bars stored in the price
+        table after their last processed date (up to each ticker's latest requested
+        date) and saves them, so new bars never skip stored history.
+        """
+        behind = {}
+        for s, length in zip(starts, lengths):
+            ts = self.ticker_states.get(tickers[s])
+            if ts is not None and dates[s + length - 1] > ts["last_date"]:
+                behind[tickers[s]] = dates[s + length - 1]
+        if not behind:
+            return
+        if not table_exists(self.price_file):
+            raise ValueError(f"Indicator state is behind the requested bars and '{self.price_file}' "
+                             f"is missing to advance it; refusing to predict.")
+
+        since = min(self.ticker_states[t]["last_date"] for t in behind)
+        stored = read_table(self.price_file, filters=[
+            ("ticker", "in", list(behind)),
+            ("Date", ">", pd.Timestamp(since)),
+            ("Date", "<=", pd.Timestamp(max(behind.values()))),
+        ])
+        if stored.empty:
+            return
+        stored_dates = pd.to_datetime(stored["Date"]).to_numpy("datetime64[ns]")
+        stored_tickers = stored["ticker"].astype(str).to_numpy()
+        last_dates = np.array([self.ticker_states[t]["last_date"] for t in stored_tickers], dtype="datetime64[ns]")
+        until = np.array([behind[t] for t in stored_tickers], dtype="datetime64[ns]")
+        stored = stored[(stored_dates > last_dates) & (stored_dates <= until)]
+        if stored.empty:
+            return
+
+        order, starts, lengths = sort_order(stored)
+        if order is None:
+            order = np.arange(len(stored))
+        new_tickers = stored["ticker"].astype(str).to_numpy()[order]
+        new_dates = pd.to_datetime(stored["Date"]).to_numpy("datetime64[ns]")[order]
+        states = [self.ticker_states[new_tickers[s]] for s in starts]
+        computed, extended = extend_indicator_states(states, price_inputs(stored, order), lengths)
+
+        values = pd.DataFrame(computed, index=pd.MultiIndex.from_arrays([new_tickers, new_dates], names=["ticker", "Date"]))
+        self.values = pd.concat([self.values, values[INDICATOR_COLUMNS]])
+        persisted = load_indicator_state(self.state_path)
+        saved = []
+        for s, length, ts in zip(starts, lengths, extended):
+            ticker = new_tickers[s]
+            ts = {**ts, "last_date": new_dates[s + length - 1]}
+            if ticker in persisted["tickers"] and persisted["tickers"][ticker]["last_date"] == self.persisted.get(ticker):
+                persisted["tickers"][ticker] = ts
+                self.persisted[ticker] = ts["last_date"]
+                saved.append(ticker)
+            self.ticker_states[ticker] = ts
+        if saved:
+            keep = values.index.get_level_values("ticker").isin(saved)
+            persisted["values"] = pd.concat([persisted["values"], values.loc[keep, INDICATOR_COLUMNS]])
+            save_indicator_state(persisted, self.state_path)
+
+    def _indicators(self, tickers, dates, prices, starts, lengths, advance):
+        """Indicator values for bars sorted by (ticker, date); NaN for unknown tickers."""
+        out = {col: np.full(len(dates), np.nan) for col in INDICATOR_COLUMNS}
+
+        keys = pd.MultiIndex.from_arrays([tickers, dates], names=["ticker", "Date"])
+        found = keys.isin(self.values.index)
+        if found.any():
+            cached = self.values.reindex(keys[found])
+            for col in INDICATOR_COLUMNS:
+                out[col][found] = cached[col].to_numpy(dtype=np.float64)
+
+        states, blocks, first_new = [], [], []
+        for s, length in zip(starts, lengths):
+            ts = self.ticker_states.get(tickers[s])
+            if ts is None:
+                continue
+            new = dates[s:s + length] > ts["last_date"]
+            if new.any():
+                states.append(ts)
+                blocks.append((s, length))
+                first_new.append(s + int(np.argmax(new)))
+        if not states:
+            return out
+
+        first_new = np.asarray(first_new)
+        new_counts = np.array([s + length for s, length in blocks]) - first_new
+        rows = np.concatenate([np.arange(f, f + c) for f, c in zip(first_new, new_counts)])
+        computed, extended = extend_indicator_states(states, {col: v[rows] for col, v in prices.items()}, new_counts)
+        for col in INDICATOR_COLUMNS:
+            out[col][rows] = computed[col]
+        if advance:
+            # Streaming mode: the next request continues from these bars
+            for (s, length), ts in zip(blocks, extended):
+                self.ticker_states[tickers[s]] = {**ts, "last_date": dates[s + length - 1]}
+        return out
+
+    def predict(self, bars: pd.DataFrame, advance: bool = False) -> pd.DataFrame:
+        """
+        Scores a batch of bars.
+
+        Args:
+            bars (pd.DataFrame): ticker, Date and Close per bar, plus High, Low and Volume
+                for the indicators that use them, optionally the news features (missing
+                ones count as no news). Several bars per ticker are
+                allowed; each ticker's bars must follow its indicator state.
+            advance (bool): Keep the new bars in the in-memory state so the next call
+                continues after them (the persisted state file is left untouched).
+
+        Returns:
+            pd.DataFrame: ticker, Date and 'probability' of the close rising next session
+                (NaN where indicators are not available yet).
+        """
+        start = time.perf_counter()
+        with self.lock:
+            order, starts, lengths = sort_order(bars)
+            if order is None:
+                order = np.arange(len(bars))
+            tickers = bars["ticker"].astype(str).to_numpy()[order]
+            dates = pd.to_datetime(bars["Date"]).to_numpy("datetime64[ns]")[order]
+            prices = price_inputs(bars, order)
+            self._catch_up(tickers, dates, starts, lengths)
+            indicators = self._indicators(tickers, dates, prices, starts, lengths, advance)
+
+        features = {
+            col: (pd.to_numeric(bars[col], errors="coerce").fillna(0).to_numpy(dtype=np.float64)[order]
+                  if col in bars.columns else np.zeros(len(order)))
+            for col in NEWS_COLUMNS
+        }
+        features.update(indicators)
+        X = np.column_stack([features[col] for col in self.feature_cols])
+        valid = ~np.isnan(X).any(axis=1)
+
+        probability = np.full(len(X), np.nan)
+        if valid.any():
+            X_scaled = self.scaler.transform(X[valid]).astype(FEATURE_DTYPE)
+            probability[valid] = self.model.predict_proba(X_scaled)[:, 1]
+
+        self.latencies.append(time.perf_counter() - start)
+        return pd.DataFrame({"ticker": tickers, "Date": dates, "probability": probability})
+
+    def latency_stats(self) -> dict:
+        if not self.latencies:
+            return {"calls": 0}
+        ms = np.asarray(self.latencies) * 1000
+        return {"calls": len(ms), "p50_ms": float(np.percentile(ms, 50)), "p99_ms": float(np.percentile(ms, 99))}
+
+
+def latest_bars(tickers=None, combined_file="data/features/combined.csv") -> pd.DataFrame:
+    """The most recent bar (with its news features) of each ticker from the local feature table."""
+    filters = [("ticker", "in", list(tickers))] if tickers else None
+    df = read_table(combined_file, filters=filters)
+    df = df[[c for c in ["ticker", "Date", "High", "Low", "Close", "Volume"] + NEWS_COLUMNS if c in df.columns]]
+    df = df.sort_values(["ticker", "Date"], kind="stable")
+    return df.groupby("ticker", sort=False).tail(1).reset_index(drop=True)
+
+
+def predict_latest(model_name="random_forest", tickers=None, bars_file=None, online=False):
+    """
+    `predict` mode: scores the bars in `bars_file` (CSV/JSON with ticker, Date, Close and
+    optionally High, Low, Volume),
+    or the latest local bar of each ticker, and prints the probabilities and latency.
+    """
+    predictor = Predictor(model_name, online=online)
+    if bars_file:
+        bars = pd.read_json(bars_file) if bars_file.endswith(".json") else pd.read_csv(bars_file)
+    else:
+        bars = latest_bars(tickers)
+    result = predictor.predict(bars)
+    print(result.to_string(index=False))
+    stats = predictor.latency_stats()
+    print(f"⏱️ Prediction latency: p50 {stats['p50_ms']:.2f} ms, p99 {stats['p99_ms']:.2f} ms")
+    return result
+
+
+def serve(model_name="random_forest", host="127.0.0.1", port=8765, online=False):
+    """
+    Long-lived local prediction server.
+
+    POST /predict with {"bars": [{"ticker": ..., "Date": ..., "Close": ...}, ...],
+    "advance": false} returns {"predictions": [...], "latency_ms": ...};
+    GET /stats returns the p50/p99 latency of recent calls.
+    """
+    predictor = Predictor(model_name, online=online)
+
+    class Handler(BaseHTTPRequestHandler):
+        def _reply(self, status, payload):
+            body = json.dumps(payload).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_GET(self):
+            if self.path == "/stats":
+                self._reply(200, predictor.latency_stats())
+            else:
+                self._reply(404, {"error": "not found"})
+
+        def do_POST(self):
+            if self.path != "/predict":
+                self._reply(404, {"error": "not found"})
+                return
+            try:
+                request = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))))
+                start = time.perf_counter()
+                result = predictor.predict(pd.DataFrame(request["bars"]), advance=request.get("advance", False))
+                latency_ms = (time.perf_counter() - start) * 1000
+            except Exception as e:
+                self._reply(400, {"error": str(e)})
+                return
+            result["Date"] = result["Date"].dt.strftime("%Y-%m-%d")
+            result["probability"] = result["probability"].astype(object).where(result["probability"].notna(), None)
+            self._reply(200, {"predictions": result.to_dict(orient="records"), "latency_ms": latency_ms})
+
+        def log_message(self, format, *args):
+            pass  # one line per request would dominate the output
+
+    server = ThreadingHTTPServer((host, port), Handler)
+    print(f"🟢 Serving '{model_name}' predictions on http://{host}:{port}/predict (Ctrl+C to stop)")
+    try:
+        server.serve_forever()
+    finally:
+        server.server_close()
+        stats = predictor.latency_stats()
+        if stats["calls"]:
+            print(f"⏱️ {stats['calls']} calls: p50 {stats['p50_ms']:.2f} ms, p99 {stats['p99_ms']:.2f} ms")
@@ -0,0 +1,160 @@
+# src/models/train_all.py
+
+import json
+import os
+import shutil
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import datetime
+import pandas as pd
+from sklearn.metrics import accuracy_score, f1_score, roc_auc_score
+from sklearn.model_selection import ParameterGrid
+from threadpoolctl import threadpool_limits
+from src.features.matrices import load_manifest, load_split, manifest_default_path
+from src.models.artifacts import save_artifact
+from src.models.train_model import MODEL_CLASSES, make_model
+
+# Used when no --grid_file is given; each value is a scikit-learn style parameter grid
+DEFAULT_PARAM_GRIDS = {
+    "random_forest": {"n_estimators": [100, 300], "max_depth": [None, 10]},
+    "logistic_regression": {"C": [0.1, 1.0, 10.0]},
+    "gradient_boosting": {"n_estimators": [100], "learning_rate": [0.05, 0.1], "max_depth": [3]},
+    "xgboost": {"n_estimators": [200], "max_depth": [3, 6], "learning_rate": [0.1]},
+    "sgd": {"alpha": [1e-5, 1e-4, 1e-3]},
+}
+
+# Estimators that can use more than one core for a single fit
+THREADED_MODELS = {"random_forest", "xgboost"}
+
+candidates_dir = "models/candidates"
+
+# Per-worker state: the memory-mapped matrices, opened once by `_init_worker`
+_worker_data = {}
+
+
+def load_param_grids(grid_file=None, model_names=None) -> dict:
+    """
+    Reads {model name: parameter grid} from a JSON file (or the defaults) and keeps
+    the requested, installed models.
+    """
+    if grid_file:
+        with open(grid_file, "r") as f:
+            grids = json.load(f)
+    else:
+        grids = DEFAULT_PARAM_GRIDS
+    names = model_names or list(grids)
+    unknown = [name for name in names if name not in MODEL_CLASSES and name not in DEFAULT_PARAM_GRIDS]
+    if unknown:
+        raise ValueError(f"Unknown models {unknown}. Choose from: {list(MODEL_CLASSES.keys())}")
+    return {name: grids.get(name, {}) for name in names if name in MODEL_CLASSES}
+
+
+def core_split(n_jobs, n_tasks):
+    """Splits a core budget (default: all cores) into (processes, threads per process)."""
+    budget = n_jobs if n_jobs and n_jobs > 0 else os.cpu_count() or 1
+    workers = max(1, min(budget, n_tasks))
+    return workers, max(1, budget // workers)
+
+
+def _init_worker(manifest_path):
+    # Every worker maps the same .npy files, so the OS page cache holds one copy of the data
+    manifest = load_manifest(manifest_path)
+    _worker_data["train"] = load_split(manifest, "train")
+    _worker_data["test"] = load_split(manifest, "test")
+
+
+def _fit_candidate(task_id, model_name, params, threads):
+    X_train, y_train = _worker_data["train"]
+    X_test, y_test = _worker_data["test"]
+    fit_params = {**params, "n_jobs": threads} if model_name in THREADED_MODELS else params
+
+    with threadpool_limits(limits=threads):
+        model = make_model(model_name, **fit_params)
+        start = time.perf_counter()
+        model.fit(X_train, y_train)
+        fit_seconds = time.perf_counter() - start
+
+        result = {"task": task_id, "model": model_name, "params": json.dumps(params, sort_keys=True),
+                  "fit_seconds": round(fit_seconds, 3)}
+        if X_test is not None:
+            y_pred = model.predict(X_test)
+            result["accuracy"] = accuracy_score(y_test, y_pred)
+            result["f1"] = f1_score(y_test, y_pred, zero_division=0)
+            if hasattr(model, "predict_proba") and len(set(y_test)) > 1:
+                result["roc_auc"] = roc_auc_score(y_test, model.predict_proba(X_test)[:, 1])
+
+    result["path"] = os.path.join(candidates_dir, f"{model_name}_{task_id}.pkl")
+    save_artifact(model, result["path"])
+    return result
+
+
+def train_all_models(model_names=None, grid_file=None, n_jobs=None, manifest_path=manifest_default_path,
+                     metric="accuracy"):
+    """
+    Trains every parameter combination of several models concurrently and ranks them.
+
+    Candidates run on a process pool sized to the core budget. Each worker opens the
+    training matrices once as memory maps, and threaded estimators get an equal share
+    of the budget, so at most `n_jobs` cores are busy at any time. The best candidate of
+    each model is saved as `models/stock_model_<name>.pkl` (as `train_model` does).
+
+    Args:
+        model_names (list): Models to train (default: all in the grid).
+        grid_file (str): Optional JSON file {model name: parameter grid}.
+        n_jobs (int): Total cores to use (default: all).
+        manifest_path (str): Feature manifest written by the scaling stage.
+        metric (str): Leaderboard ranking column ('accuracy', 'f1' or 'roc_auc').
+
+    Returns:
+        pd.DataFrame: The leaderboard, best first.
+    """
+    manifest = load_manifest(manifest_path)
+    if manifest["splits"].get("test") is None:
+        raise FileNotFoundError("Test matrices not found; the leaderboard needs a test split. Run scale mode first.")
+
+    grids = load_param_grids(grid_file, model_names)
+    tasks = [(name, params) for name, grid in grids.items() for params in ParameterGrid(grid)]
+    workers, threads = core_split(n_jobs, len(tasks))
+    print(f"🚀 Training {len(tasks)} candidates of {len(grids)} models on {workers} processes "
+          f"x {threads} threads.")
+
+    os.makedirs(candidates_dir, exist_ok=True)
+    results = []
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(manifest_path,)) as executor:
+        futures = {
+            executor.submit(_fit_candidate, i, name, params, threads): (name, params)
+            for i, (name, params) in enumerate(tasks)
+        }
+        for future in as_completed(futures):
+            name, params = futures[future]
+            try:
+                result = future.result()
+                results.append(result)
+                print(f"✅ {name} {params}: {metric}={result.get(metric, float('nan')):.4f} "
+                      f"({result['fit_seconds']:.1f}s)")
+            except Exception as e:
+                print(f"❌ {name} {params} failed: {e}")
+
+    if not results:
+        raise RuntimeError("No candidate model could be trained.")
+
+    leaderboard = pd.DataFrame(results).sort_values(metric, ascending=False, ignore_index=True)
+
+    # Keep the best candidate of each model under the usual model path
+    os.makedirs("models", exist_ok=True)
+    for name, group in leaderboard.groupby("model", sort=False):
+        model_path = f"models/stock_model_{name}.pkl"
+        shutil.move(group["path"].iloc[0], model_path)
+        leaderboard.loc[group.index[0], "path"] = model_path
+    shutil.rmtree(candidates_dir, ignore_errors=True)
+    leaderboard.loc[~leaderboard["path"].str.startswith("models/stock_model_"), "path"] = None
+
+    now = datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
+    leaderboard_path = f"results/leaderboard_{now}.csv"
+    os.makedirs("results", exist_ok=True)
+    leaderboard.drop(columns=["task"]).to_csv(leaderboard_path, index=False)
+
+    print("\n🏆 Leaderboard:")
+    print(leaderboard.drop(columns=["task", "path"]).to_string(index=False))
+    print(f"📁 Leaderboard saved to '{leaderboard_path}'")
+    return leaderboard
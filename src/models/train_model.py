@@ -1,77 +1,73 @@
 #/home/michal/PycharmProjects/stock-market/src/models/train_model.py
 
+import importlib
+import importlib.util
 import pandas as pd
-from sklearn.ensemble import RandomForestClassifier, GradientBoostingClassifier
-from sklearn.linear_model import LogisticRegression
-from sklearn.metrics import classification_report, accuracy_score
-import joblib
 import os
-import matplotlib.pyplot as plt
 from datetime import datetime
-import json
+from src.features.matrices import load_manifest, load_split
+from src.models.artifacts import save_artifact
+from src.data.plot_data import is_interactive, pyplot
+
+# Optional: Use XGBoost if installed (checked without importing it)
+has_xgb = importlib.util.find_spec("xgboost") is not None
+
+# Estimator class (imported on first use) and default parameters per supported model name
+MODEL_CLASSES = {
+    "random_forest": "sklearn.ensemble.RandomForestClassifier",
+    "logistic_regression": "sklearn.linear_model.LogisticRegression",
+    "gradient_boosting": "sklearn.ensemble.GradientBoostingClassifier",
+    "sgd": "sklearn.linear_model.SGDClassifier",
+}
+DEFAULT_MODEL_PARAMS = {
+    "random_forest": {"n_estimators": 100, "random_state": 42, "n_jobs": -1},
+    "logistic_regression": {"max_iter": 1000, "random_state": 42},
+    "gradient_boosting": {"n_estimators": 100, "random_state": 42},
+    # Logistic regression fitted by SGD; supports partial_fit for train_online
+    "sgd": {"loss": "log_loss", "alpha": 1e-4, "random_state": 42},
+}
+if has_xgb:
+    MODEL_CLASSES["xgboost"] = "xgboost.XGBClassifier"
+    DEFAULT_MODEL_PARAMS["xgboost"] = {"use_label_encoder": False, "eval_metric": "logloss", "random_state": 42}
+
+
+def make_model(model_name, **params):
+    """Creates an estimator with the default parameters, overridden by `params`."""
+    if model_name not in MODEL_CLASSES:
+        raise ValueError(f"Model '{model_name}' is not supported. Choose from: {list(MODEL_CLASSES.keys())}")
+    module_name, class_name = MODEL_CLASSES[model_name].rsplit(".", 1)
+    model_class = getattr(importlib.import_module(module_name), class_name)
+    return model_class(**{**DEFAULT_MODEL_PARAMS[model_name], **params})
 
-# Optional: Use XGBoost if installed
-try:
-    from xgboost import XGBClassifier
-    has_xgb = True
-except ImportError:
-    has_xgb = False
 
 def train_model(model_name="random_forest"):
-    # Load scaled training data
-    train_path = "data/features/combined_scaled_train.csv"
-    test_path = "data/features/combined_scaled_test.csv"
+    # Open the float32 training matrices written by the scaling stage as memory maps (no copy)
+    manifest = load_manifest()
+    X_train, y_train = load_split(manifest, "train")
+    X_test, y_test = load_split(manifest, "test")
 
-    if not os.path.exists(train_path):
-        raise FileNotFoundError(f"Training file '{train_path}' not found. Run scale mode first.")
-
-    df_train = pd.read_csv(train_path)
-    df_test = pd.read_csv(test_path) if os.path.exists(test_path) else None
+    if X_train is None:
+        raise FileNotFoundError("Training matrices not found. Run scale mode first.")
 
     # 🔍 Check class balance in train/test data
     print("\n📊 Target class distribution in training data:")
-    print(df_train["target"].value_counts())
+    print(pd.Series(y_train, name=manifest["target"]).value_counts())
 
-    if df_test is not None:
+    if X_test is not None:
         print("\n📊 Target class distribution in test data:")
-        print(df_test["target"].value_counts())
-
-    # Load feature columns from file
-    feature_cols_path = "models/feature_columns.json"
-    if not os.path.exists(feature_cols_path):
-        raise FileNotFoundError(f"Feature columns file '{feature_cols_path}' not found. Run scaling first.")
-    with open(feature_cols_path, "r") as f:
-        feature_cols = json.load(f)
-
-    target_col = "target"
-
-    X_train = df_train[feature_cols]
-    y_train = df_train[target_col]
-
-    models = {
-        "random_forest": RandomForestClassifier(n_estimators=100, random_state=42),
-        "logistic_regression": LogisticRegression(max_iter=1000, random_state=42),
-        "gradient_boosting": GradientBoostingClassifier(n_estimators=100, random_state=42),
-    }
-    if has_xgb:
-        models["xgboost"] = XGBClassifier(use_label_encoder=False, eval_metric='logloss', random_state=42)
-
-    if model_name not in models:
-        raise ValueError(f"Model '{model_name}' is not supported. Choose from: {list(models.keys())}")
+        print(pd.Series(y_test, name=manifest["target"]).value_counts())
 
-    model = models[model_name]
+    model = make_model(model_name)
     model.fit(X_train, y_train)
 
     # Save model
-    os.makedirs("models", exist_ok=True)
     model_path = f"models/stock_model_{model_name}.pkl"
-    joblib.dump(model, model_path)
+    save_artifact(model, model_path)
     print(f"✅ Model '{model_name}' trained and saved to '{model_path}'")
 
     # Optional: Evaluate on test data if available
-    if df_test is not None:
-        X_test = df_test[feature_cols]
-        y_test = df_test[target_col]
+    if X_test is not None:
+        from sklearn.metrics import classification_report, accuracy_score
         y_pred = model.predict(X_test)
 
         print("\n📊 Evaluation on test data:")
@@ -91,6 +87,7 @@ def train_model(model_name="random_forest"):
         print(f"📁 Report saved to '{report_path}'")
 
         # Plot accuracy as a bar chart
+        plt = pyplot()
         plt.figure(figsize=(5, 4))
         plt.bar(["Accuracy"], [accuracy], color="skyblue")
         plt.ylim(0, 1)
@@ -99,5 +96,7 @@ def train_model(model_name="random_forest"):
         plt.tight_layout()
         chart_path = f"results/test_accuracy_plot_{model_name}_{now}.png"
         plt.savefig(chart_path)
-        plt.show()
+        if is_interactive():
+            plt.show()
+        plt.close()
         print(f"📊 Accuracy plot saved to '{chart_path}'")
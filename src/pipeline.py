@@ -0,0 +1,232 @@
+# src/pipeline.py
+
+import hashlib
+import inspect
+import json
+import os
+import sys
+import threading
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from src import metrics
+from src.data.storage import dataset_path
+
+pipeline_state_default_path = "data/cache/pipeline_state.json"
+
+
+class Stage:
+    """
+    One step of the pipeline.
+
+    Args:
+        name (str): Unique stage name.
+        func (callable): Called with `params` as keyword arguments.
+        inputs (list): Table/file paths the stage reads (logical paths as passed to `read_table`).
+        outputs (list): Table/file paths the stage writes.
+        deps (list): Names of stages that must finish first.
+        params (dict): Keyword arguments for `func`; part of the fingerprint.
+        modules (list): Modules whose source counts as the stage's code version
+            (defaults to the module defining `func`).
+        cacheable (bool): False for stages reading external sources (APIs), which always run.
+    """
+
+    def __init__(self, name, func, inputs=(), outputs=(), deps=(), params=None, modules=None, cacheable=True):
+        self.name = name
+        self.func = func
+        self.inputs = list(inputs)
+        self.outputs = list(outputs)
+        self.deps = list(deps)
+        self.params = params or {}
+        self.modules = modules or [sys.modules[func.__module__]]
+        self.cacheable = cacheable
+
+
+def _storage_path(path: str):
+    """The on-disk location of a logical table path: its Parquet dataset, the plain file, or None."""
+    if os.path.isdir(dataset_path(path)):
+        return dataset_path(path)
+    if os.path.exists(path):
+        return path
+    return None
+
+
+class FileHasher:
+    """
+    Content hashes of files and dataset directories.
+
+    File digests are memoised by (size, mtime) so unchanged files are read once per
+    state file rather than once per run. File names inside a dataset are ignored
+    (Parquet part files get random names on every write); partition directories are not.
+    """
+
+    def __init__(self, known: dict = None):
+        self.known = dict(known or {})
+        self.lock = threading.Lock()
+
+    def _file_digest(self, path: str) -> str:
+        stat = os.stat(path)
+        stamp = [stat.st_size, stat.st_mtime_ns]
+        with self.lock:
+            entry = self.known.get(path)
+        if entry and entry[0] == stamp:
+            return entry[1]
+        h = hashlib.blake2b(digest_size=16)
+        with open(path, "rb") as f:
+            for block in iter(lambda: f.read(1 << 20), b""):
+                h.update(block)
+        digest = h.hexdigest()
+        with self.lock:
+            self.known[path] = [stamp, digest]
+        return digest
+
+    def prune(self) -> dict:
+        """Forgets files that no longer exist (e.g. replaced Parquet parts) and returns the remaining entries."""
+        with self.lock:
+            self.known = {path: entry for path, entry in self.known.items() if os.path.exists(path)}
+            return dict(self.known)
+
+    def digest(self, path: str):
+        location = _storage_path(path)
+        if location is None:
+            return None
+        if os.path.isfile(location):
+            return self._file_digest(location)
+        parts = []
+        for root, dirs, files in os.walk(location):
+            dirs.sort()
+            relative = os.path.relpath(root, location)
+            parts.extend(f"{relative}/{self._file_digest(os.path.join(root, name))}" for name in files)
+        return hashlib.blake2b("\n".join(sorted(parts)).encode("utf-8"), digest_size=16).hexdigest()
+
+
+class Pipeline:
+    """
+    Lazy DAG executor over `Stage`s with on-disk caching.
+
+    `run(targets)` executes only the stages the targets depend on. A stage is skipped
+    when its fingerprint — content hash of its inputs, source of its code modules and
+    its params — matches the previous successful run and its outputs are unchanged
+    since then. Stages whose dependencies are done run concurrently on a thread pool,
+    so e.g. the news and price fetches overlap.
+    """
+
+    def __init__(self, stages, state_path: str = pipeline_state_default_path, max_workers: int = 2):
+        self.stages = {stage.name: stage for stage in stages}
+        self.state_path = state_path
+        self.max_workers = max_workers
+        self.state = self._load_state()
+        self.hasher = FileHasher(self.state.get("files"))
+        self.lock = threading.Lock()
+
+    def _load_state(self) -> dict:
+        if not os.path.exists(self.state_path):
+            return {"stages": {}, "files": {}}
+        with open(self.state_path, "r") as f:
+            return json.load(f)
+
+    def _save_state(self):
+        with self.lock:
+            self.state["files"] = self.hasher.prune()
+            if os.path.dirname(self.state_path):
+                os.makedirs(os.path.dirname(self.state_path), exist_ok=True)
+            tmp_path = self.state_path + ".tmp"
+            with open(tmp_path, "w") as f:
+                json.dump(self.state, f, indent=1)
+            os.replace(tmp_path, self.state_path)
+
+    def _code_version(self, stage: Stage) -> str:
+        h = hashlib.blake2b(digest_size=16)
+        for module in stage.modules:
+            h.update(inspect.getsource(module).encode("utf-8"))
+        return h.hexdigest()
+
+    def fingerprint(self, stage: Stage) -> str:
+        payload = {
+            "inputs": {path: self.hasher.digest(path) for path in stage.inputs},
+            "code": self._code_version(stage),
+            "params": stage.params,
+        }
+        return hashlib.blake2b(json.dumps(payload, sort_keys=True, default=str).encode("utf-8"),
+                               digest_size=16).hexdigest()
+
+    def is_fresh(self, stage: Stage, fingerprint: str) -> bool:
+        cached = self.state["stages"].get(stage.name)
+        if not stage.cacheable or cached is None or cached["fingerprint"] != fingerprint:
+            return False
+        return all(self.hasher.digest(path) == digest for path, digest in cached["outputs"].items())
+
+    def _plan(self, targets) -> list:
+        """Stages needed for `targets`, dependencies first."""
+        order, seen = [], set()
+
+        def visit(name, path=()):
+            if name in path:
+                raise ValueError(f"Cycle in pipeline: {' -> '.join(path + (name,))}")
+            if name in seen:
+                return
+            for dep in self.stages[name].deps:
+                visit(dep, path + (name,))
+            seen.add(name)
+            order.append(name)
+
+        for target in targets:
+            visit(target)
+        return order
+
+    def _run_stage(self, stage: Stage) -> str:
+        with metrics.stage(stage.name):
+            fingerprint = self.fingerprint(stage)
+            if self.is_fresh(stage, fingerprint):
+                metrics.count("pipeline_cache_hits")
+                print(f"⏩ Stage '{stage.name}' is up to date, skipping.")
+                return "cached"
+            print(f"▶️ Running stage '{stage.name}'...")
+            stage.func(**stage.params)
+        with self.lock:
+            self.state["stages"][stage.name] = {
+                "fingerprint": fingerprint,
+                "outputs": {path: self.hasher.digest(path) for path in stage.outputs},
+            }
+        self._save_state()
+        return "ran"
+
+    def _run_safely(self, name: str) -> str:
+        try:
+            return self._run_stage(self.stages[name])
+        except Exception as e:
+            print(f"❌ Stage '{name}' failed: {e}")
+            return "failed"
+
+    def run(self, targets=None) -> dict:
+        """
+        Runs the stages needed for `targets` (default: all stages).
+
+        Returns:
+            dict: Stage name -> 'ran', 'cached', 'failed' or 'skipped' (a dependency failed).
+        """
+        pending = self._plan(targets or list(self.stages))
+        status = {}
+        running = {}
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            while pending or running:
+                ready = []
+                for name in list(pending):
+                    deps = [status.get(dep) for dep in self.stages[name].deps]
+                    if any(s in ("failed", "skipped") for s in deps):
+                        status[name] = "skipped"
+                        pending.remove(name)
+                        print(f"⚠️ Stage '{name}' skipped: a dependency failed.")
+                    elif all(s in ("ran", "cached") for s in deps):
+                        ready.append(name)
+                        pending.remove(name)
+                if len(ready) == 1 and not running:
+                    # Nothing to overlap with: run on the main thread (matplotlib, signals)
+                    status[ready[0]] = self._run_safely(ready[0])
+                    continue
+                for name in ready:
+                    running[executor.submit(self._run_safely, name)] = name
+                if not running:
+                    continue
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    status[running.pop(future)] = future.result()
+        return status
@@ -0,0 +1,44 @@
+# tests/test_backtest.py
+
+import numpy as np
+import pytest
+from src.models.backtest import make_folds
+
+
+@pytest.fixture
+def days():
+    # 60 sessions with gaps (weekends) and a varying number of tickers per session
+    rng = np.random.default_rng(1)
+    sessions = np.cumsum(rng.integers(1, 4, size=60)) + 19000
+    return np.repeat(sessions, rng.integers(1, 5, size=60))
+
+
+@pytest.mark.parametrize("embargo", [0, 1, 3])
+def test_folds_never_train_on_or_next_to_their_test_block(days, embargo):
+    sessions = np.unique(days)
+    folds = make_folds(days, n_folds=5, embargo=embargo)
+
+    assert len(folds) == 5
+    for fold in folds:
+        train_days = days[:fold["train_end"]]
+        test_days = days[fold["test_start"]:fold["test_end"]]
+        assert np.array_equal(test_days, days[(days >= fold["test_from"]) & (days <= fold["test_to"])])
+        # Exactly `embargo` sessions separate the last training row from the test block
+        gap = np.searchsorted(sessions, fold["test_from"]) - np.searchsorted(sessions, train_days.max()) - 1
+        assert gap == embargo
+
+
+def test_test_blocks_tile_the_out_of_sample_sessions(days):
+    sessions = np.unique(days)
+    folds = make_folds(days, n_folds=4, min_train_fraction=0.5)
+
+    assert folds[0]["test_from"] == sessions[len(sessions) // 2]
+    assert folds[-1]["test_end"] == len(days)
+    for earlier, later in zip(folds, folds[1:]):
+        assert earlier["test_end"] == later["test_start"]
+        assert later["train_end"] > earlier["train_end"]  # expanding window
+
+
+def test_folds_without_training_history_are_skipped():
+    days = np.arange(10)
+    assert [f["fold"] for f in make_folds(days, n_folds=10, min_train_fraction=0.0, embargo=2)] == list(range(3, 10))
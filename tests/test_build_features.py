@@ -0,0 +1,54 @@
+# tests/test_build_features.py
+
+import pandas as pd
+import pytest
+from src.data.storage import write_table
+from src.features.build_features import combine_news_and_prices
+
+
+def prices(ticker, dates):
+    return pd.DataFrame({
+        "Date": pd.to_datetime(dates), "ticker": ticker,
+        "Open": 10.0, "High": 11.0, "Low": 9.0, "Close": 10.5, "Volume": 1000.0,
+    })
+
+
+@pytest.fixture
+def combined(tmp_path):
+    sessions = ["2024-03-07", "2024-03-08", "2024-03-11", "2024-03-12"]  # Thu, Fri, Mon, Tue
+    write_table(pd.concat([prices("AAPL", sessions), prices("MSFT", ["2024-03-07", "2024-03-11", "2024-03-12"])]),
+                str(tmp_path / "stock_prices.csv"), partition_cols=["ticker"])
+    news = pd.DataFrame([
+        ("AAPL", "2024-03-07T20:00:00Z", 0.1),  # Thu 15:00 New York: same session
+        ("AAPL", "2024-03-07T21:30:00Z", 0.2),  # Thu 16:30, after the close: Friday
+        ("AAPL", "2024-03-08T22:00:00Z", 0.3),  # Fri after the close: Monday
+        ("AAPL", "2024-03-09T15:00:00Z", 0.5),  # Saturday: Monday
+        ("AAPL", "2024-03-11T20:30:00Z", 0.7),  # Mon 16:30 EDT (DST began Sunday): Tuesday
+        ("AAPL", "2024-03-13T14:00:00Z", 0.9),  # after the last known session: dropped
+        ("MSFT", "2024-03-07T21:30:00Z", 0.4),  # MSFT has no Friday bar: its next session is Monday
+        ("GENERAL", "2024-03-10T12:00:00Z", -0.6),  # Sunday market news: Monday for every ticker
+    ], columns=["ticker", "publishedAt", "sentiment"])
+    news["publishedAt"] = pd.to_datetime(news["publishedAt"], utc=True)
+    write_table(news, str(tmp_path / "news.csv"))
+    df = combine_news_and_prices(news_file=str(tmp_path / "news.csv"), price_file=str(tmp_path / "stock_prices.csv"),
+                                 output_file=str(tmp_path / "combined.csv"))
+    return df.set_index(["ticker", df["date"].dt.strftime("%Y-%m-%d")])
+
+
+def test_after_close_and_weekend_news_map_to_the_next_session(combined):
+    aapl = combined.loc["AAPL"]
+    assert aapl["news_count"].to_dict() == {"2024-03-07": 1, "2024-03-08": 1, "2024-03-11": 2, "2024-03-12": 1}
+    assert aapl.loc["2024-03-11", "sentiment"] == pytest.approx(0.4)
+    assert aapl.loc["2024-03-12", "sentiment"] == pytest.approx(0.7)
+
+
+def test_alignment_uses_each_tickers_own_sessions(combined):
+    msft = combined.loc["MSFT"]
+    assert msft["news_count"].to_dict() == {"2024-03-07": 0, "2024-03-11": 1, "2024-03-12": 0}
+    assert msft.loc["2024-03-11", "sentiment"] == pytest.approx(0.4)
+
+
+def test_general_news_reaches_every_ticker_on_the_next_session(combined):
+    general = combined["general_sentiment"]
+    assert general.loc[("AAPL", "2024-03-11")] == general.loc[("MSFT", "2024-03-11")] == pytest.approx(-0.6)
+    assert (general.drop(index=[("AAPL", "2024-03-11"), ("MSFT", "2024-03-11")]) == 0).all()
@@ -0,0 +1,85 @@
+# tests/test_fetch_news.py
+
+import json
+import os
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qsl, urlsplit
+import pytest
+from src.data.fetch_news import _checkpoint_path, _load_checkpoint, fetch_and_save_news_bulk, news_windows
+from src.data.storage import read_table
+
+
+@pytest.fixture
+def gnews_server(monkeypatch):
+    """Local stand-in for the GNews search endpoint; windows starting on a date in `failing` answer 400."""
+    server_state = {"requests": [], "failing": set()}
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            params = dict(parse_qsl(urlsplit(self.path).query))
+            day = params["from"][:10]
+            server_state["requests"].append((params["q"], day))
+            if day in server_state["failing"]:
+                status, payload = 400, {"errors": ["bad window"]}
+            else:
+                status, payload = 200, {"articles": [{
+                    "title": f"{params['q']} news from {day}",
+                    "description": "", "content": "",
+                    "publishedAt": f"{day}T15:00:00Z", "source": {"name": "mock"},
+                }]}
+            body = json.dumps(payload).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    monkeypatch.setenv("HTTP_MODE", "live")
+    monkeypatch.setenv("GNEWS_API_KEY", "test")
+    monkeypatch.setenv("GNEWS_URL", f"http://127.0.0.1:{server.server_port}/search")
+    yield server_state
+    server.shutdown()
+    server.server_close()
+
+
+def test_interrupted_fetch_resumes_only_missing_windows(gnews_server, tmp_path):
+    start_date, end_date = "2024-01-01", "2024-02-15"
+    windows = news_windows(start_date, end_date)
+    failing_day = f"{windows[2][0]:%Y-%m-%d}"
+    gnews_server["failing"].add(failing_day)
+    raw_file = str(tmp_path / "news_original_language.csv")
+    checkpoint_dir = str(tmp_path / "checkpoints")
+    kwargs = dict(raw_file=raw_file, max_workers=2, rate_per_minute=60000, checkpoint_dir=checkpoint_dir)
+    jobs = [{"query": "Apple", "ticker": "AAPL"}]
+
+    fetch_and_save_news_bulk(jobs, start_date, end_date, **kwargs)
+
+    assert len(gnews_server["requests"]) == len(windows)
+    path = _checkpoint_path(checkpoint_dir, "Apple", "company", "AAPL")
+    # The failed window is not recorded, so the checkpoint is kept for the rerun
+    assert len(_load_checkpoint(path)) == len(windows) - 1
+    assert len(read_table(raw_file)) == len(windows) - 1
+
+    gnews_server["failing"].clear()
+    gnews_server["requests"].clear()
+    fetch_and_save_news_bulk(jobs, start_date, end_date, **kwargs)
+
+    assert gnews_server["requests"] == [("Apple", failing_day)]
+    assert not os.path.exists(path)
+    news = read_table(raw_file)
+    assert len(news) == len(windows)
+    assert set(news["ticker"]) == {"AAPL"}
+
+
+def test_truncated_checkpoint_line_is_refetched(tmp_path):
+    path = tmp_path / "news.jsonl"
+    entry = {"window": "2024-01-01/2024-01-11", "fetch_date": "2024-01-12", "articles": []}
+    path.write_text(json.dumps(entry) + "\n" + '{"window": "2024-01-12/2024-01-', encoding="utf-8")
+
+    assert list(_load_checkpoint(str(path))) == ["2024-01-01/2024-01-11"]
@@ -0,0 +1,109 @@
+# tests/test_http_client.py
+
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qsl, urlsplit
+import pandas as pd
+import pytest
+from src import metrics
+from src.data.fetch_prices import fetch_and_save_stock_data_bulk
+from src.data.http_client import TokenBucket, make_session
+from src.data.storage import read_table
+
+
+@pytest.fixture
+def twelve_data_server(monkeypatch):
+    """Local stand-in for the Twelve Data time_series endpoint that records when each request arrived."""
+    arrivals = []
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            params = dict(parse_qsl(urlsplit(self.path).query))
+            arrivals.append((time.monotonic(), params["symbol"]))
+            dates = pd.bdate_range(params["start_date"], params["end_date"])
+            values = [{"datetime": f"{d:%Y-%m-%d}", "open": "10.0", "high": "11.0", "low": "9.0",
+                       "close": "10.5", "volume": "1000"} for d in dates[::-1]]
+            body = json.dumps({"values": values, "status": "ok"}).encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    monkeypatch.setenv("HTTP_MODE", "live")
+    monkeypatch.setenv("TWELVE_DATA_API_KEY", "test")
+    monkeypatch.setenv("TWELVE_DATA_URL", f"http://127.0.0.1:{server.server_port}/time_series")
+    yield arrivals
+    server.shutdown()
+    server.server_close()
+
+
+def test_per_minute_spaces_requests_without_burst(monkeypatch):
+    monkeypatch.setenv("HTTP_MODE", "live")
+    limiter = TokenBucket.per_minute(600)  # one request every 0.1 s
+    start = time.monotonic()
+    for _ in range(4):
+        limiter.acquire()
+    assert time.monotonic() - start >= 0.3 - 0.01
+
+
+def test_bulk_price_fetch_stays_within_quota(twelve_data_server, tmp_path):
+    tickers = ["AAA", "BBB", "CCC", "DDD", "EEE", "FFF"]
+    filename = str(tmp_path / "stock_prices.csv")
+
+    failed = fetch_and_save_stock_data_bulk(tickers, "2024-01-01", "2024-01-31", filename=filename,
+                                            max_workers=4, rate_per_minute=600)
+
+    assert failed == []
+    assert sorted(symbol for _, symbol in twelve_data_server) == tickers
+    arrivals = sorted(t for t, _ in twelve_data_server)
+    # 600/min is one request per 0.1 s: four workers must not arrive together (a burst would
+    # let them through at once); the margins absorb thread scheduling jitter
+    assert min(b - a for a, b in zip(arrivals, arrivals[1:])) >= 0.05
+    assert arrivals[-1] - arrivals[0] >= (len(tickers) - 1) * 0.1 - 0.03
+
+    prices = read_table(filename)
+    assert len(prices) == len(tickers) * len(pd.bdate_range("2024-01-01", "2024-01-31"))
+    assert prices["Close"].dtype == "float64"
+
+
+def test_transient_errors_are_retried_and_counted(monkeypatch):
+    monkeypatch.setenv("HTTP_MODE", "live")
+    monkeypatch.setattr(metrics, "enabled", True)
+    metrics.reset()
+    calls = []
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            calls.append(self.path)
+            status = 503 if len(calls) == 1 else 200
+            self.send_response(status)
+            self.send_header("Content-Length", "2")
+            self.end_headers()
+            self.wfile.write(b"{}")
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    try:
+        with make_session(1) as session:
+            response = session.get(f"http://127.0.0.1:{server.server_port}/time_series")
+    finally:
+        server.shutdown()
+        server.server_close()
+        totals = metrics._counter_snapshot()
+        metrics.reset()
+
+    assert response.status_code == 200 and len(calls) == 2
+    assert totals["retries"] == 1 and totals["retries.127.0.0.1"] == 1
+    assert totals["http_calls"] == 1  # one logical request
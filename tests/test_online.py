@@ -0,0 +1,46 @@
+# tests/test_online.py
+
+import numpy as np
+import pandas as pd
+import pytest
+from src.data import storage
+from src.data.storage import write_table
+from src.features.technical_indicators import FEATURE_COLUMNS
+from src.models.online import train_online
+
+COMBINED = "data/features/combined.csv"
+
+
+def _combined(days_with_target):
+    """Two tickers with random features; each ticker's rows after its day count have no next close yet."""
+    rng = np.random.default_rng(0)
+    frames = []
+    for ticker, with_target in days_with_target.items():
+        dates = pd.bdate_range("2024-01-01", periods=30)
+        df = pd.DataFrame(rng.normal(size=(len(dates), len(FEATURE_COLUMNS))), columns=FEATURE_COLUMNS)
+        df["date"], df["ticker"] = dates, ticker
+        df["next_close"] = np.where(np.arange(len(dates)) < with_target, 1.0, np.nan)
+        df["target"] = rng.integers(0, 2, len(dates))
+        frames.append(df)
+    return pd.concat(frames, ignore_index=True)
+
+
+@pytest.mark.parametrize("pyarrow", [True, False])
+def test_late_ticker_rows_are_learnt_on_a_later_run(tmp_path, monkeypatch, pyarrow):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(storage, "has_pyarrow", pyarrow and storage.has_pyarrow)
+
+    # BBB's prices stop 10 sessions earlier than AAA's
+    write_table(_combined({"AAA": 30, "BBB": 20}), COMBINED, partition_cols=["ticker"])
+    first = train_online("sgd", combined_file=COMBINED)
+    assert first["new_rows"] == 50
+    assert first["ticker_cursors"] == {"AAA": "2024-02-09", "BBB": "2024-01-26"}
+
+    # BBB catches up: its rows older than AAA's last learnt date must still be learnt
+    write_table(_combined({"AAA": 30, "BBB": 30}), COMBINED, partition_cols=["ticker"])
+    second = train_online("sgd", combined_file=COMBINED)
+    assert second["new_rows"] == 10
+    assert second["trained_through"] == "2024-02-09"
+    assert second["ticker_cursors"]["BBB"] == "2024-02-09"
+
+    assert train_online("sgd", combined_file=COMBINED)["version"] == second["version"]
@@ -0,0 +1,78 @@
+# tests/test_predict.py
+
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.linear_model import LogisticRegression
+from sklearn.preprocessing import StandardScaler
+from src.data.storage import write_table
+from src.data.synthetic import synthetic_prices
+from src.features.matrices import save_manifest
+from src.features.technical_indicators import (
+    EXTENDED_FEATURE_COLUMNS, add_technical_indicators, load_indicator_state, update_technical_indicators,
+)
+from src.models.artifacts import save_artifact
+from src.models.predict import Predictor
+
+
+@pytest.fixture
+def setup(tmp_path, monkeypatch):
+    """A model trained on full-history features and an indicator state that stops 20 sessions early."""
+    monkeypatch.chdir(tmp_path)
+    prices = synthetic_prices(3, 160, seed=5)
+    full = add_technical_indicators(prices.copy()).dropna(subset=EXTENDED_FEATURE_COLUMNS[3:])
+    for col in ["sentiment", "news_count", "general_sentiment"]:
+        full[col] = 0.0
+    X = full[EXTENDED_FEATURE_COLUMNS].to_numpy()
+    y = (full.groupby("ticker")["Close"].shift(-1) > full["Close"]).to_numpy(dtype=int)
+    scaler = StandardScaler().fit(X)
+    save_artifact(scaler, "models/price_scaler.pkl")
+    save_artifact(LogisticRegression().fit(scaler.transform(X), y), "models/stock_model_logistic_regression.pkl")
+    save_manifest(EXTENDED_FEATURE_COLUMNS, {}, manifest_path="models/feature_manifest.json",
+                  scaler="models/price_scaler.pkl")
+
+    cutoff = prices["Date"].sort_values().unique()[-21]
+    update_technical_indicators(prices[prices["Date"] <= cutoff], "features/state.pkl")
+    write_table(prices, "stock_prices.csv", partition_cols=["ticker"])
+    return {"prices": prices, "full": full, "scaler": scaler}
+
+
+def make_predictor(price_file="stock_prices.csv"):
+    return Predictor("logistic_regression", manifest_path="models/feature_manifest.json",
+                     state_path="features/state.pkl", price_file=price_file)
+
+
+def test_stale_state_catches_up_from_stored_prices(setup):
+    last = setup["prices"].groupby("ticker").tail(1)
+    predictor = make_predictor()
+
+    result = predictor.predict(last[["ticker", "Date", "High", "Low", "Close", "Volume"]])
+
+    expected = setup["full"].merge(last[["ticker", "Date"]], on=["ticker", "Date"]).sort_values("ticker")
+    X = setup["scaler"].transform(expected[EXTENDED_FEATURE_COLUMNS].to_numpy())
+    np.testing.assert_allclose(result["probability"], predictor.model.predict_proba(X)[:, 1], rtol=1e-5)
+    # The catch-up is persisted, so a new process starts from the latest stored bar
+    state = load_indicator_state("features/state.pkl")
+    assert {ts["last_date"] for ts in state["tickers"].values()} == {last["Date"].max().to_datetime64()}
+
+
+def test_streamed_bars_are_not_persisted(setup):
+    predictor = make_predictor()
+    latest = setup["prices"]["Date"].max()
+    bars = pd.DataFrame({"ticker": ["T0000"], "Date": [latest + pd.offsets.BDay(1)],
+                         "High": [101.0], "Low": [99.0], "Close": [100.0], "Volume": [1e6]})
+
+    first = predictor.predict(bars, advance=True)
+
+    assert first["probability"].notna().all()
+    state = load_indicator_state("features/state.pkl")
+    assert state["tickers"]["T0000"]["last_date"] == latest.to_datetime64()
+    assert predictor.ticker_states["T0000"]["last_date"] == bars["Date"].iloc[0].to_datetime64()
+
+
+def test_stale_state_without_price_table_refuses_to_predict(setup):
+    predictor = make_predictor(price_file="missing.csv")
+    last = setup["prices"].groupby("ticker").tail(1)
+
+    with pytest.raises(ValueError, match="behind"):
+        predictor.predict(last)
@@ -0,0 +1,88 @@
+# tests/test_process_news.py
+
+import pandas as pd
+import pytest
+from src.data.process_news import process_and_save_translated_news
+from src.data.storage import read_table
+from src.data.translation import TranslationProvider, Translator
+from src.data.utils import detect_language, save_to_csv
+
+ENGLISH = "Apple shares rose sharply after the company reported record quarterly earnings and strong iPhone demand."
+SPANISH = "Las acciones de Apple subieron con fuerza después de que la empresa presentara ganancias récord."
+
+
+class RecordingProvider(TranslationProvider):
+    name = "recording"
+
+    def __init__(self):
+        self.sent = []
+
+    def translate_batch(self, chunks, src_lang="auto", dest_lang="en"):
+        self.sent.extend(chunks)
+        return [f"translated: {chunk}" for chunk in chunks]
+
+
+def raw_news(titles, day="2024-03-01"):
+    return pd.DataFrame({
+        "title": titles,
+        "description": "",
+        "content": "",
+        "publishedAt": [f"{day}T{10 + i:02d}:00:00Z" for i in range(len(titles))],
+        "url": [f"https://example.com/{i}" for i in range(len(titles))],
+        "source": "{'name': 'mock'}",
+        "ticker": "AAPL",
+    })
+
+
+@pytest.fixture
+def paths(tmp_path):
+    return {
+        "raw_file": str(tmp_path / "raw" / "news_original_language.csv"),
+        "clean_file": str(tmp_path / "processed" / "news_translated_cleaned.csv"),
+        "filtered_ids_file": str(tmp_path / "processed" / "news_filtered_ids.csv"),
+        "cache_path": str(tmp_path / "translations.sqlite"),
+    }
+
+
+def test_english_articles_skip_the_translator(paths):
+    provider = RecordingProvider()
+    save_to_csv(raw_news([ENGLISH, SPANISH]), paths["raw_file"])
+
+    process_and_save_translated_news(translator=Translator(providers=[provider]), **paths)
+
+    assert provider.sent == [SPANISH]
+    clean = read_table(paths["clean_file"]).set_index("title")
+    assert clean.loc[ENGLISH, "translated_text"] == ENGLISH
+    assert clean.loc[SPANISH, "translated_text"] == f"translated: {SPANISH}"
+
+
+def test_language_is_detected_on_a_prefix():
+    # Only the first characters are looked at, so a long English tail does not flip a Spanish article
+    assert detect_language(SPANISH + " " + ENGLISH * 20, max_chars=len(SPANISH)) == "es"
+    assert detect_language("   ") == "unknown"
+
+
+@pytest.mark.parametrize("chunk_size", [None, 1])
+def test_incremental_run_only_processes_unseen_articles(paths, chunk_size):
+    provider = RecordingProvider()
+    translator = Translator(providers=[provider])
+    russian = "Акции Apple резко выросли после публикации рекордной квартальной отчётности компании."
+    save_to_csv(raw_news([SPANISH, russian, ENGLISH]), paths["raw_file"])
+    process_and_save_translated_news(translator=translator, chunk_size=chunk_size, **paths)
+    assert provider.sent == [SPANISH]  # the Russian article is filtered out, not translated
+
+    german = "Die Apple-Aktie stieg nach starken Quartalszahlen und einer hohen Nachfrage nach iPhones deutlich."
+    save_to_csv(raw_news([german], day="2024-03-02"), paths["raw_file"])
+    provider.sent.clear()
+    process_and_save_translated_news(translator=translator, chunk_size=chunk_size, **paths)
+
+    assert provider.sent == [german]
+    clean = read_table(paths["clean_file"])
+    assert sorted(clean["title"]) == sorted([SPANISH, ENGLISH, german])
+    assert clean["article_id"].is_unique
+    assert len(read_table(paths["filtered_ids_file"])) == 1
+
+    provider.sent.clear()
+    process_and_save_translated_news(translator=translator, chunk_size=chunk_size, **paths)
+    assert provider.sent == []
+    assert len(read_table(paths["clean_file"])) == 3
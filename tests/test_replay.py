@@ -0,0 +1,94 @@
+# tests/test_replay.py
+
+import json
+import sqlite3
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import pandas as pd
+import pytest
+from src.data import replay
+from src.data.http_client import make_session
+from src.data.replay import request_key, synthetic_response
+
+
+@pytest.fixture
+def api_server():
+    """Echoes the request path and body; counts how often it was reached."""
+    calls = []
+
+    class Handler(BaseHTTPRequestHandler):
+        def _answer(self, body=b""):
+            calls.append(self.path)
+            payload = json.dumps({"path": self.path, "body": body.decode("utf-8")}).encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def do_GET(self):
+            self._answer()
+
+        def do_POST(self):
+            self._answer(self.rfile.read(int(self.headers.get("Content-Length", 0))))
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{server.server_port}", calls
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def archive_path(tmp_path, monkeypatch):
+    path = str(tmp_path / "http_archive.sqlite")
+    monkeypatch.setenv("HTTP_ARCHIVE", path)
+    monkeypatch.setenv("HTTP_REPLAY_SPEEDUP", "inf")
+    replay.open_archive.cache_clear()
+    yield path
+    replay.open_archive.cache_clear()
+
+
+def test_recorded_responses_replay_without_the_network(api_server, archive_path, monkeypatch):
+    base_url, calls = api_server
+    monkeypatch.setenv("HTTP_MODE", "record")
+    with make_session(1) as session:
+        recorded_get = session.get(f"{base_url}/search", params={"q": "Apple", "token": "secret-123"})
+        recorded_post = session.post(f"{base_url}/translate", json={"q": ["hola"]})
+
+    monkeypatch.setenv("HTTP_MODE", "replay")
+    with make_session(1) as session:
+        # Another machine's key (and host) still finds the recording
+        replayed_get = session.get("https://api.example.com/search", params={"token": "other", "q": "Apple"})
+        replayed_post = session.post(f"{base_url}/translate", json={"q": ["hola"]})
+        missing = session.get(f"{base_url}/search", params={"q": "Microsoft"})
+
+    assert len(calls) == 2
+    assert replayed_get.status_code == 200 and replayed_get.json() == recorded_get.json()
+    assert replayed_post.json() == recorded_post.json()
+    assert missing.status_code == 404
+
+    with sqlite3.connect(archive_path) as conn:
+        urls = [url for (url,) in conn.execute("SELECT url FROM responses")]
+    assert len(urls) == 2 and not any("secret" in url or "token" in url for url in urls)
+
+
+def test_request_key_ignores_secrets_host_and_param_order():
+    key = request_key("GET", "https://api.twelvedata.com/time_series?symbol=AAPL&apikey=a&interval=1day")
+    assert key == request_key("get", "http://127.0.0.1:8766/time_series/?interval=1day&symbol=AAPL&apikey=b")
+    assert key != request_key("GET", "https://api.twelvedata.com/time_series?symbol=MSFT&interval=1day")
+    assert request_key("POST", "http://h/translate", '{"q": ["a"]}') != request_key("POST", "http://h/translate", b'{"q": ["b"]}')
+
+
+def test_synthetic_responses_are_deterministic():
+    url = "https://api.twelvedata.com/time_series?symbol=AAPL&start_date=2024-01-01&end_date=2024-01-31"
+    status, content_type, body = synthetic_response("GET", url)
+
+    assert status == 200 and content_type == "application/json"
+    assert synthetic_response("GET", url)[2] == body
+    values = json.loads(body)["values"]
+    assert len(values) == len(pd.bdate_range("2024-01-01", "2024-01-31"))
+    assert values[0]["datetime"] > values[-1]["datetime"]  # newest first, as Twelve Data returns them
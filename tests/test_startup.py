@@ -0,0 +1,59 @@
+# tests/test_startup.py
+
+import json
+import os
+import subprocess
+import sys
+import numpy as np
+import pytest
+from benchmarks.startup import MODE_IMPORTS
+from src.models.artifacts import load_artifact, save_artifact
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Libraries that take a noticeable part of a second (or more) to import
+HEAVY = {"sklearn", "scipy", "xgboost", "nltk", "langdetect", "deep_translator", "matplotlib"}
+
+# Heavy imports a mode may pay for up front because it uses them on every run
+ALLOWED = {"process_news": {"deep_translator"}}
+
+
+def imported_after(code, unset=()):
+    """Top-level package names loaded by running `code` in a fresh interpreter."""
+    env = {key: value for key, value in os.environ.items() if key not in unset}
+    out = subprocess.run(
+        [sys.executable, "-c", code + "\nimport sys, json; print(json.dumps(sorted({n.split('.')[0] for n in sys.modules})))"],
+        cwd=ROOT, env=env, capture_output=True, text=True, check=True,
+    )
+    return set(json.loads(out.stdout.strip().splitlines()[-1]))
+
+
+@pytest.mark.parametrize("mode", sorted(MODE_IMPORTS))
+def test_modes_only_import_what_they_use(mode):
+    code = "import importlib, main0\n" + "".join(f"importlib.import_module({m!r})\n" for m in MODE_IMPORTS[mode])
+    assert imported_after(code) & HEAVY <= ALLOWED.get(mode, set())
+
+
+def test_headless_plotting_uses_agg():
+    code = ("from src.data.plot_data import pyplot, is_interactive\n"
+            "import matplotlib; pyplot(); assert matplotlib.get_backend().lower() == 'agg' and not is_interactive()")
+    assert "matplotlib" in imported_after(code, unset=("DISPLAY", "MPLBACKEND"))
+
+
+@pytest.mark.parametrize("mmap", [False, True])
+def test_artifact_round_trip(tmp_path, mmap):
+    path = str(tmp_path / "model.pkl")
+    weights = np.arange(1000, dtype=np.float64)
+    save_artifact({"weights": weights, "name": "m"}, path)
+
+    loaded = load_artifact(path, mmap=mmap)
+
+    np.testing.assert_array_equal(loaded["weights"], weights)
+    assert isinstance(loaded["weights"], np.memmap) == mmap
+    if mmap:
+        assert not loaded["weights"].flags.writeable
+
+
+def test_missing_artifact_is_reported(tmp_path):
+    with pytest.raises(FileNotFoundError, match="not found"):
+        load_artifact(str(tmp_path / "missing.pkl"))
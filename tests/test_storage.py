@@ -0,0 +1,40 @@
+# tests/test_storage.py
+
+import os
+import pandas as pd
+from src.data.storage import append_table, iter_table, migrate_csv_files, read_table, upsert_table, write_table
+from src.features.technical_indicators import price_column
+
+
+def test_append_with_conflicting_types_rewrites_table(tmp_path):
+    path = str(tmp_path / "news.csv")
+    write_table(pd.DataFrame({"ticker": ["A"], "publishedAt": pd.to_datetime(["2024-01-01"])}), path,
+                partition_cols=["ticker"])
+    append_table(pd.DataFrame({"ticker": ["A"], "publishedAt": [None]}), path)  # castable: appended as is
+    append_table(pd.DataFrame({"ticker": ["B"], "publishedAt": ["not a date"]}), path)
+
+    df = read_table(path).sort_values("ticker", kind="stable")
+    assert df["ticker"].tolist() == ["A", "A", "B"]
+    assert "not a date" in df["publishedAt"].astype(str).tolist()
+
+
+def test_read_keeps_columns_of_every_partition(tmp_path, monkeypatch):
+    # A legacy prices CSV (Twelve Data's lowercase columns) migrated, then a typed ticker upserted
+    monkeypatch.chdir(tmp_path)
+    os.makedirs("data/prices")
+    dates = pd.bdate_range("2024-01-01", periods=5)
+    pd.DataFrame({"Date": dates.strftime("%Y-%m-%d"), "open": 1.0, "high": 2.0, "low": 0.5, "Close": 1.5,
+                  "volume": 100, "ticker": "AAPL"}).to_csv("data/prices/stock_prices.csv", index=False)
+    migrate_csv_files()
+    typed = pd.DataFrame({"Date": dates, "Open": 1.0, "High": 2.5, "Low": 0.5, "Close": 1.5, "Volume": 100.0,
+                          "ticker": "MSFT"})
+    upsert_table(typed, "data/prices/stock_prices.csv", key_cols=["ticker", "Date"],
+                 partition_cols=["ticker"], year_col="Date")
+
+    df = read_table("data/prices/stock_prices.csv")
+    assert {"open", "high", "Open", "High", "Low", "Volume"} <= set(df.columns)
+    msft = df[df["ticker"] == "MSFT"]
+    assert msft["High"].tolist() == [2.5] * 5 and msft["high"].isna().all()
+    assert price_column(df[df["ticker"] == "AAPL"], "High").tolist() == [2.0] * 5
+    batches = pd.concat(iter_table("data/prices/stock_prices.csv", batch_size=3))
+    assert batches["High"].notna().sum() == 5
@@ -0,0 +1,85 @@
+# tests/test_technical_indicators.py
+
+import numpy as np
+import pandas as pd
+import pytest
+from src.data.synthetic import synthetic_prices
+from src.features.technical_indicators import (
+    INDICATOR_COLUMNS, LAG_HORIZONS, add_technical_indicators, update_technical_indicators,
+)
+
+
+@pytest.fixture
+def prices():
+    """Shuffled multi-ticker bars with a short and a very short ticker and a few missing values."""
+    df = synthetic_prices(6, 300, seed=3)
+    position = df.groupby("ticker").cumcount()
+    df = df[~((df["ticker"] == "T0002") & (position > 80)) & ~((df["ticker"] == "T0005") & (position > 30))]
+    df.loc[df.sample(15, random_state=1).index, "Close"] = np.nan
+    df.loc[df.sample(10, random_state=2).index, "Volume"] = np.nan
+    return df.sample(frac=1, random_state=0).reset_index(drop=True)
+
+
+def _reference(g):
+    """Per-ticker indicators written with pandas rolling/ewm, as the pipeline computed them originally."""
+    g = g.sort_values("Date")
+    c, h, l, v = g["Close"], g["High"], g["Low"], g["Volume"]
+    out = {"MA25": c.rolling(25).mean(), "MA50": c.rolling(50).mean()}
+    ma20, sd20 = c.rolling(20).mean(), c.rolling(20).std()
+    out["BB_upper"], out["BB_lower"] = ma20 + 2 * sd20, ma20 - 2 * sd20
+    out["MACD"] = c.ewm(span=12, adjust=False).mean() - c.ewm(span=26, adjust=False).mean()
+    out["MACD_signal"] = out["MACD"].ewm(span=9, adjust=False).mean()
+    delta = c.diff()
+    gain, loss = delta.where(delta > 0, 0).rolling(14).mean(), (-delta.where(delta < 0, 0)).rolling(14).mean()
+    out["RSI"] = 100 - 100 / (1 + gain / loss)
+    prev = c.shift(1)
+    true_range = pd.concat([h - l, (h - prev).abs(), (l - prev).abs()], axis=1).max(axis=1)
+    out["ATR"] = true_range.rolling(14).mean()
+    lowest, highest = l.rolling(14).min(), h.rolling(14).max()
+    out["Stoch_K"] = 100 * (c - lowest) / (highest - lowest)
+    out["Stoch_D"] = out["Stoch_K"].rolling(3).mean()
+    out["OBV"] = (np.sign(delta.fillna(0)) * v).fillna(0).cumsum().where(v.notna())
+    out["VWAP"] = ((h + l + c) / 3 * v).rolling(20).mean() / v.rolling(20).mean()
+    out["Return_1"] = delta / prev
+    out["Return_5"] = c / c.shift(5) - 1
+    out["Return_20"] = c / c.shift(20) - 1
+    out["Volatility_20"] = out["Return_1"].rolling(20).std()
+    for k in LAG_HORIZONS:
+        out[f"Return_lag_{k}"] = out["Return_1"].shift(k)
+    return pd.DataFrame(out, index=g.index)
+
+
+def _assert_same(actual, expected):
+    for col in INDICATOR_COLUMNS:
+        np.testing.assert_allclose(actual[col].to_numpy(dtype=np.float64), expected[col].to_numpy(dtype=np.float64),
+                                   rtol=1e-7, atol=1e-6, equal_nan=True, err_msg=col)
+
+
+def test_matches_pandas_reference(prices):
+    expected = pd.concat([_reference(g) for _, g in prices.groupby("ticker")]).reindex(prices.index)
+    result = add_technical_indicators(prices)
+    _assert_same(result, expected)
+    pd.testing.assert_frame_equal(result[prices.columns], prices)
+
+
+def test_incremental_update_equals_full_recompute(prices, tmp_path):
+    state_path = str(tmp_path / "indicator_state.pkl")
+    dates = prices["Date"].sort_values().unique()
+    for cut in (dates[len(dates) // 2], dates[-40], dates[-1]):
+        result = update_technical_indicators(prices[prices["Date"] <= cut], state_path)
+    _assert_same(result, add_technical_indicators(prices))
+
+
+def test_legacy_string_columns_match_typed_ohlcv(prices):
+    typed = add_technical_indicators(prices)
+    legacy = prices.rename(columns={"High": "high", "Low": "low", "Volume": "volume"})
+    legacy = legacy.astype({"high": str, "low": str, "volume": str})
+    _assert_same(add_technical_indicators(legacy), typed)
+
+
+def test_close_only_frame_leaves_ohlcv_indicators_nan(prices):
+    typed = add_technical_indicators(prices)
+    close_only = add_technical_indicators(prices[["Date", "Close", "ticker"]])
+    assert close_only[["ATR", "Stoch_K", "OBV", "VWAP"]].isna().all().all()
+    for col in ["MA25", "MA50", "MACD", "RSI", "Return_1", "Volatility_20"]:
+        np.testing.assert_allclose(close_only[col], typed[col], equal_nan=True, err_msg=col)
@@ -0,0 +1,63 @@
+# tests/test_train_all.py
+
+import json
+import os
+import numpy as np
+import pytest
+from sklearn.metrics import accuracy_score
+from src.features.matrices import FEATURE_DTYPE, TARGET_DTYPE, save_manifest, write_matrix
+from src.models.artifacts import load_artifact
+from src.models.train_all import core_split, train_all_models
+from src.models.train_model import make_model
+
+
+@pytest.fixture
+def manifest_path(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    rng = np.random.default_rng(0)
+    X = rng.normal(size=(400, 5))
+    y = (X[:, 0] + 0.5 * rng.normal(size=400) > 0).astype(int)
+    splits = {}
+    for name, rows in [("train", slice(0, 300)), ("test", slice(300, 400))]:
+        paths = {"X": str(tmp_path / f"X_{name}.npy"), "y": str(tmp_path / f"y_{name}.npy")}
+        write_matrix(paths["X"], X[rows], FEATURE_DTYPE)
+        write_matrix(paths["y"], y[rows], TARGET_DTYPE)
+        splits[name] = {**paths, "rows": len(y[rows])}
+    path = str(tmp_path / "models" / "feature_manifest.json")
+    save_manifest([f"f{i}" for i in range(5)], splits, manifest_path=path)
+    return path
+
+
+def test_core_split_stays_within_the_budget():
+    assert core_split(8, 3) == (3, 2)
+    assert core_split(4, 10) == (4, 1)
+    assert core_split(1, 5) == (1, 1)
+
+
+def test_every_candidate_is_ranked_and_each_models_best_is_kept(manifest_path, tmp_path):
+    grid_file = tmp_path / "grid.json"
+    grid_file.write_text(json.dumps({"logistic_regression": {"C": [0.001, 1.0]}, "sgd": {"alpha": [1e-4, 1e-2]}}))
+
+    leaderboard = train_all_models(["logistic_regression", "sgd"], grid_file=str(grid_file), n_jobs=2,
+                                   manifest_path=manifest_path)
+
+    assert len(leaderboard) == 4
+    assert leaderboard["accuracy"].is_monotonic_decreasing
+    kept = leaderboard.dropna(subset=["path"])
+    assert sorted(kept["path"]) == ["models/stock_model_logistic_regression.pkl", "models/stock_model_sgd.pkl"]
+    assert not os.path.exists("models/candidates")
+    assert len(os.listdir("results")) == 1
+
+    # A candidate fitted in a worker scores the same as fitting it here
+    best = kept[kept["model"] == "logistic_regression"].iloc[0]
+    X_train, y_train = np.load(str(tmp_path / "X_train.npy")), np.load(str(tmp_path / "y_train.npy"))
+    X_test, y_test = np.load(str(tmp_path / "X_test.npy")), np.load(str(tmp_path / "y_test.npy"))
+    local = make_model("logistic_regression", **json.loads(best["params"])).fit(X_train, y_train)
+    assert accuracy_score(y_test, local.predict(X_test)) == best["accuracy"]
+    saved = load_artifact(best["path"])
+    np.testing.assert_array_equal(saved.predict(X_test), local.predict(X_test))
+
+
+def test_unknown_model_is_rejected(manifest_path):
+    with pytest.raises(ValueError, match="Unknown models"):
+        train_all_models(["no_such_model"], manifest_path=manifest_path)
@@ -0,0 +1,94 @@
+# tests/test_translation.py
+
+import pytest
+from src import metrics
+from src.data.translation import CircuitBreaker, TranslationProvider, Translator
+
+
+class FakeProvider(TranslationProvider):
+    """Upper-cases its input, or raises while `failing` is set; records every batch it is sent."""
+
+    def __init__(self, name, failing=False):
+        self.name = name
+        self.failing = failing
+        self.batches = []
+
+    def translate_batch(self, chunks, src_lang="auto", dest_lang="en"):
+        self.batches.append(list(chunks))
+        if self.failing:
+            raise ConnectionError(f"{self.name} is down")
+        return [f"{self.name}:{chunk.upper()}" for chunk in chunks]
+
+
+@pytest.fixture
+def counters(monkeypatch):
+    monkeypatch.setattr(metrics, "enabled", True)
+    metrics.reset()
+    yield
+    metrics.reset()
+
+
+def test_failed_batches_fall_back_in_provider_order(counters):
+    first, second, third = FakeProvider("first", failing=True), FakeProvider("second"), FakeProvider("third")
+    translator = Translator(providers=[first, second, third], max_workers=1, batch_size=2)
+
+    out = translator.translate_texts(["hola", "adios", "gracias"])
+
+    assert out == ["second:HOLA", "second:ADIOS", "second:GRACIAS"]
+    assert len(first.batches) == 2 and len(second.batches) == 2 and third.batches == []
+    assert translator.stats()["first"] == {"calls": 2, "failures": 2}
+    assert metrics._counter_snapshot()["translation_retries"] == 2
+
+
+def test_open_breaker_skips_provider_until_reset(monkeypatch, counters):
+    clock = [1000.0]
+    monkeypatch.setattr("src.data.translation.time.monotonic", lambda: clock[0])
+    flaky, backup = FakeProvider("flaky", failing=True), FakeProvider("backup")
+    translator = Translator(providers=[flaky, backup], max_workers=1, batch_size=1,
+                            failure_threshold=2, reset_timeout=30.0)
+
+    translator.translate_texts(["a", "b", "c", "d"])
+
+    # Two failures open the breaker; the remaining batches go straight to the backup
+    assert len(flaky.batches) == 2 and len(backup.batches) == 4
+    snapshot = metrics._counter_snapshot()
+    assert snapshot["circuit_opened.flaky"] == 1
+    assert snapshot["circuit_open_skips.flaky"] == 2
+
+    flaky.failing = False
+    clock[0] += 30.0
+    assert translator.translate_texts(["e", "f"]) == ["flaky:E", "flaky:F"]
+    assert len(flaky.batches) == 4  # half-open trial succeeded and closed the breaker
+
+
+def test_untranslatable_chunks_are_returned_unchanged_and_not_cached(counters):
+    class Cache:
+        def __init__(self):
+            self.stored = {}
+
+        def get_many(self, texts, src_lang, dest_lang):
+            return {}
+
+        def put_many(self, translations, src_lang, dest_lang):
+            self.stored.update(translations)
+
+    down = FakeProvider("down", failing=True)
+    cache = Cache()
+    translator = Translator(providers=[down], max_workers=1)
+
+    assert translator.translate_texts(["hello world", None], cache=cache) == ["hello world", None]
+    assert cache.stored == {}
+
+
+def test_breaker_reopens_when_half_open_trial_fails(monkeypatch):
+    clock = [0.0]
+    monkeypatch.setattr("src.data.translation.time.monotonic", lambda: clock[0])
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=10.0)
+
+    assert breaker.record_failure() is True
+    assert not breaker.allow()
+    clock[0] = 10.0
+    assert breaker.allow() and not breaker.allow()  # a single trial per timeout
+    assert breaker.record_failure() is False  # already open: not counted as a new opening
+    clock[0] = 15.0
+    assert not breaker.allow()
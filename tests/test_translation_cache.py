@@ -0,0 +1,60 @@
+# tests/test_translation_cache.py
+
+import pytest
+from src import metrics
+from src.data.translation_cache import TranslationCache
+
+
+@pytest.fixture
+def cache(tmp_path):
+    cache = TranslationCache(str(tmp_path / "translations.sqlite"), max_bytes=30)
+    yield cache
+    cache.close()
+
+
+def test_hits_and_misses_are_counted_per_distinct_text(cache, monkeypatch):
+    monkeypatch.setattr(metrics, "enabled", True)
+    metrics.reset()
+    cache.put_many({"hola": "hello", "adios": "bye"})
+
+    found = cache.get_many(["hola", "hola", "adios", "gracias"])
+    totals = metrics._counter_snapshot()
+    metrics.reset()
+
+    assert found == {"hola": "hello", "adios": "bye"}
+    assert cache.stats()["hits"] == 2 and cache.stats()["misses"] == 1
+    assert totals["translation_cache_hits"] == 2 and totals["translation_cache_misses"] == 1
+    # Entries are keyed per language pair
+    assert cache.get("hola", src_lang="es", dest_lang="en") is None
+
+
+def test_least_recently_used_entries_are_evicted(cache, monkeypatch):
+    clock = [100.0]
+    monkeypatch.setattr("src.data.translation_cache.time.time", lambda: clock[0])
+    for text in ["a", "b", "c"]:
+        cache.put(text, "x" * 10)  # 30 bytes: exactly at the limit
+        clock[0] += 1
+    assert cache.get("a") == "x" * 10  # touching "a" makes "b" the oldest
+    clock[0] += 1
+
+    cache.put("d", "y" * 10)
+
+    assert cache.get("b") is None
+    assert {text: cache.get(text) for text in ["a", "c", "d"]} == {"a": "x" * 10, "c": "x" * 10, "d": "y" * 10}
+    stats = cache.stats()
+    assert stats["evictions"] == 1 and stats["entries"] == 3 and stats["bytes"] == 30
+
+
+def test_size_accounting_survives_reopening(tmp_path):
+    path = str(tmp_path / "translations.sqlite")
+    cache = TranslationCache(path)
+    cache.put("hola", "hello")
+    cache.put("hola", "hi")  # replacing an entry must not double count its size
+    cache.close()
+
+    reopened = TranslationCache(path)
+    try:
+        assert reopened.stats()["bytes"] == len("hi")
+        assert reopened.get("hola") == "hi"
+    finally:
+        reopened.close()
@@ -0,0 +1,46 @@
+# tests/test_utils.py
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+from src.data.storage import read_table
+from src.data import utils
+from src.data.utils import analyze_sentiment_batch, is_mostly_non_latin, non_latin_mask, save_to_csv
+from src.pipeline import FileHasher
+
+TEXTS = ["Apple shares rise", "Акции Apple выросли после отчёта", None, "苹果股价上涨", "Die Aktie steigt", ""]
+
+
+def test_non_latin_mask_matches_per_row_check():
+    expected = [bool(is_mostly_non_latin(t or "")) for t in TEXTS]
+    assert non_latin_mask(pd.Series(TEXTS, dtype=object)).tolist() == expected
+
+
+def test_non_latin_mask_accepts_chunked_arrow_strings():
+    # Arrow-backed columns (e.g. read from Parquet) hold several chunks
+    chunked = pa.chunked_array([TEXTS[:2], TEXTS[2:4], TEXTS[4:]], type=pa.string())
+    texts = pd.Series(pd.arrays.ArrowExtensionArray(chunked))
+    assert non_latin_mask(texts).tolist() == non_latin_mask(pd.Series(TEXTS, dtype=object)).tolist()
+
+
+def test_save_to_csv_rewrites_unchanged_news_identically(tmp_path):
+    path = str(tmp_path / "news_original_language.csv")
+    news = pd.DataFrame({"title": ["a", "b"], "publishedAt": ["2024-01-01T10:00:00Z", "2024-01-02T10:00:00Z"],
+                         "ticker": ["AAPL", "MSFT"]})
+    digests = []
+    for _ in range(3):
+        save_to_csv(news, path)
+        digests.append(FileHasher().digest(path))
+    assert len(set(digests)) == 1
+    assert str(read_table(path)["publishedAt"].dtype) == "datetime64[ns, UTC]"
+
+
+def test_parallel_sentiment_matches_serial(monkeypatch):
+    texts = ["Great quarter, shares soar!", "Terrible losses and a lawsuit.", None, "Flat day.", ""] * 9
+    serial = analyze_sentiment_batch(texts, n_jobs=1)
+    monkeypatch.setattr(utils, "SENTIMENT_PARALLEL_MIN", 10)
+    parallel = analyze_sentiment_batch(texts, n_jobs=2, chunk_size=7)
+    for key, scores in serial.items():
+        assert len(parallel[key]) == len(texts)
+        np.testing.assert_array_equal(parallel[key], scores)
+    assert serial["compound"][2] == 0 and serial["compound"][0] > 0 > serial["compound"][1]